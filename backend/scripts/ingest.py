@@ -13,6 +13,7 @@ Usage:
 """
 
 import argparse
+import asyncio
 import sys
 from pathlib import Path
 
@@ -23,7 +24,19 @@ from src.config.logging_config import setup_logging, get_logger
 from src.providers.github_provider import GithubProvider
 from src.providers.pdf_provider import PDFProvider
 from src.providers.linkedin_provider import LinkedInProvider
-from src.services.vectorization_service import VectorizationService
+from src.providers.base import BaseProvider
+from src.services.vectorization_service import IngestionStats, VectorizationService
+
+try:
+    import uvloop  # installé avec uvicorn[standard] (hors Windows)
+except ImportError:
+    uvloop = None
+
+# Nombre de sources ingérées en parallèle (extraction + embedding sont I/O-bound)
+DEFAULT_CONCURRENCY = 8
+
+# Lots de documents vectorisés simultanément pour chaque source
+DOCUMENT_CONCURRENCY_PER_SOURCE = 4
 
 
 def main() -> None:
@@ -40,6 +53,7 @@ Exemples:
   python scripts/ingest.py --pdf ./cv/mon_cv.pdf
   python scripts/ingest.py --linkedin ./exports/linkedin_export.json
   python scripts/ingest.py --github user/repo1 user/repo2 --skip-duplicates
+  python scripts/ingest.py --pdf ./docs/*.pdf --concurrency 4
         """,
     )
     
@@ -72,6 +86,13 @@ Exemples:
         action="store_true",
         help="Pour les PDFs, créer un document par page",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        metavar="N",
+        help=f"Nombre de sources ingérées en parallèle (défaut: {DEFAULT_CONCURRENCY})",
+    )
     
     args = parser.parse_args()
     
@@ -87,40 +108,40 @@ Exemples:
         "skipped": 0,
         "errors": 0,
     }
-    
+
+    # Chaque source est une tâche indépendante: GitHub, PDF et LinkedIn
+    # sont ingérés ensemble, dans la limite de --concurrency
+    jobs: list[tuple[BaseProvider, str]] = []
+
     # Ingestion GitHub
     if args.github:
         logger.info("Processing GitHub repositories", count=len(args.github))
         provider = GithubProvider()
-        stats = vectorization.ingest_from_provider(
-            provider,
-            args.github,
-            skip_duplicates=args.skip_duplicates,
-        )
-        _update_stats(total_stats, stats)
-    
+        jobs.extend((provider, repo) for repo in args.github)
+
     # Ingestion PDF
     if args.pdf:
         logger.info("Processing PDF files", count=len(args.pdf))
         provider = PDFProvider(chunk_by_page=args.chunk_pages)
-        stats = vectorization.ingest_from_provider(
-            provider,
-            args.pdf,
-            skip_duplicates=args.skip_duplicates,
-        )
-        _update_stats(total_stats, stats)
-    
+        jobs.extend((provider, path) for path in args.pdf)
+
     # Ingestion LinkedIn
     if args.linkedin:
         logger.info("Processing LinkedIn exports", count=len(args.linkedin))
         provider = LinkedInProvider()
-        stats = vectorization.ingest_from_provider(
-            provider,
-            args.linkedin,
+        jobs.extend((provider, path) for path in args.linkedin)
+
+    run = uvloop.run if uvloop is not None else asyncio.run
+    run(
+        _ingest_concurrently(
+            vectorization,
+            jobs,
+            total_stats,
             skip_duplicates=args.skip_duplicates,
+            concurrency=max(1, args.concurrency),
         )
-        _update_stats(total_stats, stats)
-    
+    )
+
     # Résumé final
     logger.info(
         "Ingestion completed",
@@ -140,6 +161,41 @@ Exemples:
     print("=" * 50)
 
 
+async def _ingest_concurrently(
+    vectorization: VectorizationService,
+    jobs: list[tuple[BaseProvider, str]],
+    total_stats: dict,
+    skip_duplicates: bool,
+    concurrency: int,
+) -> None:
+    """
+    Ingère les sources en parallèle avec un nombre borné de workers.
+
+    Un sémaphore limite le nombre de sources en cours; chaque source
+    vectorise au plus DOCUMENT_CONCURRENCY_PER_SOURCE lots de documents à la fois.
+
+    Args:
+        vectorization: Service de vectorisation partagé.
+        jobs: Couples (provider, source) à ingérer.
+        total_stats: Statistiques totales, mises à jour au fil de l'eau.
+        skip_duplicates: Ignorer les documents déjà présents.
+        concurrency: Nombre maximum de sources traitées simultanément.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def ingest(provider: BaseProvider, source: str) -> IngestionStats:
+        async with semaphore:
+            return await vectorization.ingest_from_provider_async(
+                provider,
+                [source],
+                skip_duplicates=skip_duplicates,
+                concurrency=DOCUMENT_CONCURRENCY_PER_SOURCE,
+            )
+
+    for completed in asyncio.as_completed([ingest(p, s) for p, s in jobs]):
+        _update_stats(total_stats, await completed)
+
+
 def _update_stats(total: dict, stats) -> None:
     """Met à jour les statistiques totales."""
     total["processed"] += stats.total_processed
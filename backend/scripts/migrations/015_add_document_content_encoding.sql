@@ -0,0 +1,61 @@
+-- =============================================
+-- Migration 015: Compression du contenu des documents
+-- =============================================
+--
+-- Les pages PDF volumineuses sont stockées compressées (zstd, encodé en
+-- base64 dans la colonne TEXT). La colonne content_encoding indique au
+-- backend comment décoder le contenu ('identity' = texte brut).
+--
+-- match_documents retourne désormais content_encoding pour que le
+-- backend puisse décompresser les résultats de recherche.
+-- =============================================
+
+ALTER TABLE public.documents
+ADD COLUMN IF NOT EXISTS content_encoding TEXT NOT NULL DEFAULT 'identity';
+
+-- Le type de retour change: il faut supprimer l'ancienne fonction
+DROP FUNCTION IF EXISTS public.match_documents(VECTOR(1024), FLOAT, INT, UUID, UUID, TEXT);
+
+CREATE OR REPLACE FUNCTION public.match_documents(
+    query_embedding VECTOR(1024),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 10,
+    filter_user_id UUID DEFAULT NULL,
+    filter_agent_id UUID DEFAULT NULL,
+    filter_source_type TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    content_encoding TEXT,
+    source_type TEXT,
+    source_id TEXT,
+    metadata JSONB,
+    similarity FLOAT
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        d.id,
+        d.content,
+        d.content_encoding,
+        d.source_type,
+        d.source_id,
+        d.metadata,
+        1 - (d.embedding <=> query_embedding) AS similarity
+    FROM public.documents d
+    WHERE
+        1 - (d.embedding <=> query_embedding) > match_threshold
+        AND (filter_user_id IS NULL OR d.user_id = filter_user_id)
+        AND (filter_agent_id IS NULL OR d.agent_id = filter_agent_id)
+        AND (filter_source_type IS NULL OR d.source_type = filter_source_type)
+    ORDER BY d.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+COMMENT ON COLUMN public.documents.content_encoding IS 'Encodage du contenu: identity ou zstd (base64)';
+COMMENT ON FUNCTION public.match_documents IS 'Recherche vectorielle avec filtres';
@@ -0,0 +1,35 @@
+-- =============================================
+-- Migration 016: Réservation atomique des webhooks Stripe
+-- =============================================
+--
+-- Remplace le couple SELECT (déjà traité ?) + INSERT (marquer traité)
+-- par un seul INSERT ... ON CONFLICT DO NOTHING: un aller-retour par
+-- webhook, et deux livraisons concurrentes du même event ne peuvent
+-- plus être traitées toutes les deux.
+--
+-- Le backend supprime la réservation si le traitement échoue, pour que
+-- Stripe puisse relivrer l'event.
+-- =============================================
+
+CREATE OR REPLACE FUNCTION public.claim_webhook_event(
+    p_event_id TEXT,
+    p_event_type TEXT
+)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    INSERT INTO public.processed_webhook_events (event_id, event_type)
+    VALUES (p_event_id, p_event_type)
+    ON CONFLICT (event_id) DO NOTHING;
+
+    -- FOUND est faux si la ligne existait déjà (rejeu)
+    RETURN FOUND;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.claim_webhook_event(TEXT, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_webhook_event(TEXT, TEXT) TO service_role;
+
+COMMENT ON FUNCTION public.claim_webhook_event IS 'Réserve un event Stripe: TRUE si nouveau, FALSE si déjà traité (rejeu)';
@@ -0,0 +1,75 @@
+-- =============================================
+-- Migration 017: Recherche vectorielle par produit scalaire
+-- =============================================
+--
+-- Le backend stocke désormais des embeddings normalisés (norme L2 = 1)
+-- et normalise aussi le vecteur de requête. Pour des vecteurs unitaires,
+-- la similarité cosinus est égale au produit scalaire: match_documents_dot
+-- utilise l'opérateur <#> (produit scalaire négatif) de pgvector, moins
+-- coûteux que <=> (cosinus) qui recalcule les deux normes.
+--
+-- Prérequis: pgvector >= 0.7 (l2_normalize).
+-- match_documents (cosinus) est conservée pour les anciens clients.
+-- =============================================
+
+-- Normaliser les embeddings existants
+UPDATE public.documents
+SET embedding = l2_normalize(embedding)
+WHERE embedding IS NOT NULL;
+
+-- Colonne écrite par le backend (DocumentRepository.create_from_model)
+ALTER TABLE public.documents
+ADD COLUMN IF NOT EXISTS api_key_id UUID REFERENCES public.api_keys(id) ON DELETE SET NULL;
+
+-- Index HNSW sur le produit scalaire
+CREATE INDEX IF NOT EXISTS idx_documents_embedding_ip
+ON public.documents USING hnsw(embedding vector_ip_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION public.match_documents_dot(
+    query_embedding VECTOR(1024),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 10,
+    filter_user_id UUID DEFAULT NULL,
+    filter_agent_id UUID DEFAULT NULL,
+    filter_api_key_id UUID DEFAULT NULL,
+    filter_source_type TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    content_encoding TEXT,
+    source_type TEXT,
+    source_id TEXT,
+    metadata JSONB,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        d.id,
+        d.content,
+        d.content_encoding,
+        d.source_type,
+        d.source_id,
+        d.metadata,
+        -- <#> renvoie le produit scalaire négatif
+        ((d.embedding <#> query_embedding) * -1)::FLOAT AS similarity,
+        d.created_at
+    FROM public.documents d
+    WHERE
+        (d.embedding <#> query_embedding) * -1 > match_threshold
+        AND (filter_user_id IS NULL OR d.user_id = filter_user_id)
+        AND (filter_agent_id IS NULL OR d.agent_id = filter_agent_id)
+        AND (filter_api_key_id IS NULL OR d.api_key_id = filter_api_key_id)
+        AND (filter_source_type IS NULL OR d.source_type = filter_source_type)
+    ORDER BY d.embedding <#> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+COMMENT ON FUNCTION public.match_documents_dot IS 'Recherche vectorielle par produit scalaire (embeddings normalisés)';
@@ -0,0 +1,107 @@
+-- =============================================
+-- Migration 018: Index vectoriel en demi-précision (halfvec)
+-- =============================================
+--
+-- Les index HNSW float32 pèsent 4 Ko par vecteur (1024 dimensions): la
+-- recherche est limitée par la bande passante mémoire. L'index est
+-- reconstruit sur embedding::halfvec (2 octets par dimension, 2 Ko par
+-- vecteur): deux fois moins de mémoire à parcourir.
+--
+-- Les deux index float32 sont supprimés:
+--   - idx_documents_embedding_ip (017, produit scalaire)
+--   - idx_documents_embedding (001, cosinus): seule match_documents
+--     l'utilisait, et le backend n'appelle plus que match_documents_dot.
+--     match_documents reste disponible, en parcours exact (plus lent).
+--
+-- match_documents_dot procède en deux temps:
+--   1. candidats via l'index halfvec (match_count * 4 documents)
+--   2. re-classement des candidats sur la colonne float32 (précision
+--      complète pour le seuil et l'ordre final)
+--
+-- Les filtres (user, agent, clé API, source) s'appliquent après le
+-- parcours HNSW. Avec un hnsw.ef_search fixe (40 par défaut), un agent
+-- qui possède peu de documents n'aurait aucun candidat: le scan itératif
+-- (relaxed_order) continue le parcours jusqu'à trouver assez de lignes
+-- filtrées, l'ordre exact étant rétabli par le re-classement float32.
+--
+-- La colonne embedding reste en float32: pgvector n'a pas de type int8,
+-- et une colonne bytea quantifiée ne serait pas indexable.
+--
+-- Prérequis: pgvector >= 0.8 (halfvec, hnsw.iterative_scan).
+-- =============================================
+
+-- Remplacer les index float32 par un index halfvec
+DROP INDEX IF EXISTS public.idx_documents_embedding_ip;
+DROP INDEX IF EXISTS public.idx_documents_embedding;
+
+CREATE INDEX IF NOT EXISTS idx_documents_embedding_half_ip
+ON public.documents USING hnsw((embedding::halfvec(1024)) halfvec_ip_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION public.match_documents_dot(
+    query_embedding VECTOR(1024),
+    match_threshold FLOAT DEFAULT 0.7,
+    match_count INT DEFAULT 10,
+    filter_user_id UUID DEFAULT NULL,
+    filter_agent_id UUID DEFAULT NULL,
+    filter_api_key_id UUID DEFAULT NULL,
+    filter_source_type TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    content TEXT,
+    content_encoding TEXT,
+    source_type TEXT,
+    source_id TEXT,
+    metadata JSONB,
+    similarity FLOAT,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+    -- Liste de candidats HNSW au moins aussi longue que la limite du CTE,
+    -- et parcours prolongé tant que les filtres écartent des lignes
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(match_count * 4, 40), 1000)::TEXT, true);
+    PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        -- Parcours de l'index halfvec (l'expression doit être identique)
+        SELECT
+            d.id,
+            d.content,
+            d.content_encoding,
+            d.source_type,
+            d.source_id,
+            d.metadata,
+            d.embedding,
+            d.created_at
+        FROM public.documents d
+        WHERE
+            (filter_user_id IS NULL OR d.user_id = filter_user_id)
+            AND (filter_agent_id IS NULL OR d.agent_id = filter_agent_id)
+            AND (filter_api_key_id IS NULL OR d.api_key_id = filter_api_key_id)
+            AND (filter_source_type IS NULL OR d.source_type = filter_source_type)
+        ORDER BY d.embedding::halfvec(1024) <#> query_embedding::halfvec(1024)
+        LIMIT match_count * 4
+    )
+    SELECT
+        c.id,
+        c.content,
+        c.content_encoding,
+        c.source_type,
+        c.source_id,
+        c.metadata,
+        -- Re-classement en float32: <#> renvoie le produit scalaire négatif
+        ((c.embedding <#> query_embedding) * -1)::FLOAT AS similarity,
+        c.created_at
+    FROM candidates c
+    WHERE (c.embedding <#> query_embedding) * -1 > match_threshold
+    ORDER BY c.embedding <#> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+COMMENT ON FUNCTION public.match_documents_dot IS 'Recherche vectorielle par produit scalaire (index halfvec, re-classement float32)';
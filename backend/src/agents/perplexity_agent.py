@@ -6,13 +6,51 @@ Agent de recherche web en temps réel utilisant l'API Perplexity.
 Fournit un contexte actualisé pour enrichir les réponses du RAG.
 """
 
-from dataclasses import dataclass
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from types import MappingProxyType
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from src.config.logging_config import LoggerMixin
 from src.config.settings import get_settings
+from src.utils.background_loop import get_background_loop as _get_background_loop
+
+try:
+    import h2  # noqa: F401 - active HTTP/2 dans httpx
+except ImportError:
+    h2 = None
+
+try:
+    # orjson.JSONDecodeError hérite de json.JSONDecodeError
+    from orjson import dumps as _json_dumps
+    from orjson import loads as _json_loads
+except ImportError:  # Dépendance optionnelle: fallback sur la stdlib
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    _json_loads = json.loads
+
+# Pool de connexions du client persistant
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# Cache des résultats: les mêmes questions reviennent à quelques minutes d'écart
+SEARCH_CACHE_TTL_SECONDS = 300
+SEARCH_CACHE_MAX_ENTRIES = 1024
+
+# Requêtes simultanées max pour asearch_many (limites de l'API Perplexity)
+DEFAULT_MAX_CONCURRENCY = 5
+
+# Marge ajoutée au timeout HTTP pour l'attente d'une recherche synchrone
+SYNC_SEARCH_GRACE_SECONDS = 5
 
 
 @dataclass
@@ -49,17 +87,20 @@ class PerplexityAgent(LoggerMixin):
 
     # Modèles disponibles (mis à jour décembre 2024)
     # Documentation: https://docs.perplexity.ai/getting-started/models
-    MODELS = {
-        "small": "sonar",  # Recherche légère et économique
-        "large": "sonar-pro",  # Recherche avancée
-        "reasoning": "sonar-reasoning-pro",  # Raisonnement avec Chain of Thought
-        "research": "sonar-deep-research",  # Recherche approfondie
-    }
+    MODELS = MappingProxyType(
+        {
+            "small": "sonar",  # Recherche légère et économique
+            "large": "sonar-pro",  # Recherche avancée
+            "reasoning": "sonar-reasoning-pro",  # Raisonnement avec Chain of Thought
+            "research": "sonar-deep-research",  # Recherche approfondie
+        }
+    )
 
     def __init__(
         self,
         model_size: str = "small",
         timeout: int = 30,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
     ) -> None:
         """
         Initialise l'agent Perplexity.
@@ -67,13 +108,26 @@ class PerplexityAgent(LoggerMixin):
         Args:
             model_size: Taille du modèle (small, large, huge).
             timeout: Timeout des requêtes en secondes.
+            max_concurrency: Requêtes simultanées max pour asearch_many.
         """
         settings = get_settings()
         self.api_key = settings.perplexity_api_key
         self.model = self.MODELS.get(model_size, self.MODELS["small"])
         self.timeout = timeout
+        self._max_concurrency = max(1, max_concurrency)
         self._enabled = bool(self.api_key)
 
+        # Cache LRU+TTL des résultats et recherches en vol, par
+        # (modèle, prompt système, requête, max_tokens). Partagés par la
+        # boucle de l'application et celle de search_sync: protégés par un verrou
+        self._result_cache: OrderedDict[tuple, tuple[WebSearchResult, float]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._cache_lock = threading.Lock()
+
+        # Clients HTTP persistants (keep-alive), un par boucle d'événements
+        self._clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._clients_lock = threading.Lock()
+
         if not self._enabled:
             self.logger.warning("Perplexity API key not configured, web search disabled")
 
@@ -82,10 +136,61 @@ class PerplexityAgent(LoggerMixin):
         """Vérifie si l'agent est activé."""
         return self._enabled
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-    )
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Retourne le client HTTP persistant de la boucle courante.
+
+        Le client réutilise ses connexions TLS d'une recherche à l'autre.
+        Ses connexions sont liées à la boucle d'événements: chaque boucle
+        (celle de l'application, celle de search_sync) garde son propre
+        client, au lieu d'en recréer un à chaque changement de boucle.
+
+        Returns:
+            Client httpx partagé par les recherches de la boucle.
+        """
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            self._drop_closed_loops()
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._clients[loop] = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    http2=h2 is not None,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                    },
+                )
+        return client
+
+    def _drop_closed_loops(self) -> None:
+        """Oublie les clients des boucles fermées (ex: asyncio.run terminé)."""
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+
+    async def aclose(self) -> None:
+        """
+        Ferme les clients HTTP persistants.
+
+        Le client de la boucle courante est fermé immédiatement; ceux des
+        autres boucles encore actives sont fermés sur leur propre boucle.
+        """
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            clients, self._clients = self._clients, {}
+
+        for client_loop, client in clients.items():
+            if client.is_closed or client_loop.is_closed():
+                continue
+            if client_loop is loop:
+                await client.aclose()
+            else:
+                asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+
     async def search(
         self,
         query: str,
@@ -95,6 +200,9 @@ class PerplexityAgent(LoggerMixin):
         """
         Effectue une recherche web.
 
+        Les résultats sont mis en cache SEARCH_CACHE_TTL_SECONDS secondes,
+        et les recherches identiques concurrentes partagent un seul appel.
+
         Args:
             query: Question ou requête de recherche.
             system_prompt: Prompt système personnalisé.
@@ -106,6 +214,72 @@ class PerplexityAgent(LoggerMixin):
         if not self._enabled:
             return None
 
+        key = (self.model, system_prompt, query, max_tokens)
+        cached = self._get_cached_result(key)
+        if cached is not None:
+            return replace(cached)
+
+        loop = asyncio.get_running_loop()
+        with self._cache_lock:
+            task = self._inflight.get(key)
+            # Une tâche n'est partageable que sur sa propre boucle (search_sync)
+            if task is None or task.get_loop() is not loop:
+                task = loop.create_task(self._search_uncached(query, system_prompt, max_tokens))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t: self._release_inflight(key, t))
+
+        # shield: l'annulation d'un appelant n'annule pas les autres
+        result = await asyncio.shield(task)
+        return replace(result) if result is not None else None
+
+    def _release_inflight(self, key: tuple, task: asyncio.Task) -> None:
+        """Retire une recherche terminée et met en cache son résultat."""
+        with self._cache_lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if not task.cancelled() and task.exception() is None and task.result() is not None:
+            self._cache_result(key, task.result())
+
+    def _get_cached_result(self, key: tuple) -> WebSearchResult | None:
+        """Récupère un résultat du cache s'il est encore valide."""
+        with self._cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+
+            result, timestamp = entry
+            if time.monotonic() - timestamp >= SEARCH_CACHE_TTL_SECONDS:
+                del self._result_cache[key]
+                return None
+
+            self._result_cache.move_to_end(key)
+            return result
+
+    def _cache_result(self, key: tuple, result: WebSearchResult) -> None:
+        """Met en cache un résultat (éviction LRU au-delà de SEARCH_CACHE_MAX_ENTRIES)."""
+        with self._cache_lock:
+            self._result_cache[key] = (result, time.monotonic())
+            self._result_cache.move_to_end(key)
+
+            while len(self._result_cache) > SEARCH_CACHE_MAX_ENTRIES:
+                self._result_cache.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        """Vide le cache des résultats de recherche."""
+        with self._cache_lock:
+            self._result_cache.clear()
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+    )
+    async def _search_uncached(
+        self,
+        query: str,
+        system_prompt: str | None,
+        max_tokens: int,
+    ) -> WebSearchResult | None:
+        """Appelle l'API Perplexity (sans cache)."""
         default_system = """Tu es un assistant de recherche. Donne des réponses courtes et factuelles.
 
 Règles :
@@ -125,20 +299,14 @@ Règles :
             "return_related_questions": False,
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.API_URL,
-                    json=payload,
-                    headers=headers,
-                )
-                response.raise_for_status()
-                data = response.json()
+            # Content-Type application/json déjà porté par le client
+            response = await self._get_client().post(
+                self.API_URL,
+                content=_json_dumps(payload),
+            )
+            response.raise_for_status()
+            data = _json_loads(response.content)
 
             # Extraire le contenu
             content = data["choices"][0]["message"]["content"]
@@ -181,6 +349,34 @@ Règles :
             )
             return None
 
+    async def asearch_many(
+        self,
+        queries: list[str],
+        system_prompt: str | None = None,
+        max_tokens: int = 1024,
+    ) -> list[WebSearchResult | None]:
+        """
+        Effectue plusieurs recherches web en parallèle.
+
+        Les requêtes partagent le client persistant (multiplexées sur une
+        même connexion en HTTP/2), au plus max_concurrency à la fois.
+
+        Args:
+            queries: Requêtes de recherche.
+            system_prompt: Prompt système commun.
+            max_tokens: Tokens maximum par réponse.
+
+        Returns:
+            Résultats dans l'ordre des requêtes (None en cas d'échec).
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def bounded(query: str) -> WebSearchResult | None:
+            async with semaphore:
+                return await self.search(query, system_prompt, max_tokens)
+
+        return await asyncio.gather(*(bounded(query) for query in queries))
+
     def search_sync(
         self,
         query: str,
@@ -190,6 +386,10 @@ Règles :
         """
         Version synchrone de search.
 
+        La recherche s'exécute sur une boucle d'arrière-plan dédiée:
+        utilisable depuis du code synchrone, y compris appelé depuis une
+        boucle asyncio déjà en cours.
+
         Args:
             query: Question ou requête.
             system_prompt: Prompt système.
@@ -201,15 +401,16 @@ Règles :
         if not self._enabled:
             return None
 
-        import asyncio
-
+        future = asyncio.run_coroutine_threadsafe(
+            self.search(query, system_prompt, max_tokens),
+            _get_background_loop(),
+        )
         try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        return loop.run_until_complete(self.search(query, system_prompt, max_tokens))
+            return future.result(timeout=self.timeout + SYNC_SEARCH_GRACE_SECONDS)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.logger.error("Web search timed out", timeout=self.timeout)
+            return None
 
     async def search_with_context(
         self,
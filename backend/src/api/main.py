@@ -36,7 +36,7 @@ from src.api.middleware import (
     RequestLoggingMiddleware,
     SecurityHeadersMiddleware,
 )
-from src.api.routes import router
+from src.api.routes import close_rag_engine, router
 from src.api.routes_admin import admin_router
 from src.api.routes_agent import router as agent_router
 from src.api.routes_agent_config import router as agent_config_router
@@ -48,9 +48,11 @@ from src.api.routes_help import router as help_router
 from src.api.routes_jobs import router as jobs_router
 from src.api.routes_keys import router as keys_router
 from src.api.schemas import HealthResponse
+from src.config.database import close_db_pool
 from src.config.logging_config import get_logger, setup_logging
 from src.config.redis import close_redis, get_redis_client
 from src.config.settings import get_settings
+from src.services.trace_service import close_trace_service
 
 
 @asynccontextmanager
@@ -99,6 +101,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     # Shutdown
     logger.info("API shutting down")
+    await close_rag_engine()
+    await close_trace_service()
+    await close_db_pool()
     await close_redis()
 
 
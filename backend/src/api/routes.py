@@ -64,6 +64,14 @@ def get_rag_engine() -> RAGEngine:
     return _rag_engine
 
 
+async def close_rag_engine() -> None:
+    """Ferme les connexions HTTP du RAG Engine."""
+    global _rag_engine
+    if _rag_engine is not None:
+        await _rag_engine.aclose()
+        _rag_engine = None
+
+
 def get_feedback_service() -> FeedbackService:
     """Retourne l'instance du Feedback Service."""
     global _feedback_service
@@ -491,7 +499,7 @@ async def ingest_github(
         provider = GithubProvider()
         vectorization = get_vectorization()
 
-        stats = vectorization.ingest_from_provider(
+        stats = await vectorization.ingest_from_provider_async(
             provider,
             request.repositories,
             skip_duplicates=request.skip_duplicates,
@@ -34,15 +34,9 @@ class DocumentJobRepository:
     """Repository simple pour les jobs de documents."""
 
     def __init__(self):
-        from supabase import create_client
+        from src.repositories.base import get_supabase_client
 
-        from src.config.settings import get_settings
-
-        settings = get_settings()
-        self._client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_role_key,
-        )
+        self._client = get_supabase_client()
 
     @property
     def client(self):
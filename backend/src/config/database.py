@@ -0,0 +1,101 @@
+"""
+Database Configuration
+======================
+
+Pool de connexions Postgres direct (asyncpg) pour les écritures à fort
+débit (traces, webhooks), sans passer par l'API HTTP de Supabase.
+
+Optionnel: sans SUPABASE_DB_URL ou sans asyncpg, les services restent
+sur le client supabase-py.
+"""
+
+import asyncio
+import time
+
+from src.config.logging_config import get_logger
+from src.config.settings import get_settings
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = get_logger(__name__)
+
+# Le pooler Supabase (mode session) limite le nombre de clients par
+# projet: le pool reste petit, les connexions sont réutilisées
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 10
+DB_POOL_MAX_INACTIVE_SECONDS = 300
+DB_COMMAND_TIMEOUT_SECONDS = 10
+
+# Après un échec de connexion, délai avant une nouvelle tentative: les
+# appelants retombent sur supabase-py sans attendre un timeout à chaque fois
+DB_POOL_RETRY_SECONDS = 30
+
+# Pool asyncpg (lazy loading)
+_db_pool: "asyncpg.Pool | None" = None
+_db_pool_lock = asyncio.Lock()
+_db_pool_failed_at: float | None = None
+
+
+def _in_retry_cooldown() -> bool:
+    """Indique si le dernier échec de création du pool est trop récent."""
+    return (
+        _db_pool_failed_at is not None
+        and time.monotonic() - _db_pool_failed_at < DB_POOL_RETRY_SECONDS
+    )
+
+
+async def get_db_pool() -> "asyncpg.Pool | None":
+    """
+    Retourne le pool de connexions Postgres.
+    Initialise le pool si nécessaire.
+
+    La création est protégée par un verrou: des premiers appels
+    concurrents partagent un seul pool. Après un échec, None est
+    retourné pendant DB_POOL_RETRY_SECONDS sans nouvelle tentative.
+
+    Returns:
+        Pool asyncpg ou None si non configuré / indisponible.
+    """
+    global _db_pool, _db_pool_failed_at
+
+    if _db_pool is not None:
+        return _db_pool
+
+    settings = get_settings()
+    if not settings.supabase_db_url or asyncpg is None or _in_retry_cooldown():
+        return None
+
+    async with _db_pool_lock:
+        if _db_pool is None and not _in_retry_cooldown():
+            try:
+                logger.info("Creating Postgres pool")
+                _db_pool = await asyncpg.create_pool(
+                    settings.supabase_db_url,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_SECONDS,
+                    command_timeout=DB_COMMAND_TIMEOUT_SECONDS,
+                )
+                _db_pool_failed_at = None
+                logger.info("Postgres pool ready")
+            except Exception as e:
+                logger.error(
+                    "Failed to create Postgres pool",
+                    error=str(e),
+                    retry_in_seconds=DB_POOL_RETRY_SECONDS,
+                )
+                _db_pool_failed_at = time.monotonic()
+
+    return _db_pool
+
+
+async def close_db_pool():
+    """Ferme le pool de connexions Postgres."""
+    global _db_pool, _db_pool_failed_at
+    _db_pool_failed_at = None
+    if _db_pool:
+        await _db_pool.close()
+        _db_pool = None
@@ -6,15 +6,114 @@ Configuration structurée du logging avec structlog.
 Fournit des logs formatés et contextualisés pour le debugging et monitoring.
 """
 
+import atexit
+import functools
+import io
 import logging
 import sys
+import threading
+import time
+from datetime import datetime, timezone
 from typing import Any
 
 import structlog
-from structlog.types import Processor
+from structlog.types import EventDict, Processor, WrappedLogger
 
 from src.config.settings import get_settings
 
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle: fallback sur JSONRenderer
+    orjson = None
+
+
+# Tampon des logs JSON quand le vidage est espacé (log_flush_interval)
+LOG_BUFFER_SIZE = 64 * 1024
+
+# Niveaux écrits sans attendre l'intervalle (un kill -9 ne doit pas les perdre)
+_URGENT_METHODS = frozenset({"error", "exception", "critical", "fatal"})
+
+
+class _CoalescingWriter:
+    """
+    Flux binaire qui regroupe les écritures des logs.
+
+    BytesLogger appelle flush() après chaque log: ici, le tampon n'est
+    réellement vidé que si `interval` secondes se sont écoulées depuis
+    le dernier vidage (ou s'il est plein), ce qui remplace un write()
+    par log par un write() par lot. Les logs ERROR et au-delà sont
+    vidés immédiatement, et un thread vide le tampon à chaque intervalle
+    pour qu'un process inactif ne garde pas de logs en attente.
+    """
+
+    def __init__(self, target: Any, interval: float, buffer_size: int = LOG_BUFFER_SIZE):
+        self._target = target
+        self._stream = io.BufferedWriter(target, buffer_size)
+        self._interval = interval
+        self._last_flush = time.monotonic()
+        # Log urgent en cours d'écriture, par thread (processeur -> flush)
+        self._urgent = threading.local()
+        self._stopped = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        return self._stream.write(data)
+
+    def flush(self) -> None:
+        now = time.monotonic()
+        urgent = getattr(self._urgent, "pending", False)
+        if urgent or now - self._last_flush >= self._interval:
+            self._urgent.pending = False
+            self._last_flush = now
+            self.flush_now()
+
+    def flush_now(self) -> None:
+        """Vide le tampon jusqu'à stdout, quel que soit l'intervalle."""
+        self._stream.flush()
+        self._target.flush()
+
+    def flush_urgent(self, _: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        """Processeur structlog: le prochain flush() du thread vide le tampon si ERROR+."""
+        if method_name in _URGENT_METHODS:
+            self._urgent.pending = True
+        return event_dict
+
+    def start(self) -> None:
+        """Démarre le thread qui vide le tampon à chaque intervalle."""
+        threading.Thread(target=self._flush_periodically, name="log-flush", daemon=True).start()
+
+    def close(self) -> None:
+        """Arrête le thread de vidage et vide le tampon."""
+        self._stopped.set()
+        self.flush_now()
+
+    def _flush_periodically(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.flush_now()
+
+
+# Flux des logs JSON installé par setup_logging (arrêté à la reconfiguration)
+_coalescing_writer: _CoalescingWriter | None = None
+
+
+def _add_utc_timestamp(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
+    """Ajoute l'horodatage en datetime UTC (sérialisé en ISO 8601 par orjson)."""
+    event_dict["timestamp"] = datetime.now(timezone.utc)
+    return event_dict
+
+
+def _orjson_renderer(_: WrappedLogger, __: str, event_dict: EventDict) -> bytes:
+    """
+    Sérialise l'événement en JSON avec orjson.
+
+    Retourne des bytes, écrits tels quels par BytesLoggerFactory. Les
+    valeurs non sérialisables sont rendues via repr, comme JSONRenderer.
+    """
+    return orjson.dumps(
+        event_dict,
+        default=repr,
+        option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC,
+    )
+
 
 def setup_logging() -> None:
     """
@@ -23,26 +122,54 @@ def setup_logging() -> None:
     Utilise structlog pour des logs JSON en production
     et des logs colorés en développement.
 
+    Les logs applicatifs sont écrits directement sur stdout par
+    structlog, sans passer par les handlers (et leur verrou) du module
+    logging. Le logging standard ne sert plus qu'aux librairies tierces.
+
     Example:
         >>> setup_logging()
         >>> logger = get_logger("my_module")
         >>> logger.info("Application started", version="1.0.0")
     """
+    global _coalescing_writer
     settings = get_settings()
 
+    if _coalescing_writer is not None:
+        atexit.unregister(_coalescing_writer.close)
+        _coalescing_writer.close()
+        _coalescing_writer = None
+
     # Processeurs communs
     shared_processors: list[Processor] = [
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
         structlog.processors.StackInfoRenderer(),
         structlog.dev.set_exc_info,
-        structlog.processors.TimeStamper(fmt="iso"),
     ]
+    logger_factory: Any = structlog.WriteLoggerFactory(file=sys.stdout)
 
-    if settings.is_production:
-        # Production: JSON logs pour parsing automatique
+    if settings.is_production and orjson is not None:
+        # Production: JSON encodé par orjson, écrit en bytes sur stdout
+        # (l'horodatage est formaté par orjson, sans isoformat() Python)
         shared_processors.extend(
             [
+                _add_utc_timestamp,
+                structlog.processors.dict_tracebacks,
+            ]
+        )
+        stream: Any = sys.stdout.buffer
+        if settings.log_flush_interval > 0:
+            stream = _coalescing_writer = _CoalescingWriter(stream, settings.log_flush_interval)
+            shared_processors.append(stream.flush_urgent)
+            stream.start()
+            atexit.register(stream.close)
+        shared_processors.append(_orjson_renderer)
+        logger_factory = structlog.BytesLoggerFactory(stream)
+    elif settings.is_production:
+        # Production sans orjson: JSONRenderer de la stdlib
+        shared_processors.extend(
+            [
+                structlog.processors.TimeStamper(fmt="iso"),
                 structlog.processors.dict_tracebacks,
                 structlog.processors.JSONRenderer(),
             ]
@@ -51,19 +178,23 @@ def setup_logging() -> None:
         # Développement: Logs colorés et lisibles
         shared_processors.extend(
             [
+                structlog.processors.TimeStamper(fmt="iso"),
                 structlog.dev.ConsoleRenderer(colors=True),
             ]
         )
 
+    # Le filtrage par niveau a lieu dans wrapper_class, avant la chaîne de
+    # processeurs: un log sous le niveau minimal est un no-op et ne paie
+    # ni horodatage, ni traceback, ni rendu JSON.
     structlog.configure(
         processors=shared_processors,
         wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, settings.log_level)),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
-    # Configuration du logging standard Python
+    # Logging standard Python: uniquement pour les librairies tierces
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
@@ -75,11 +206,17 @@ def setup_logging() -> None:
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
+    # Les loggers mémoïsés avant la configuration sont recréés au besoin
+    get_logger.cache_clear()
+
 
+@functools.lru_cache(maxsize=512)
 def get_logger(name: str) -> structlog.BoundLogger:
     """
     Retourne un logger structuré pour un module donné.
 
+    Mémoïsé par nom: les appels répétés renvoient le même logger.
+
     Args:
         name: Nom du module (généralement __name__).
 
@@ -98,7 +235,10 @@ class LoggerMixin:
     Mixin pour ajouter un logger à une classe.
 
     Hérite de cette classe pour obtenir automatiquement
-    un attribut `logger` configuré.
+    un attribut `logger` configuré. C'est un logger structlog pur:
+    ses événements ne traversent pas le module logging standard.
+    Le logger est créé à la définition de chaque sous-classe (nommé
+    d'après elle), pas à chaque accès.
 
     Example:
         >>> class MyService(LoggerMixin):
@@ -106,10 +246,15 @@ class LoggerMixin:
         ...         self.logger.info("Processing started")
     """
 
-    @property
-    def logger(self) -> structlog.BoundLogger:
-        """Logger structuré pour la classe."""
-        return get_logger(self.__class__.__name__)
+    logger: structlog.BoundLogger
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Crée le logger une seule fois par classe, partagé par ses instances."""
+        super().__init_subclass__(**kwargs)
+        cls.logger = get_logger(cls.__name__)
+
+
+_function_call_logger = get_logger("function_call")
 
 
 def log_function_call(func_name: str, **kwargs: Any) -> None:
@@ -123,8 +268,10 @@ def log_function_call(func_name: str, **kwargs: Any) -> None:
     Example:
         >>> log_function_call("embed_text", text_length=500, model="mistral-embed")
     """
-    logger = get_logger("function_call")
-    logger.debug(
+    # Évite de construire le dict des paramètres si DEBUG est filtré
+    if not _function_call_logger.is_enabled_for(logging.DEBUG):
+        return
+    _function_call_logger.debug(
         "Function called",
         function=func_name,
         parameters={k: v for k, v in kwargs.items() if not k.startswith("_")},
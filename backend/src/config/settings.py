@@ -54,6 +54,10 @@ class Settings(BaseSettings):
         ...,
         description="Clé service role Supabase",
     )
+    supabase_db_url: str = Field(
+        default="",
+        description="URL Postgres du pooler Supabase (mode session, port 5432) pour les écritures à fort débit (optionnelle)",
+    )
     perplexity_api_key: str = Field(
         default="",
         description="Clé API Perplexity (optionnelle)",
@@ -126,6 +130,10 @@ class Settings(BaseSettings):
         default="",
         description="URL Redis pour le rate limiting (ex: redis://localhost:6379)",
     )
+    rq_use_fork: bool = Field(
+        default=False,
+        description="Worker RQ forké par job (isolation mémoire) au lieu de SimpleWorker",
+    )
 
     # ===== Monitoring & Observability =====
     sentry_dsn: str = Field(
@@ -150,6 +158,14 @@ class Settings(BaseSettings):
         default="INFO",
         description="Niveau de logging",
     )
+    log_flush_interval: float = Field(
+        default=0.0,
+        ge=0.0,
+        description=(
+            "Délai max (s) entre deux vidages de stdout pour les logs JSON "
+            "de production (0 = vidage à chaque log)"
+        ),
+    )
 
     # ===== Vector Store Settings =====
     embedding_model: str = Field(
@@ -162,6 +178,11 @@ class Settings(BaseSettings):
         ge=1,
         le=4096,
     )
+    embedding_cache_ttl_seconds: int = Field(
+        default=3600,
+        ge=0,
+        description="Durée de vie du cache des embeddings de requêtes (0 = désactivé)",
+    )
     similarity_threshold: float = Field(
         default=0.7,
         description="Seuil de similarité pour la recherche",
@@ -192,6 +213,14 @@ class Settings(BaseSettings):
         ge=1,
         le=32768,
     )
+    router_batch_window_ms: int = Field(
+        default=0,
+        ge=0,
+        description=(
+            "Fenêtre (ms) de regroupement des appels au routeur de l'orchestrateur "
+            "(0 = un appel par requête)"
+        ),
+    )
 
     # ===== API Settings =====
     api_host: str = Field(
@@ -228,6 +257,12 @@ class Settings(BaseSettings):
         ge=0,
         le=10000,
     )
+    rate_limit_local_lease: int = Field(
+        default=1,
+        description="Requêtes réservées d'un coup dans Redis par processus (1 = aucune réservation locale)",
+        ge=1,
+        le=1000,
+    )
 
     # ===== CORS Settings =====
     cors_origins: str = Field(
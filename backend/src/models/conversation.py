@@ -12,6 +12,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator
 
+from src.models.document import utc_now
+
 
 class FlagType(str, Enum):
     """Types de flags pour le feedback."""
@@ -175,7 +177,7 @@ class Conversation(ConversationCreate):
         description="Date de traitement pour training",
     )
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=utc_now,
         description="Date de création",
     )
 
@@ -203,7 +205,7 @@ class FeedbackFlag(BaseModel):
     notes: str | None = Field(default=None, description="Notes additionnelles")
     flagged_by: str = Field(default="system", description="Créateur du flag")
     status: FlagStatus = Field(default=FlagStatus.PENDING, description="Statut")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     processed_at: datetime | None = Field(default=None)
 
     model_config = {"from_attributes": True}
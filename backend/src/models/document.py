@@ -5,14 +5,24 @@ Document Models
 Modèles Pydantic pour les documents vectorisés du système RAG.
 """
 
+import hashlib
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Any
 from uuid import UUID
 
 from pydantic import BaseModel, Field, field_validator
 
+# Taille (en caractères) des tranches encodées puis hachées: évite de
+# copier en entier les gros contenus texte en UTF-8 avant le hash
+HASH_CHUNK_CHARS = 64 * 1024
+
+
+def utc_now() -> datetime:
+    """Date courante en UTC (aware), valeur par défaut des horodatages."""
+    return datetime.now(timezone.utc)
+
 
 class SourceType(str, Enum):
     """Types de sources de documents supportés."""
@@ -84,6 +94,10 @@ class DocumentCreate(BaseModel):
     @classmethod
     def clean_content(cls, v: str) -> str:
         """Nettoie le contenu en supprimant les espaces superflus."""
+        # Contenu déjà normalisé (relecture en base, re-validation): aucun
+        # blanc autre que l'espace (isprintable), ni double espace ni bord
+        if v.isprintable() and "  " not in v and v[:1] != " " and v[-1:] != " ":
+            return v
         return " ".join(v.split())
 
 
@@ -112,11 +126,11 @@ class Document(DocumentCreate):
         max_length=64,
     )
     created_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=utc_now,
         description="Date de création",
     )
     updated_at: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=utc_now,
         description="Date de dernière modification",
     )
 
@@ -144,6 +158,31 @@ class Document(DocumentCreate):
 
     model_config = {"from_attributes": True}
 
+    @staticmethod
+    def compute_hash(content: str | bytes | bytearray | memoryview) -> str:
+        """
+        Calcule le hash SHA-256 (hex) d'un contenu, pour la déduplication.
+
+        hashlib s'appuie sur OpenSSL (instructions SHA-NI si disponibles).
+        Les textes longs sont encodés par tranches pour ne pas allouer une
+        copie UTF-8 complète du document.
+
+        Args:
+            content: Texte (haché en UTF-8) ou bytes déjà encodés.
+
+        Returns:
+            Hash hexadécimal de 64 caractères.
+        """
+        if not isinstance(content, str):
+            return hashlib.sha256(content).hexdigest()
+        if len(content) <= HASH_CHUNK_CHARS:
+            return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        digest = hashlib.sha256()
+        for start in range(0, len(content), HASH_CHUNK_CHARS):
+            digest.update(content[start : start + HASH_CHUNK_CHARS].encode("utf-8"))
+        return digest.hexdigest()
+
 
 class DocumentMatch(BaseModel):
     """
@@ -14,7 +14,7 @@ from src.config.logging_config import LoggerMixin
 from src.models.document import DocumentCreate, DocumentMetadata, SourceType
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedContent:
     """
     Contenu extrait par un provider.
@@ -15,6 +15,49 @@ from src.models.document import SourceType
 from src.providers.base import BaseProvider, ExtractedContent
 from src.providers.pdf_provider import PDFProvider
 
+try:
+    import ijson
+except ImportError:  # Dépendance optionnelle: parsing complet en mémoire
+    ijson = None
+
+try:
+    # orjson.JSONDecodeError hérite de json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Au-delà de cette taille, l'export est parcouru en streaming (ijson)
+STREAMING_MIN_BYTES = 4 * 1024 * 1024
+
+# Gabarits Markdown des sections (valeurs par défaut des champs absents)
+_POSITIONS_HEADER = "# Expériences Professionnelles\n"
+_POSITION_TEMPLATE = """
+## {title} @ {companyName}
+**Période**: {startDate} - {endDate}
+
+{description}
+"""
+_POSITION_DEFAULTS = {
+    "title": "",
+    "companyName": "",
+    "description": "",
+    "startDate": "",
+    "endDate": "Présent",
+}
+
+_EDUCATION_HEADER = "# Formation\n"
+_EDUCATION_TEMPLATE = """
+## {schoolName}
+**Diplôme**: {degree}
+**Domaine**: {fieldOfStudy}
+"""
+_EDUCATION_DEFAULTS = {"schoolName": "", "degree": "", "fieldOfStudy": ""}
+
+# Erreurs de parsing JSON (json/orjson, et ijson si disponible)
+_JSON_ERRORS: tuple[type[Exception], ...] = (json.JSONDecodeError,)
+if ijson is not None:
+    _JSON_ERRORS += (ijson.JSONError,)
+
 
 class LinkedInProvider(BaseProvider):
     """
@@ -54,43 +97,53 @@ class LinkedInProvider(BaseProvider):
         if not path.exists():
             raise FileNotFoundError(f"File not found: {source}")
 
-        if path.suffix.lower() == ".json":
+        suffix = path.suffix.lower()
+        if suffix == ".json":
             yield from self._extract_json(path)
-        elif path.suffix.lower() == ".pdf":
+        elif suffix == ".pdf":
             yield from self._extract_pdf(path)
         else:
             raise ValueError(f"Unsupported format: {path.suffix}")
 
     def _extract_json(self, path: Path) -> Iterator[ExtractedContent]:
-        """Extrait depuis un export JSON LinkedIn."""
-        try:
-            with open(path, encoding="utf-8") as f:
-                data = json.load(f)
-
-            # Profile de base
-            if "Profile" in data:
-                yield from self._extract_profile(data["Profile"], path)
-
-            # Expériences
-            if "Positions" in data:
-                yield from self._extract_positions(data["Positions"], path)
-
-            # Formations
-            if "Education" in data:
-                yield from self._extract_education(data["Education"], path)
-
-            # Compétences
-            if "Skills" in data:
-                yield from self._extract_skills(data["Skills"], path)
+        """
+        Extrait depuis un export JSON LinkedIn.
 
-        except json.JSONDecodeError as e:
+        Les petits exports sont parsés d'un bloc (orjson). Les exports
+        volumineux sont parcourus section par section avec ijson: seule
+        la section en cours est en mémoire, et les premières sections
+        sont produites avant la fin du parsing.
+        """
+        stem = path.stem
+        extractors = {
+            "Profile": self._extract_profile,
+            "Positions": self._extract_positions,
+            "Education": self._extract_education,
+            "Skills": self._extract_skills,
+        }
+        try:
+            if ijson is not None and path.stat().st_size >= STREAMING_MIN_BYTES:
+                with open(path, "rb") as f:
+                    # Sections produites dans l'ordre du fichier
+                    for key, value in ijson.kvitems(f, "", use_float=True):
+                        if value and key in extractors:
+                            yield from extractors[key](value, stem)
+                return
+
+            data = _json_loads(path.read_bytes())
+            for key, extractor in extractors.items():
+                # Sections absentes ou vides ignorées ici, pas dans chaque extracteur
+                if value := data.get(key):
+                    yield from extractor(value, stem)
+
+        except _JSON_ERRORS as e:
             self.logger.error("Invalid JSON", error=str(e))
             raise
 
     def _extract_profile(
         self,
         profile: dict[str, Any],
-        path: Path,
+        stem: str,
     ) -> Iterator[ExtractedContent]:
         """Extrait les informations de profil."""
         name = f"{profile.get('firstName', '')} {profile.get('lastName', '')}"
@@ -109,7 +162,7 @@ class LinkedInProvider(BaseProvider):
         if content.strip():
             yield ExtractedContent(
                 content=content,
-                source_id=f"linkedin:{path.stem}:profile",
+                source_id=f"linkedin:{stem}:profile",
                 metadata={
                     "title": f"LinkedIn - {name}",
                     "author": name,
@@ -124,33 +177,17 @@ class LinkedInProvider(BaseProvider):
     def _extract_positions(
         self,
         positions: list[dict[str, Any]],
-        path: Path,
+        stem: str,
     ) -> Iterator[ExtractedContent]:
         """Extrait les expériences professionnelles."""
-        if not positions:
-            return
-
-        content_parts = ["# Expériences Professionnelles\n"]
-
-        for pos in positions:
-            title = pos.get("title", "")
-            company = pos.get("companyName", "")
-            description = pos.get("description", "")
-            start = pos.get("startDate", "")
-            end = pos.get("endDate", "Présent")
-
-            content_parts.append(
-                f"""
-## {title} @ {company}
-**Période**: {start} - {end}
-
-{description}
-"""
-            )
+        entries = (
+            _POSITION_TEMPLATE.format_map({**_POSITION_DEFAULTS, **pos}) for pos in positions
+        )
+        content = "\n".join([_POSITIONS_HEADER, *entries])
 
         yield ExtractedContent(
-            content="\n".join(content_parts),
-            source_id=f"linkedin:{path.stem}:positions",
+            content=content,
+            source_id=f"linkedin:{stem}:positions",
             metadata={
                 "title": "LinkedIn - Expériences",
                 "tags": ["linkedin", "experience", "work"],
@@ -164,30 +201,17 @@ class LinkedInProvider(BaseProvider):
     def _extract_education(
         self,
         education: list[dict[str, Any]],
-        path: Path,
+        stem: str,
     ) -> Iterator[ExtractedContent]:
         """Extrait les formations."""
-        if not education:
-            return
-
-        content_parts = ["# Formation\n"]
-
-        for edu in education:
-            school = edu.get("schoolName", "")
-            degree = edu.get("degree", "")
-            field = edu.get("fieldOfStudy", "")
-
-            content_parts.append(
-                f"""
-## {school}
-**Diplôme**: {degree}
-**Domaine**: {field}
-"""
-            )
+        entries = (
+            _EDUCATION_TEMPLATE.format_map({**_EDUCATION_DEFAULTS, **edu}) for edu in education
+        )
+        content = "\n".join([_EDUCATION_HEADER, *entries])
 
         yield ExtractedContent(
-            content="\n".join(content_parts),
-            source_id=f"linkedin:{path.stem}:education",
+            content=content,
+            source_id=f"linkedin:{stem}:education",
             metadata={
                 "title": "LinkedIn - Formation",
                 "tags": ["linkedin", "education"],
@@ -201,13 +225,11 @@ class LinkedInProvider(BaseProvider):
     def _extract_skills(
         self,
         skills: list[dict[str, Any]],
-        path: Path,
+        stem: str,
     ) -> Iterator[ExtractedContent]:
         """Extrait les compétences."""
-        if not skills:
-            return
-
-        skill_list = [s.get("name", "") for s in skills if s.get("name")]
+        # Liste conservée pour les métadonnées; un seul get() par compétence
+        skill_list = [name for s in skills if (name := s.get("name"))]
 
         content = f"""# Compétences LinkedIn
 
@@ -216,7 +238,7 @@ class LinkedInProvider(BaseProvider):
 
         yield ExtractedContent(
             content=content,
-            source_id=f"linkedin:{path.stem}:skills",
+            source_id=f"linkedin:{stem}:skills",
             metadata={
                 "title": "LinkedIn - Compétences",
                 "tags": ["linkedin", "skills", "competences"],
@@ -229,8 +251,9 @@ class LinkedInProvider(BaseProvider):
 
     def _extract_pdf(self, path: Path) -> Iterator[ExtractedContent]:
         """Extrait depuis un PDF de profil LinkedIn."""
+        source_id = f"linkedin:pdf:{path.stem}"
         for extracted in self._pdf_provider.extract(str(path)):
             # Modifier les métadonnées pour LinkedIn
-            extracted.source_id = f"linkedin:pdf:{path.stem}"
+            extracted.source_id = source_id
             extracted.metadata["tags"] = ["linkedin", "profile", "pdf"]
             yield extracted
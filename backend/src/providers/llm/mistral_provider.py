@@ -105,7 +105,7 @@ class MistralLLMProvider(BaseLLMProvider):
         final_messages.extend(messages)
 
         try:
-            response = self._client.chat.complete(
+            response = await self._client.chat.complete_async(
                 model=self.config.model,
                 messages=final_messages,
                 temperature=self.config.temperature,
@@ -179,7 +179,7 @@ class MistralLLMProvider(BaseLLMProvider):
         final_messages.extend(messages)
 
         try:
-            stream = self._client.chat.stream(
+            stream = await self._client.chat.stream_async(
                 model=self.config.model,
                 messages=final_messages,
                 temperature=self.config.temperature,
@@ -190,7 +190,7 @@ class MistralLLMProvider(BaseLLMProvider):
             tokens_count = 0
             in_thought_block = False
 
-            for event in stream:
+            async for event in stream:
                 if event.data.choices and event.data.choices[0].delta.content:
                     chunk_content = event.data.choices[0].delta.content
                     tokens_count += 1  # Approximation
@@ -14,6 +14,9 @@ import fitz  # PyMuPDF
 from src.models.document import SourceType
 from src.providers.base import BaseProvider, ExtractedContent
 
+# Pages analysées pour détecter un CV
+CV_SAMPLE_PAGES = 2
+
 
 class PDFProvider(BaseProvider):
     """
@@ -68,19 +71,19 @@ class PDFProvider(BaseProvider):
             raise ValueError(f"Not a PDF file: {source}")
 
         try:
-            doc = fitz.open(str(path))
-            self.logger.info(
-                "Processing PDF",
-                file=path.name,
-                pages=doc.page_count,
-            )
-
-            if self.chunk_by_page:
-                yield from self._extract_by_page(doc, path)
-            else:
-                yield from self._extract_full(doc, path)
+            # MuPDF lit le fichier à la demande (pas de chargement complet);
+            # le with garantit la fermeture même si l'itération est abandonnée
+            with fitz.open(str(path)) as doc:
+                self.logger.info(
+                    "Processing PDF",
+                    file=path.name,
+                    pages=doc.page_count,
+                )
 
-            doc.close()
+                if self.chunk_by_page:
+                    yield from self._extract_by_page(doc, path)
+                else:
+                    yield from self._extract_full(doc, path)
 
         except Exception as e:
             self.logger.error("PDF extraction failed", error=str(e))
@@ -92,17 +95,12 @@ class PDFProvider(BaseProvider):
         path: Path,
     ) -> Iterator[ExtractedContent]:
         """Extrait le PDF comme un seul document."""
-        full_text = []
-
-        for page in doc:
-            text = page.get_text("text")
-            if text.strip():
-                full_text.append(text)
-
-        content = "\n\n".join(full_text)
+        page_texts = [page.get_text("text") for page in doc]
+        content = "\n\n".join(text for text in page_texts if text.strip())
 
         if len(content) >= self.min_content_length:
-            metadata = self._extract_metadata(doc, path)
+            # Réutilise le texte déjà extrait pour la détection de CV
+            metadata = self._extract_metadata(doc, path, sample_pages=page_texts[:CV_SAMPLE_PAGES])
 
             yield ExtractedContent(
                 content=content,
@@ -141,12 +139,13 @@ class PDFProvider(BaseProvider):
         self,
         doc: fitz.Document,
         path: Path,
+        sample_pages: list[str] | None = None,
     ) -> dict:
         """Extrait les métadonnées du PDF."""
         pdf_metadata = doc.metadata or {}
 
         # Détecter si c'est un CV
-        is_cv = self._detect_cv(doc)
+        is_cv = self._detect_cv(doc, sample_pages)
 
         return {
             "title": pdf_metadata.get("title") or path.stem,
@@ -163,11 +162,15 @@ class PDFProvider(BaseProvider):
             },
         }
 
-    def _detect_cv(self, doc: fitz.Document) -> bool:
+    def _detect_cv(self, doc: fitz.Document, sample_pages: list[str] | None = None) -> bool:
         """
         Détecte si le PDF est un CV.
 
         Recherche des mots-clés typiques des CVs.
+
+        Args:
+            doc: Document PDF ouvert.
+            sample_pages: Texte des premières pages s'il est déjà extrait.
         """
         cv_keywords = {
             "curriculum vitae",
@@ -184,11 +187,11 @@ class PDFProvider(BaseProvider):
         }
 
         # Analyser les premières pages
-        sample_text = ""
-        for i, page in enumerate(doc):
-            if i >= 2:  # Limiter à 2 pages
-                break
-            sample_text += page.get_text("text").lower()
+        if sample_pages is None:
+            sample_pages = [
+                doc[i].get_text("text") for i in range(min(CV_SAMPLE_PAGES, doc.page_count))
+            ]
+        sample_text = "".join(sample_pages).lower()
 
         # Compter les mots-clés trouvés
         matches = sum(1 for kw in cv_keywords if kw in sample_text)
@@ -210,15 +213,11 @@ class PDFProvider(BaseProvider):
             ExtractedContent pour chaque document.
         """
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-
-            full_text = []
-            for page in doc:
-                text = page.get_text("text")
-                if text.strip():
-                    full_text.append(text)
-
-            content = "\n\n".join(full_text)
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                content = "\n\n".join(
+                    text for page in doc if (text := page.get_text("text")).strip()
+                )
+                page_count = doc.page_count
 
             if len(content) >= self.min_content_length:
                 yield ExtractedContent(
@@ -227,12 +226,10 @@ class PDFProvider(BaseProvider):
                     metadata={
                         "title": filename,
                         "tags": ["uploaded", "pdf"],
-                        "extra": {"pages": doc.page_count},
+                        "extra": {"pages": page_count},
                     },
                 )
 
-            doc.close()
-
         except Exception as e:
             self.logger.error("PDF bytes extraction failed", error=str(e))
             raise
@@ -7,6 +7,7 @@ Implémente le pattern Repository pour l'accès aux données Supabase.
 """
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Any, Generic, TypeVar
 
 from supabase import Client, create_client
@@ -17,6 +18,24 @@ from src.config.settings import get_settings
 T = TypeVar("T")
 
 
+@lru_cache
+def get_supabase_client() -> Client:
+    """
+    Retourne le client Supabase partagé (clé service role).
+
+    Un seul client pour tous les repositories: son pool de connexions
+    HTTP est réutilisé au lieu d'ouvrir une connexion TLS par instance.
+
+    Returns:
+        Client Supabase.
+    """
+    settings = get_settings()
+    return create_client(
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+    )
+
+
 class BaseRepository(ABC, LoggerMixin, Generic[T]):
     """
     Repository de base pour l'accès à Supabase.
@@ -40,13 +59,9 @@ class BaseRepository(ABC, LoggerMixin, Generic[T]):
 
     @property
     def client(self) -> Client:
-        """Client Supabase avec lazy initialization."""
+        """Client Supabase partagé, résolu au premier accès."""
         if self._client is None:
-            settings = get_settings()
-            self._client = create_client(
-                settings.supabase_url,
-                settings.supabase_service_role_key,
-            )
+            self._client = get_supabase_client()
         return self._client
 
     @property
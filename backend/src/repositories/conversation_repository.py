@@ -8,6 +8,8 @@ Repository pour la gestion des conversations et du feedback loop.
 from typing import Any
 from uuid import UUID
 
+from pydantic import TypeAdapter
+
 from src.models.conversation import (
     Conversation,
     ConversationAnalytics,
@@ -16,6 +18,9 @@ from src.models.conversation import (
 )
 from src.repositories.base import BaseRepository
 
+# Validation d'une liste de lignes en un seul appel (schéma compilé une fois)
+_CONVERSATION_LIST = TypeAdapter(list[Conversation])
+
 
 class ConversationRepository(BaseRepository[Conversation]):
     """Repository pour les conversations et le feedback."""
@@ -60,8 +65,36 @@ class ConversationRepository(BaseRepository[Conversation]):
         Returns:
             Conversation créée.
         """
+        return self.create(self._to_row(conv))
+
+    def bulk_log(self, convs: list[ConversationCreate]) -> list[Conversation]:
+        """
+        Enregistre plusieurs conversations en un seul INSERT.
+
+        Un seul aller-retour HTTP au lieu d'un par conversation. La
+        durabilité est celle du lot: si l'INSERT échoue, aucune des
+        conversations n'est enregistrée.
+
+        Args:
+            convs: Conversations à enregistrer.
+
+        Returns:
+            Conversations créées, dans l'ordre fourni.
+        """
+        if not convs:
+            return []
+
+        response = self.table.insert([self._to_row(conv) for conv in convs]).execute()
+        self.logger.info("Conversations logged", count=len(response.data))
+        return _CONVERSATION_LIST.validate_python(response.data)
+
+    @staticmethod
+    def _to_row(conv: ConversationCreate) -> dict[str, Any]:
+        """Construit la ligne de la table conversations."""
+        # Sérialisation en une passe (mode='json' convertit UUIDs et dates)
+        dumped = conv.model_dump(mode="json")
+
         # Extraire les données de réflexion et routage depuis metadata
-        metadata_dict = conv.metadata.model_dump(mode="json")
         thought_process = None
         routing_info = None
         reflection_enabled = False
@@ -77,21 +110,19 @@ class ConversationRepository(BaseRepository[Conversation]):
         if conv.metadata.llm_provider:
             llm_provider = conv.metadata.llm_provider
 
-        data = {
-            "session_id": conv.session_id,
-            "user_query": conv.user_query,
-            "ai_response": conv.ai_response,
-            "user_id": str(conv.user_id) if conv.user_id else None,
-            # mode='json' convertit automatiquement les UUIDs en strings
-            "context_sources": [s.model_dump(mode="json") for s in conv.context_sources],
-            "metadata": metadata_dict,
+        return {
+            "session_id": dumped["session_id"],
+            "user_query": dumped["user_query"],
+            "ai_response": dumped["ai_response"],
+            "user_id": dumped["user_id"],
+            "context_sources": dumped["context_sources"],
+            "metadata": dumped["metadata"],
             # Nouveaux champs pour réflexion et routage
             "thought_process": thought_process,
             "routing_info": routing_info,
             "reflection_enabled": reflection_enabled,
             "llm_provider": llm_provider,
         }
-        return self.create(data)
 
     def add_feedback(
         self,
@@ -141,7 +172,7 @@ class ConversationRepository(BaseRepository[Conversation]):
             .order("created_at", desc=False)
             .execute()
         )
-        return [Conversation(**c) for c in response.data]
+        return _CONVERSATION_LIST.validate_python(response.data)
 
     def get_pending_training(self, limit: int = 50) -> list[dict[str, Any]]:
         """Récupère les données en attente de vectorisation."""
@@ -5,11 +5,44 @@ Document Repository
 Repository pour la gestion des documents vectorisés dans Supabase.
 """
 
-import hashlib
+import base64
+import threading
 from typing import Any
 
+import zstandard as zstd
+from pydantic import TypeAdapter
+
 from src.models.document import Document, DocumentCreate, DocumentMatch, SourceType
 from src.repositories.base import BaseRepository
+from src.utils.vectors import to_pgvector
+
+# Compression des contenus PDF volumineux (colonne content_encoding)
+CONTENT_ENCODING_IDENTITY = "identity"
+CONTENT_ENCODING_ZSTD = "zstd"
+COMPRESS_MIN_BYTES = 1024
+
+# Validation d'une liste de lignes en un seul appel (schéma compilé une fois)
+_DOCUMENT_LIST = TypeAdapter(list[Document])
+_DOCUMENT_MATCH_LIST = TypeAdapter(list[DocumentMatch])
+
+# Contextes zstd: un par thread (une instance ne supporte pas les appels concurrents)
+_ZSTD_LOCAL = threading.local()
+
+
+def _zstd_compressor() -> zstd.ZstdCompressor:
+    """Compresseur zstd du thread courant."""
+    cctx = getattr(_ZSTD_LOCAL, "cctx", None)
+    if cctx is None:
+        cctx = _ZSTD_LOCAL.cctx = zstd.ZstdCompressor(level=3)
+    return cctx
+
+
+def _zstd_decompressor() -> zstd.ZstdDecompressor:
+    """Décompresseur zstd du thread courant."""
+    dctx = getattr(_ZSTD_LOCAL, "dctx", None)
+    if dctx is None:
+        dctx = _ZSTD_LOCAL.dctx = zstd.ZstdDecompressor()
+    return dctx
 
 
 class DocumentRepository(BaseRepository[Document]):
@@ -36,7 +69,7 @@ class DocumentRepository(BaseRepository[Document]):
         try:
             response = self.table.select("*").eq("id", id).single().execute()
             if response.data:
-                return Document(**response.data)
+                return Document(**self._decode_row(response.data))
             return None
         except Exception as e:
             self.logger.error("Error fetching document", id=id, error=str(e))
@@ -52,13 +85,29 @@ class DocumentRepository(BaseRepository[Document]):
         Returns:
             Document créé.
         """
-        # Calcul du hash pour déduplication
-        if "content" in data and "content_hash" not in data:
-            data["content_hash"] = self._compute_hash(data["content"])
-
-        response = self.table.insert(data).execute()
+        response = self.table.insert(self._prepare_row(data)).execute()
         self.logger.info("Document created", id=response.data[0]["id"])
-        return Document(**response.data[0])
+        return Document(**self._decode_row(response.data[0]))
+
+    def bulk_create(self, rows: list[dict[str, Any]]) -> list[Document]:
+        """
+        Crée plusieurs documents en un seul INSERT.
+
+        Un seul aller-retour HTTP pour tout le lot; si l'INSERT échoue
+        (ex: hash déjà présent), aucun document du lot n'est créé.
+
+        Args:
+            rows: Données des documents incluant les embeddings.
+
+        Returns:
+            Documents créés, dans l'ordre fourni.
+        """
+        if not rows:
+            return []
+
+        response = self.table.insert([self._prepare_row(row) for row in rows]).execute()
+        self.logger.info("Documents created", count=len(response.data))
+        return _DOCUMENT_LIST.validate_python([self._decode_row(row) for row in response.data])
 
     def delete(self, id: str) -> bool:
         """
@@ -84,6 +133,7 @@ class DocumentRepository(BaseRepository[Document]):
         embedding: list[float],
         user_id: str | None = None,
         api_key_id: str | None = None,
+        content_hash: str | None = None,
     ) -> Document:
         """
         Crée un document à partir d'un modèle Pydantic.
@@ -93,26 +143,41 @@ class DocumentRepository(BaseRepository[Document]):
             embedding: Vecteur d'embedding.
             user_id: ID de l'utilisateur (multi-tenant).
             api_key_id: ID de la clé API/agent propriétaire.
+            content_hash: Hash du contenu s'il est déjà calculé.
 
         Returns:
             Document créé.
         """
-        data = {
-            "content": doc.content,
-            "embedding": embedding,
-            "source_type": doc.source_type.value,
-            "source_id": doc.source_id,
-            "metadata": doc.metadata.model_dump(),
-            "content_hash": self._compute_hash(doc.content),
-        }
+        return self.create(self._row_from_model(doc, embedding, user_id, api_key_id, content_hash))
 
-        if user_id:
-            data["user_id"] = user_id
+    def bulk_create_from_models(
+        self,
+        docs: list[DocumentCreate],
+        embeddings: list[list[float]],
+        user_id: str | None = None,
+        api_key_id: str | None = None,
+        content_hashes: list[str] | None = None,
+    ) -> list[Document]:
+        """
+        Crée plusieurs documents à partir de modèles Pydantic (un INSERT).
 
-        if api_key_id:
-            data["api_key_id"] = api_key_id
+        Args:
+            docs: Modèles DocumentCreate.
+            embeddings: Vecteurs d'embedding, dans le même ordre.
+            user_id: ID de l'utilisateur (multi-tenant).
+            api_key_id: ID de la clé API/agent propriétaire.
+            content_hashes: Hashes des contenus s'ils sont déjà calculés.
 
-        return self.create(data)
+        Returns:
+            Documents créés.
+        """
+        hashes = content_hashes or [None] * len(docs)
+        return self.bulk_create(
+            [
+                self._row_from_model(doc, embedding, user_id, api_key_id, content_hash)
+                for doc, embedding, content_hash in zip(docs, embeddings, hashes, strict=True)
+            ]
+        )
 
     def search_similar(
         self,
@@ -126,6 +191,10 @@ class DocumentRepository(BaseRepository[Document]):
         """
         Recherche par similarité cosinus.
 
+        Les embeddings stockés étant normalisés, la requête l'est aussi et
+        le RPC match_documents_dot compare par produit scalaire (<#>):
+        candidats via un index halfvec, puis re-classement en float32.
+
         Args:
             query_embedding: Vecteur de la requête.
             threshold: Seuil de similarité minimum.
@@ -139,7 +208,7 @@ class DocumentRepository(BaseRepository[Document]):
         """
         try:
             params = {
-                "query_embedding": query_embedding,
+                "query_embedding": to_pgvector(query_embedding, normalize=True),
                 "match_threshold": threshold,
                 "match_count": limit,
             }
@@ -152,9 +221,11 @@ class DocumentRepository(BaseRepository[Document]):
             if api_key_id:
                 params["filter_api_key_id"] = api_key_id
 
-            response = self.client.rpc("match_documents", params).execute()
+            response = self.client.rpc("match_documents_dot", params).execute()
 
-            return [DocumentMatch(**doc) for doc in response.data]
+            return _DOCUMENT_MATCH_LIST.validate_python(
+                [self._decode_row(doc) for doc in response.data]
+            )
         except Exception as e:
             self.logger.error("Search error", error=str(e))
             return []
@@ -179,23 +250,145 @@ class DocumentRepository(BaseRepository[Document]):
             query = query.eq("source_id", source_id)
 
         response = query.execute()
-        return [Document(**doc) for doc in response.data]
+        return _DOCUMENT_LIST.validate_python([self._decode_row(doc) for doc in response.data])
 
-    def exists_by_hash(self, content: str) -> bool:
+    def exists_by_hash(self, content: str, content_hash: str | None = None) -> bool:
         """
         Vérifie si un document existe déjà.
 
         Args:
             content: Contenu à vérifier.
+            content_hash: Hash du contenu s'il est déjà calculé.
 
         Returns:
             True si le document existe.
         """
-        content_hash = self._compute_hash(content)
+        content_hash = content_hash or Document.compute_hash(content)
         response = self.table.select("id").eq("content_hash", content_hash).limit(1).execute()
         return len(response.data) > 0
 
+    def get_existing_hashes(
+        self,
+        content_hashes: list[str],
+        chunk_size: int = 200,
+    ) -> set[str]:
+        """
+        Retourne les hashes de contenu déjà stockés parmi ceux fournis.
+
+        Une requête par tranche de `chunk_size` hashes, au lieu d'un
+        exists_by_hash par document.
+
+        Args:
+            content_hashes: Hashes SHA-256 à vérifier.
+            chunk_size: Nombre de hashes par requête.
+
+        Returns:
+            Ensemble des hashes existants.
+        """
+        existing: set[str] = set()
+        for i in range(0, len(content_hashes), chunk_size):
+            response = (
+                self.table.select("content_hash")
+                .in_("content_hash", content_hashes[i : i + chunk_size])
+                .execute()
+            )
+            existing.update(row["content_hash"] for row in response.data)
+        return existing
+
+    def get_existing_source_ids(
+        self,
+        source_ids: list[str],
+        api_key_id: str | None = None,
+        chunk_size: int = 200,
+    ) -> set[str]:
+        """
+        Retourne les source_id déjà stockés parmi ceux fournis.
+
+        Utilisé pour reprendre une ingestion interrompue sans
+        ré-embedder les documents déjà présents.
+
+        Args:
+            source_ids: Identifiants de sources à vérifier.
+            api_key_id: Limiter la recherche aux documents de cette clé.
+            chunk_size: Nombre d'identifiants par requête.
+
+        Returns:
+            Ensemble des source_id existants.
+        """
+        existing: set[str] = set()
+        for i in range(0, len(source_ids), chunk_size):
+            query = self.table.select("source_id").in_("source_id", source_ids[i : i + chunk_size])
+            if api_key_id:
+                query = query.eq("api_key_id", api_key_id)
+
+            response = query.execute()
+            existing.update(row["source_id"] for row in response.data)
+        return existing
+
+    @staticmethod
+    def _row_from_model(
+        doc: DocumentCreate,
+        embedding: list[float],
+        user_id: str | None,
+        api_key_id: str | None,
+        content_hash: str | None,
+    ) -> dict[str, Any]:
+        """Construit la ligne de la table documents depuis un DocumentCreate."""
+        data = {
+            "content": doc.content,
+            "embedding": embedding,
+            "source_type": doc.source_type.value,
+            "source_id": doc.source_id,
+            "metadata": doc.metadata.model_dump(),
+            "content_hash": content_hash or Document.compute_hash(doc.content),
+        }
+
+        if user_id:
+            data["user_id"] = user_id
+
+        if api_key_id:
+            data["api_key_id"] = api_key_id
+
+        return data
+
+    def _prepare_row(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Complète une ligne avant insertion (hash, embedding normalisé, compression)."""
+        # Calcul du hash pour déduplication
+        if "content" in data and "content_hash" not in data:
+            data["content_hash"] = Document.compute_hash(data["content"])
+
+        # Embeddings stockés normalisés (similarité = produit scalaire),
+        # envoyés au format texte pgvector plutôt qu'en liste de floats
+        if data.get("embedding") is not None:
+            data["embedding"] = to_pgvector(data["embedding"], normalize=True)
+
+        if data.get("source_type") == SourceType.PDF.value and "content" in data:
+            data["content"], data["content_encoding"] = self._encode_content(data["content"])
+
+        return data
+
+    @staticmethod
+    def _encode_content(content: str) -> tuple[str, str]:
+        """
+        Compresse le contenu en zstd (base64) s'il est assez volumineux.
+
+        En dessous de COMPRESS_MIN_BYTES, l'overhead du frame zstd et du
+        base64 l'emporte: le contenu est stocké tel quel.
+
+        Returns:
+            Tuple (contenu stocké, encodage).
+        """
+        raw = content.encode("utf-8")
+        if len(raw) < COMPRESS_MIN_BYTES:
+            return content, CONTENT_ENCODING_IDENTITY
+        compressed = base64.b64encode(_zstd_compressor().compress(raw)).decode("ascii")
+        return compressed, CONTENT_ENCODING_ZSTD
+
     @staticmethod
-    def _compute_hash(content: str) -> str:
-        """Calcule le hash SHA-256 du contenu."""
-        return hashlib.sha256(content.encode()).hexdigest()
+    def _decode_row(row: dict[str, Any]) -> dict[str, Any]:
+        """Décompresse le contenu d'une ligne lue si nécessaire."""
+        encoding = row.pop("content_encoding", CONTENT_ENCODING_IDENTITY)
+        if encoding == CONTENT_ENCODING_ZSTD and row.get("content"):
+            compressed = base64.b64decode(row["content"])
+            row["content"] = _zstd_decompressor().decompress(compressed).decode("utf-8")
+        return row
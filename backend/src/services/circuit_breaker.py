@@ -61,6 +61,7 @@ class CircuitBreakerConfig:
     success_threshold: int = 2  # Succès en HALF_OPEN avant fermeture
     recovery_timeout: int = 30  # Secondes avant passage HALF_OPEN
     half_open_max_calls: int = 3  # Requêtes max en HALF_OPEN
+    time_source: Callable[[], float] = time.monotonic  # Horloge (injectable en test)
 
 
 class CircuitBreaker:
@@ -79,6 +80,7 @@ class CircuitBreaker:
 
     def __init__(self, config: CircuitBreakerConfig | None = None):
         self.config = config or CircuitBreakerConfig()
+        self._now = self.config.time_source
         self._circuits: dict[str, CircuitStats] = defaultdict(CircuitStats)
         self._half_open_calls: dict[str, int] = defaultdict(int)
         self._lock = asyncio.Lock()
@@ -89,7 +91,7 @@ class CircuitBreaker:
 
         if stats.state == CircuitState.OPEN:
             # Vérifier si on peut passer en HALF_OPEN
-            elapsed = time.time() - stats.opened_at
+            elapsed = self._now() - stats.opened_at
             if elapsed >= self.config.recovery_timeout:
                 return CircuitState.HALF_OPEN
 
@@ -105,7 +107,7 @@ class CircuitBreaker:
         if stats.state != CircuitState.OPEN:
             return 0
 
-        elapsed = time.time() - stats.opened_at
+        elapsed = self._now() - stats.opened_at
         remaining = self.config.recovery_timeout - elapsed
         return max(0, int(remaining))
 
@@ -175,7 +177,7 @@ class CircuitBreaker:
         async with self._lock:
             stats = self._circuits[provider]
             stats.successes += 1
-            stats.last_success_time = time.time()
+            stats.last_success_time = self._now()
 
             current_state = self.get_state(provider)
 
@@ -198,7 +200,7 @@ class CircuitBreaker:
         async with self._lock:
             stats = self._circuits[provider]
             stats.failures += 1
-            stats.last_failure_time = time.time()
+            stats.last_failure_time = self._now()
 
             current_state = self.get_state(provider)
 
@@ -213,7 +215,7 @@ class CircuitBreaker:
             if current_state == CircuitState.HALF_OPEN:
                 # Retour à OPEN si échec en HALF_OPEN
                 stats.state = CircuitState.OPEN
-                stats.opened_at = time.time()
+                stats.opened_at = self._now()
                 stats.successes = 0
                 self._half_open_calls[provider] = 0
                 logger.warning(
@@ -224,7 +226,7 @@ class CircuitBreaker:
                 # Ouvrir si threshold atteint
                 if stats.failures >= self.config.failure_threshold:
                     stats.state = CircuitState.OPEN
-                    stats.opened_at = time.time()
+                    stats.opened_at = self._now()
                     logger.error(
                         "Circuit breaker OPENED", provider=provider, failures=stats.failures
                     )
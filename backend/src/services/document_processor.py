@@ -312,7 +312,7 @@ class DocumentProcessor:
                         for attempt in range(self.max_retries):
                             try:
                                 # Générer embedding
-                                embedding = await self.embedding_service.embed_text(chunk)
+                                embedding = await self.embedding_service.aembed_text(chunk)
 
                                 # Créer le document
                                 doc_id = await self.doc_repo.create_document(
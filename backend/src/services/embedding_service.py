@@ -5,12 +5,70 @@ Embedding Service
 Service pour la génération d'embeddings via Mistral AI.
 """
 
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
 from mistralai import Mistral
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from src.config.logging_config import LoggerMixin
 from src.config.settings import get_settings
 
+try:
+    import simsimd  # noyaux SIMD (AVX2/AVX-512/NEON)
+except ImportError:  # Dépendance optionnelle: fallback NumPy
+    simsimd = None
+
+try:
+    from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+except ImportError:  # Dépendance optionnelle: estimation en caractères
+    MistralTokenizer = None
+
+# Cache des embeddings de requêtes (les mêmes questions reviennent souvent)
+QUERY_CACHE_MAX_ENTRIES = 1024
+
+# Appels embeddings simultanés dans embed_batch (limite de débit Mistral)
+EMBED_CONCURRENCY = 4
+
+# Longueur maximale (en caractères) d'un token SentencePiece: au-delà de
+# max_tokens * MAX_TOKEN_CHARS caractères, le texte dépasse forcément
+MAX_TOKEN_CHARS = 16
+
+
+@functools.lru_cache
+def get_mistral_client() -> Mistral:
+    """
+    Retourne le client Mistral partagé (clé de la plateforme).
+
+    Les services d'embedding réutilisent ainsi les pools de connexions
+    HTTP du SDK au lieu d'en créer un par instance.
+
+    Returns:
+        Client Mistral.
+    """
+    return Mistral(api_key=get_settings().mistral_api_key)
+
+
+@functools.cache
+def _get_tokenizer() -> Any | None:
+    """
+    Tokenizer SentencePiece de Mistral, chargé une seule fois.
+
+    Returns:
+        Tokenizer, ou None si mistral-common (ou sentencepiece) est absent.
+    """
+    if MistralTokenizer is None:
+        return None
+    try:
+        return MistralTokenizer.v1().instruct_tokenizer.tokenizer
+    except ImportError:
+        return None
+
 
 class EmbeddingService(LoggerMixin):
     """
@@ -27,10 +85,15 @@ class EmbeddingService(LoggerMixin):
     def __init__(self) -> None:
         """Initialise le service d'embedding."""
         settings = get_settings()
-        self._client = Mistral(api_key=settings.mistral_api_key)
+        self._client = get_mistral_client()
         self.model = settings.embedding_model
         self.dimension = settings.embedding_dimension
 
+        # Cache LRU requête -> (embedding, horodatage), partagé entre threads
+        self._query_cache_ttl = settings.embedding_cache_ttl_seconds
+        self._query_cache: OrderedDict[str, tuple[list[float], float]] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -69,6 +132,44 @@ class EmbeddingService(LoggerMixin):
 
         return embedding
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+    )
+    async def aembed_text(self, text: str) -> list[float]:
+        """
+        Version asynchrone de embed_text (client HTTP asynchrone de Mistral).
+
+        Ne bloque pas la boucle d'événements pendant l'appel API.
+
+        Args:
+            text: Texte à vectoriser.
+
+        Returns:
+            Vecteur d'embedding (1024 dimensions).
+
+        Raises:
+            ValueError: Si le texte est vide.
+            MistralException: En cas d'erreur API.
+        """
+        if not text.strip():
+            raise ValueError("Cannot embed empty text")
+
+        truncated = self._truncate_text(text, max_tokens=8000)
+
+        response = await self._client.embeddings.create_async(
+            model=self.model,
+            inputs=[truncated],
+        )
+
+        self.logger.debug(
+            "Text embedded",
+            text_length=len(text),
+            model=self.model,
+        )
+
+        return response.data[0].embedding
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -77,50 +178,72 @@ class EmbeddingService(LoggerMixin):
         self,
         texts: list[str],
         batch_size: int = 25,
+        concurrency: int = EMBED_CONCURRENCY,
     ) -> list[list[float]]:
         """
         Génère des embeddings pour plusieurs textes.
 
+        Les textes identiques (en-têtes, bannières de licence...) ne sont
+        envoyés qu'une fois à l'API; leur embedding est recopié à chaque
+        position. Au-delà d'un batch, jusqu'à `concurrency` appels API
+        sont en vol simultanément (threads: la méthode reste synchrone
+        pour les workers et l'ingestion).
+
         Args:
             texts: Liste de textes à vectoriser.
             batch_size: Taille des batches (max 25).
+            concurrency: Nombre maximum d'appels API simultanés.
 
         Returns:
-            Liste de vecteurs d'embeddings.
+            Liste de vecteurs d'embeddings, dans l'ordre de `texts`.
         """
         if not texts:
             return []
 
-        all_embeddings: list[list[float]] = []
+        unique = list(dict.fromkeys(texts))
+        batches = [unique[i : i + batch_size] for i in range(0, len(unique), batch_size)]
 
-        # Traiter par batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
+        if len(batches) == 1 or concurrency <= 1:
+            results = [self._embed_chunk(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as pool:
+                results = list(pool.map(self._embed_chunk, batches))
 
-            # Tronquer chaque texte
-            truncated = [self._truncate_text(t, 8000) for t in batch]
+        unique_embeddings = [embedding for result in results for embedding in result]
 
-            response = self._client.embeddings.create(
-                model=self.model,
-                inputs=truncated,
-            )
+        try:
+            from src.utils.metrics import record_embedding_batch
 
-            batch_embeddings = [d.embedding for d in response.data]
-            all_embeddings.extend(batch_embeddings)
+            record_embedding_batch(total=len(texts), unique=len(unique))
+        except ImportError:
+            pass  # Metrics not available
 
-            self.logger.debug(
-                "Batch embedded",
-                batch_num=i // batch_size + 1,
-                batch_size=len(batch),
-            )
+        if len(unique) == len(texts):
+            return unique_embeddings
+
+        by_text = dict(zip(unique, unique_embeddings, strict=True))
+        return [by_text[text] for text in texts]
 
-        return all_embeddings
+    def _embed_chunk(self, batch: list[str]) -> list[list[float]]:
+        """Vectorise un batch de textes en un appel API."""
+        # Tronquer chaque texte
+        truncated = [self._truncate_text(t, 8000) for t in batch]
+
+        response = self._client.embeddings.create(
+            model=self.model,
+            inputs=truncated,
+        )
+
+        self.logger.debug("Batch embedded", batch_size=len(batch))
+        return [d.embedding for d in response.data]
 
     def embed_query(self, query: str) -> list[float]:
         """
         Génère un embedding pour une requête de recherche.
 
-        Optimisé pour les requêtes courtes.
+        Les embeddings des requêtes identiques sont servis par un cache
+        LRU en mémoire (QUERY_CACHE_MAX_ENTRIES entrées, durée de vie
+        embedding_cache_ttl_seconds) sans appel API.
 
         Args:
             query: Requête de recherche.
@@ -128,15 +251,99 @@ class EmbeddingService(LoggerMixin):
         Returns:
             Vecteur d'embedding.
         """
-        return self.embed_text(query)
+        cached = self._get_cached_query(query)
+        if cached is not None:
+            return cached
+
+        embedding = self.embed_text(query)
+        self._cache_query(query, embedding)
+        return embedding
+
+    async def aembed_query(self, query: str) -> list[float]:
+        """
+        Version asynchrone de embed_query (même cache de requêtes).
+
+        Args:
+            query: Requête de recherche.
+
+        Returns:
+            Vecteur d'embedding.
+        """
+        cached = self._get_cached_query(query)
+        if cached is not None:
+            return cached
+
+        embedding = await self.aembed_text(query)
+        self._cache_query(query, embedding)
+        return embedding
+
+    def _get_cached_query(self, query: str) -> list[float] | None:
+        """Retourne l'embedding en cache d'une requête, s'il n'a pas expiré."""
+        if not self._query_cache_ttl:
+            return None
+
+        with self._query_cache_lock:
+            entry = self._query_cache.get(query)
+            if entry is None:
+                return None
+
+            embedding, timestamp = entry
+            if time.monotonic() - timestamp >= self._query_cache_ttl:
+                del self._query_cache[query]
+                return None
+
+            self._query_cache.move_to_end(query)
+            return embedding
+
+    def _cache_query(self, query: str, embedding: list[float]) -> None:
+        """Met en cache l'embedding d'une requête (éviction LRU)."""
+        if not self._query_cache_ttl:
+            return
+
+        with self._query_cache_lock:
+            self._query_cache[query] = (embedding, time.monotonic())
+            self._query_cache.move_to_end(query)
+
+            while len(self._query_cache) > QUERY_CACHE_MAX_ENTRIES:
+                self._query_cache.popitem(last=False)
+
+    def clear_query_cache(self) -> None:
+        """Vide le cache des embeddings de requêtes."""
+        with self._query_cache_lock:
+            self._query_cache.clear()
 
     def _truncate_text(self, text: str, max_tokens: int) -> str:
         """
-        Tronque le texte si nécessaire.
+        Tronque le texte à max_tokens tokens si nécessaire.
 
-        Estimation simple: 1 token ≈ 4 caractères.
+        Compte exact avec le tokenizer Mistral s'il est installé; sinon
+        estimation simple (1 token ≈ 4 caractères), imprécise pour le code
+        ou les textes non latins.
         """
-        max_chars = max_tokens * 4
+        tokenizer = _get_tokenizer()
+        if tokenizer is None:
+            return self._truncate_chars(text, max_tokens * 4)
+
+        # Chaque token couvre au moins un octet: un texte ASCII court tient
+        if text.isascii() and len(text) <= max_tokens:
+            return text
+
+        max_chars = max_tokens * MAX_TOKEN_CHARS
+        ids = tokenizer.encode(text[:max_chars], bos=False, eos=False)
+        if len(ids) <= max_tokens and len(text) <= max_chars:
+            return text
+
+        truncated = tokenizer.decode(ids[:max_tokens])
+        self.logger.debug(
+            "Text truncated",
+            original=len(text),
+            truncated=len(truncated),
+            max_tokens=max_tokens,
+        )
+        return truncated
+
+    def _truncate_chars(self, text: str, max_chars: int) -> str:
+        """Tronque le texte à max_chars caractères."""
         if len(text) > max_chars:
             self.logger.debug(
                 "Text truncated",
@@ -148,8 +355,8 @@ class EmbeddingService(LoggerMixin):
 
     @staticmethod
     def compute_similarity(
-        embedding1: list[float],
-        embedding2: list[float],
+        embedding1: list[float] | np.ndarray,
+        embedding2: list[float] | np.ndarray,
     ) -> float:
         """
         Calcule la similarité cosinus entre deux embeddings.
@@ -160,14 +367,20 @@ class EmbeddingService(LoggerMixin):
 
         Returns:
             Score de similarité entre 0 et 1.
-        """
-        import math
 
-        dot_product = sum(a * b for a, b in zip(embedding1, embedding2, strict=True))
-        norm1 = math.sqrt(sum(a * a for a in embedding1))
-        norm2 = math.sqrt(sum(b * b for b in embedding2))
+        Raises:
+            ValueError: Si les vecteurs n'ont pas la même dimension.
+        """
+        a = np.asarray(embedding1, dtype=np.float32)
+        b = np.asarray(embedding2, dtype=np.float32)
+        if a.shape != b.shape:
+            raise ValueError(f"Dimension mismatch: {a.shape} != {b.shape}")
 
-        if norm1 == 0 or norm2 == 0:
+        if not a.any() or not b.any():
             return 0.0
 
-        return dot_product / (norm1 * norm2)
+        if simsimd is not None:
+            # simsimd renvoie la distance cosinus (1 - similarité)
+            return float(1.0 - simsimd.cosine(a, b))
+
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
@@ -13,13 +13,36 @@ Objectif : Réduire la latence de 60-80% pour les requêtes simples.
 
 import asyncio
 import json
+import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from enum import Enum
+from functools import lru_cache
+from typing import Any
 
 from src.config.logging_config import LoggerMixin
+from src.config.settings import get_settings
 from src.providers.llm import LLMConfig, LLMProvider, LLMProviderFactory
 
+try:
+    import ahocorasick
+except ImportError:  # Dépendance optionnelle: fallback sur des scans Python
+    ahocorasick = None
+
+try:
+    # orjson.JSONDecodeError hérite de json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:  # Dépendance optionnelle: fallback sur la stdlib
+    _json_loads = json.loads
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Familles de mots-clés de la détection rapide (bitmask)
+_KIND_GREETING = 1
+_KIND_DOCUMENTS = 2
+_KIND_WEB = 4
+
 
 class QueryIntent(str, Enum):
     """Types d'intentions de requête."""
@@ -31,9 +54,9 @@ class QueryIntent(str, Enum):
     GREETING = "greeting"  # Salutation simple -> Réponse rapide
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingDecision:
-    """Décision de routage du routeur intelligent."""
+    """Décision de routage du routeur intelligent (slots: une instance par requête)."""
 
     intent: QueryIntent
     use_rag: bool = False
@@ -66,15 +89,19 @@ class RoutingDecision:
         return self.use_web or self.force_web
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class OrchestratorConfig:
-    """Configuration de l'orchestrateur."""
+    """Configuration de l'orchestrateur (immuable: l'instance par défaut est partagée)."""
 
     # Routage
     enable_smart_routing: bool = True
     router_model: str = "mistral-tiny"
     router_timeout_ms: int = 2000
 
+    # Micro-batching des appels au routeur (0 = désactivé)
+    router_batch_window_ms: int = 0
+    router_batch_max: int = 8
+
     # Seuils de confiance
     confidence_threshold: float = 0.7
 
@@ -85,6 +112,11 @@ class OrchestratorConfig:
     # Cache des décisions
     cache_decisions: bool = True
     cache_ttl_seconds: int = 300
+    cache_max_entries: int = 1000
+
+
+# Configuration par défaut partagée par les orchestrateurs sans config explicite
+_DEFAULT_CONFIG = OrchestratorConfig()
 
 
 class QueryOrchestrator(LoggerMixin):
@@ -112,6 +144,26 @@ Réponds UNIQUEMENT en JSON valide, sans explication :
 
 Question : """
 
+    ROUTER_BATCH_PROMPT = """Tu es un classificateur de requêtes. Pour chaque question, détermine :
+1. S'il faut chercher dans des documents privés (CV, projets, notes personnelles)
+2. S'il faut chercher sur le web (actualités, infos récentes, données publiques)
+3. S'il faut une réflexion approfondie (question complexe nécessitant analyse)
+
+Réponds UNIQUEMENT par un tableau JSON valide, sans explication, avec un objet
+par question et dans le même ordre :
+[
+  {
+    "intent": "general|documents|web_search|hybrid|greeting",
+    "use_rag": true/false,
+    "use_web": true/false,
+    "use_reflection": true/false,
+    "confidence": 0.0-1.0,
+    "reasoning": "courte explication"
+  }
+]
+
+Questions (tableau JSON) : """
+
     # Patterns pour détection rapide (sans appel LLM)
     GREETING_PATTERNS = [
         "bonjour",
@@ -162,9 +214,27 @@ Question : """
         Args:
             config: Configuration optionnelle.
         """
-        self.config = config or OrchestratorConfig()
+        self.config = config or _DEFAULT_CONFIG
         self._factory = LLMProviderFactory()
-        self._decision_cache: dict[str, tuple[RoutingDecision, float]] = {}
+        # Cache LRU: (décision, instant d'insertion en time.monotonic())
+        self._decision_cache: OrderedDict[str, tuple[RoutingDecision, float]] = OrderedDict()
+        self._keyword_automaton = self._build_keyword_automaton()
+
+        # Micro-batching du routeur: lots en attente et timers par boucle
+        # (le singleton sert aussi la boucle de fond de RAGEngine.query)
+        self._router_pending: dict[
+            asyncio.AbstractEventLoop, list[tuple[str, asyncio.Future[RoutingDecision]]]
+        ] = {}
+        self._router_flush_handle: dict[asyncio.AbstractEventLoop, asyncio.TimerHandle] = {}
+        self._router_batch_lock = threading.Lock()
+        self._router_batch_tasks: set[asyncio.Task[None]] = set()
+
+        # Providers du routeur, résolus au premier appel
+        self._router_provider: Any | None = None
+        self._router_batch_provider: Any | None = None
+
+        # Routages LLM en vol, partagés entre requêtes identiques concurrentes
+        self._router_inflight: dict[str, asyncio.Task[RoutingDecision]] = {}
 
     async def route(
         self,
@@ -189,7 +259,7 @@ Question : """
         Returns:
             RoutingDecision avec le chemin optimal.
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         query_lower = query.lower().strip()
 
         # 1. Vérifier le cache
@@ -211,20 +281,20 @@ Question : """
             quick_decision.disable_rag = disable_rag
             quick_decision.disable_web = disable_web
             quick_decision.use_reflection = quick_decision.use_reflection or force_reflection
-            quick_decision.latency_ms = int((time.time() - start_time) * 1000)
+            quick_decision.latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             self._cache_decision(query_lower, quick_decision)
             return quick_decision
 
         # 3. Routage intelligent via LLM (si activé)
         if self.config.enable_smart_routing:
             try:
-                decision = await self._smart_route(query)
+                decision = await self._smart_route_shared(query, query_lower)
                 decision.force_rag = force_rag
                 decision.force_web = force_web
                 decision.disable_rag = disable_rag
                 decision.disable_web = disable_web
                 decision.use_reflection = decision.use_reflection or force_reflection
-                decision.latency_ms = int((time.time() - start_time) * 1000)
+                decision.latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
                 self._cache_decision(query_lower, decision)
                 return decision
             except Exception as e:
@@ -238,13 +308,64 @@ Question : """
             use_reflection=force_reflection,
             confidence=0.5,
             reasoning="Fallback decision",
-            latency_ms=int((time.time() - start_time) * 1000),
+            latency_ms=(time.perf_counter_ns() - start_ns) // 1_000_000,
             force_rag=force_rag,
             force_web=force_web,
             disable_rag=disable_rag,
             disable_web=disable_web,
         )
 
+    def _build_keyword_automaton(self) -> Any | None:
+        """
+        Compile tous les mots-clés de détection rapide en un automate Aho-Corasick.
+
+        Returns:
+            Automate prêt à l'emploi, ou None si pyahocorasick n'est pas installé.
+        """
+        if ahocorasick is None:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for kind, keywords in (
+            (_KIND_GREETING, self.GREETING_PATTERNS),
+            (_KIND_DOCUMENTS, self.DOCUMENT_KEYWORDS),
+            (_KIND_WEB, self.WEB_KEYWORDS),
+        ):
+            for keyword in keywords:
+                kinds, _ = automaton.get(keyword, (0, len(keyword)))
+                automaton.add_word(keyword, (kinds | kind, len(keyword)))
+        automaton.make_automaton()
+        return automaton
+
+    def _match_keyword_kinds(self, query: str) -> int:
+        """
+        Identifie les familles de mots-clés présentes dans la requête.
+
+        Les salutations ne comptent que si elles débutent la requête.
+
+        Args:
+            query: Question en minuscules.
+
+        Returns:
+            Bitmask des familles détectées (_KIND_*).
+        """
+        if self._keyword_automaton is None:
+            mask = 0
+            if any(query.startswith(g) for g in self.GREETING_PATTERNS):
+                mask |= _KIND_GREETING
+            if any(kw in query for kw in self.DOCUMENT_KEYWORDS):
+                mask |= _KIND_DOCUMENTS
+            if any(kw in query for kw in self.WEB_KEYWORDS):
+                mask |= _KIND_WEB
+            return mask
+
+        mask = 0
+        for end, (kinds, length) in self._keyword_automaton.iter(query):
+            if end + 1 != length:
+                kinds &= ~_KIND_GREETING
+            mask |= kinds
+        return mask
+
     def _quick_detect(self, query: str) -> RoutingDecision | None:
         """
         Détection rapide sans appel LLM.
@@ -255,8 +376,12 @@ Question : """
         Returns:
             RoutingDecision si détection sûre, None sinon.
         """
+        kinds = self._match_keyword_kinds(query)
+        if not kinds:
+            return None
+
         # Salutations
-        if any(query.startswith(g) for g in self.GREETING_PATTERNS):
+        if kinds & _KIND_GREETING:
             return RoutingDecision(
                 intent=QueryIntent.GREETING,
                 use_rag=False,
@@ -267,7 +392,7 @@ Question : """
             )
 
         # Mots-clés documents personnels
-        if any(kw in query for kw in self.DOCUMENT_KEYWORDS):
+        if kinds & _KIND_DOCUMENTS:
             return RoutingDecision(
                 intent=QueryIntent.DOCUMENTS,
                 use_rag=True,
@@ -278,7 +403,7 @@ Question : """
             )
 
         # Mots-clés recherche web
-        if any(kw in query for kw in self.WEB_KEYWORDS):
+        if kinds & _KIND_WEB:
             return RoutingDecision(
                 intent=QueryIntent.WEB_SEARCH,
                 use_rag=False,
@@ -291,31 +416,114 @@ Question : """
         # Pas de détection sûre
         return None
 
+    async def _smart_route_shared(self, query: str, key: str) -> RoutingDecision:
+        """
+        Mutualise le routage LLM des requêtes identiques concurrentes.
+
+        La première requête lance l'appel au routeur; les suivantes
+        attendent le même résultat au lieu de relancer un appel.
+
+        Args:
+            query: Question de l'utilisateur.
+            key: Question normalisée (minuscules), clé de partage.
+
+        Returns:
+            Copie de la décision, propre à l'appelant.
+        """
+        task = self._router_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._smart_route(query))
+            self._router_inflight[key] = task
+            task.add_done_callback(lambda t: self._release_inflight(key, t))
+
+        # shield: l'annulation d'un appelant n'annule pas les autres
+        decision = await asyncio.shield(task)
+        return replace(decision)
+
+    def _release_inflight(self, key: str, task: asyncio.Task[RoutingDecision]) -> None:
+        """Retire un routage terminé des routages en vol."""
+        if self._router_inflight.get(key) is task:
+            del self._router_inflight[key]
+
     async def _smart_route(self, query: str) -> RoutingDecision:
         """
         Routage intelligent via LLM.
 
+        Si router_batch_window_ms > 0, la requête est regroupée avec celles
+        arrivant dans la même fenêtre en un seul appel au routeur.
+
         Args:
             query: Question de l'utilisateur.
 
         Returns:
             RoutingDecision basée sur l'analyse LLM.
         """
-        # Utiliser un modèle rapide pour le routage
+        if self.config.router_batch_window_ms > 0:
+            return await self._submit_router_batch(query)
+        return await self._route_single(query)
+
+    def _get_router_provider(self, batch: bool = False) -> Any:
+        """
+        Récupère le provider rapide configuré pour le routage.
+
+        La config du routeur ne dépend que de self.config: le provider est
+        construit au premier appel puis réutilisé. Le provider de lot est
+        créé hors du cache de la factory, dont la clé ignore max_tokens.
+
+        Args:
+            batch: Provider dimensionné pour router_batch_max requêtes.
+
+        Returns:
+            Provider LLM du routeur.
+        """
+        provider = self._router_batch_provider if batch else self._router_provider
+        if provider is not None:
+            return provider
+
+        max_tokens = 150 * self.config.router_batch_max if batch else 150
         router_config = LLMConfig(
             model=self.config.router_model,
             temperature=0.0,  # Déterministe
-            max_tokens=150,
+            max_tokens=max_tokens,
         )
 
         try:
             provider = self._factory.get_provider(
                 LLMProvider.MISTRAL,
                 router_config,
+                cache=not batch,
             )
         except Exception:
-            # Fallback sur le provider par défaut
-            provider = self._factory.get_provider()
+            # Fallback sur le provider par défaut (non mémorisé: Mistral sera retenté)
+            return self._factory.get_provider()
+
+        if batch:
+            self._router_batch_provider = provider
+        else:
+            self._router_provider = provider
+        return provider
+
+    def _router_timeout_decision(self, query: str) -> RoutingDecision:
+        """Décision de repli quand le routeur dépasse son timeout."""
+        return self._quick_detect(query.lower()) or RoutingDecision(
+            intent=QueryIntent.GENERAL,
+            use_rag=False,
+            use_web=False,
+            confidence=0.5,
+            reasoning="Router timeout",
+        )
+
+    async def _route_single(self, query: str) -> RoutingDecision:
+        """
+        Classifie une requête avec un appel dédié au routeur.
+
+        Args:
+            query: Question de l'utilisateur.
+
+        Returns:
+            RoutingDecision basée sur l'analyse LLM.
+        """
+        provider = self._get_router_provider()
 
         # Générer la classification
         messages = [{"role": "user", "content": f"{self.ROUTER_PROMPT}{query}"}]
@@ -333,13 +541,137 @@ Question : """
 
         except asyncio.TimeoutError:
             self.logger.warning("Router timeout, using quick detect or fallback")
-            return self._quick_detect(query.lower()) or RoutingDecision(
-                intent=QueryIntent.GENERAL,
-                use_rag=False,
-                use_web=False,
-                confidence=0.5,
-                reasoning="Router timeout",
+            return self._router_timeout_decision(query)
+
+    async def _submit_router_batch(self, query: str) -> RoutingDecision:
+        """
+        Ajoute une requête au lot en cours et attend sa décision.
+
+        La première requête d'un lot arme un timer de router_batch_window_ms;
+        le lot part à l'expiration du timer ou dès router_batch_max requêtes.
+        Chaque boucle d'événements a son propre lot: une future n'est
+        résolue que par la boucle qui l'a créée.
+
+        Args:
+            query: Question de l'utilisateur.
+
+        Returns:
+            RoutingDecision de cette requête.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[RoutingDecision] = loop.create_future()
+
+        with self._router_batch_lock:
+            self._drop_closed_loops()
+            pending = self._router_pending.setdefault(loop, [])
+            pending.append((query, future))
+            full = len(pending) >= self.config.router_batch_max
+            if not full and loop not in self._router_flush_handle:
+                self._router_flush_handle[loop] = loop.call_later(
+                    self.config.router_batch_window_ms / 1000,
+                    self._flush_router_batch,
+                    loop,
+                )
+
+        if full:
+            self._flush_router_batch(loop)
+
+        return await future
+
+    def _drop_closed_loops(self) -> None:
+        """Oublie les lots et timers des boucles fermées (ex: asyncio.run terminé)."""
+        for loop in [loop for loop in self._router_pending if loop.is_closed()]:
+            del self._router_pending[loop]
+            self._router_flush_handle.pop(loop, None)
+
+    def _flush_router_batch(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Envoie au routeur le lot en attente d'une boucle.
+
+        Args:
+            loop: Boucle courante, propriétaire du lot et de ses futures.
+        """
+        with self._router_batch_lock:
+            handle = self._router_flush_handle.pop(loop, None)
+            batch = self._router_pending.pop(loop, [])
+
+        if handle is not None:
+            handle.cancel()
+        if not batch:
+            return
+
+        task = loop.create_task(self._route_batch(batch))
+        self._router_batch_tasks.add(task)
+        task.add_done_callback(self._router_batch_tasks.discard)
+
+    async def _route_batch(
+        self, batch: list[tuple[str, asyncio.Future[RoutingDecision]]]
+    ) -> None:
+        """
+        Classifie un lot de requêtes et résout leurs futures.
+
+        Les erreurs sont propagées à chaque appelant, qui applique
+        alors le fallback habituel de route().
+
+        Args:
+            batch: Couples (requête, future à résoudre).
+        """
+        queries = [query for query, _ in batch]
+        try:
+            if len(queries) == 1:
+                decisions = [await self._route_single(queries[0])]
+            else:
+                decisions = await self._route_many(queries)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), decision in zip(batch, decisions, strict=True):
+            if not future.done():
+                future.set_result(decision)
+
+    async def _route_many(self, queries: list[str]) -> list[RoutingDecision]:
+        """
+        Classifie plusieurs requêtes en un seul appel au routeur.
+
+        Si la réponse n'est pas un tableau d'une décision par requête,
+        chaque requête est reclassifiée individuellement.
+
+        Args:
+            queries: Questions des utilisateurs.
+
+        Returns:
+            Décisions, dans l'ordre des requêtes.
+        """
+        provider = self._get_router_provider(batch=True)
+        prompt = f"{self.ROUTER_BATCH_PROMPT}{json.dumps(queries, ensure_ascii=False)}"
+        messages = [{"role": "user", "content": prompt}]
+
+        try:
+            response = await asyncio.wait_for(
+                provider.generate(messages),
+                timeout=self.config.router_timeout_ms / 1000,
             )
+        except asyncio.TimeoutError:
+            self.logger.warning("Router batch timeout, using quick detect or fallback")
+            return [self._router_timeout_decision(query) for query in queries]
+
+        try:
+            items = self._extract_json(response.content, opener="[")
+        except json.JSONDecodeError:
+            items = None
+
+        if not isinstance(items, list) or len(items) != len(queries):
+            self.logger.warning("Invalid router batch response", batch_size=len(queries))
+            return list(await asyncio.gather(*(self._route_single(q) for q in queries)))
+
+        return [
+            self._decision_from_router_data(item) if isinstance(item, dict)
+            else self._router_parse_error_decision()
+            for item in items
+        ]
 
     def _parse_router_response(self, content: str) -> RoutingDecision:
         """
@@ -352,63 +684,96 @@ Question : """
             RoutingDecision parsée.
         """
         try:
-            # Extraire le JSON de la réponse
-            content = content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
+            data = self._extract_json(content)
+            return self._decision_from_router_data(data)
+
+        except (json.JSONDecodeError, KeyError) as e:
+            self.logger.warning("Failed to parse router response", error=str(e))
+            return self._router_parse_error_decision()
+
+    @staticmethod
+    def _extract_json(content: str, opener: str = "{") -> Any:
+        """
+        Extrait la première valeur JSON d'une réponse LLM éventuellement bruitée.
 
-            data = json.loads(content)
+        Tente d'abord un parsing direct; sinon balaie la réponse avec
+        raw_decode à partir de chaque `opener` (texte autour, blocs ```json...).
 
-            intent_str = data.get("intent", "general")
+        Args:
+            content: Réponse du LLM.
+            opener: Caractère ouvrant la valeur attendue ("{" ou "[").
+
+        Returns:
+            Valeur JSON décodée.
+
+        Raises:
+            json.JSONDecodeError: Si aucune valeur JSON n'est trouvée.
+        """
+        content = content.strip()
+        try:
+            return _json_loads(content)
+        except json.JSONDecodeError:
+            pass
+
+        start = content.find(opener)
+        while start != -1:
             try:
-                intent = QueryIntent(intent_str)
-            except ValueError:
-                intent = QueryIntent.GENERAL
+                return _JSON_DECODER.raw_decode(content, start)[0]
+            except json.JSONDecodeError:
+                start = content.find(opener, start + 1)
+        raise json.JSONDecodeError("No JSON value found", content, 0)
+
+    @staticmethod
+    def _decision_from_router_data(data: dict[str, Any]) -> RoutingDecision:
+        """Construit une décision à partir d'un objet JSON du routeur."""
+        intent_str = data.get("intent", "general")
+        try:
+            intent = QueryIntent(intent_str)
+        except ValueError:
+            intent = QueryIntent.GENERAL
 
-            return RoutingDecision(
-                intent=intent,
-                use_rag=data.get("use_rag", False),
-                use_web=data.get("use_web", False),
-                use_reflection=data.get("use_reflection", False),
-                confidence=float(data.get("confidence", 0.7)),
-                reasoning=data.get("reasoning", ""),
-            )
+        return RoutingDecision(
+            intent=intent,
+            use_rag=data.get("use_rag", False),
+            use_web=data.get("use_web", False),
+            use_reflection=data.get("use_reflection", False),
+            confidence=float(data.get("confidence", 0.7)),
+            reasoning=data.get("reasoning", ""),
+        )
 
-        except (json.JSONDecodeError, KeyError) as e:
-            self.logger.warning("Failed to parse router response", error=str(e))
-            return RoutingDecision(
-                intent=QueryIntent.GENERAL,
-                use_rag=False,
-                use_web=False,
-                confidence=0.5,
-                reasoning="Parse error",
-            )
+    @staticmethod
+    def _router_parse_error_decision() -> RoutingDecision:
+        """Décision par défaut quand la réponse du routeur est illisible."""
+        return RoutingDecision(
+            intent=QueryIntent.GENERAL,
+            use_rag=False,
+            use_web=False,
+            confidence=0.5,
+            reasoning="Parse error",
+        )
 
     def _get_cached_decision(self, query: str) -> RoutingDecision | None:
         """Récupère une décision du cache si valide."""
-        if query in self._decision_cache:
-            decision, timestamp = self._decision_cache[query]
-            if time.time() - timestamp < self.config.cache_ttl_seconds:
-                self.logger.debug("Cache hit for routing decision")
-                return decision
-            else:
-                del self._decision_cache[query]
-        return None
+        entry = self._decision_cache.get(query)
+        if entry is None:
+            return None
+
+        decision, timestamp = entry
+        if time.monotonic() - timestamp >= self.config.cache_ttl_seconds:
+            del self._decision_cache[query]
+            return None
+
+        self._decision_cache.move_to_end(query)
+        self.logger.debug("Cache hit for routing decision")
+        return decision
 
     def _cache_decision(self, query: str, decision: RoutingDecision) -> None:
-        """Met en cache une décision."""
-        self._decision_cache[query] = (decision, time.time())
-
-        # Nettoyer le cache si trop grand
-        if len(self._decision_cache) > 1000:
-            # Supprimer les plus anciens
-            sorted_items = sorted(
-                self._decision_cache.items(),
-                key=lambda x: x[1][1],
-            )
-            self._decision_cache = dict(sorted_items[-500:])
+        """Met en cache une décision (éviction LRU au-delà de cache_max_entries)."""
+        self._decision_cache[query] = (decision, time.monotonic())
+        self._decision_cache.move_to_end(query)
+
+        while len(self._decision_cache) > self.config.cache_max_entries:
+            self._decision_cache.popitem(last=False)
 
     def clear_cache(self) -> None:
         """Vide le cache des décisions."""
@@ -416,12 +781,15 @@ Question : """
 
 
 # Singleton
-_orchestrator: QueryOrchestrator | None = None
-
-
+@lru_cache
 def get_orchestrator() -> QueryOrchestrator:
-    """Récupère le singleton de l'orchestrateur."""
-    global _orchestrator
-    if _orchestrator is None:
-        _orchestrator = QueryOrchestrator()
-    return _orchestrator
+    """
+    Récupère le singleton de l'orchestrateur.
+
+    La fenêtre de micro-batching du routeur vient de ROUTER_BATCH_WINDOW_MS.
+    get_orchestrator.cache_clear() réinitialise l'instance (tests).
+    """
+    settings = get_settings()
+    return QueryOrchestrator(
+        OrchestratorConfig(router_batch_window_ms=settings.router_batch_window_ms)
+    )
@@ -9,11 +9,13 @@ Délègue les responsabilités aux modules Retriever et Generator.
 """
 
 import asyncio
+import concurrent.futures
 import time
 from collections.abc import AsyncIterator
 from typing import Any
 from uuid import uuid4
 
+from src.agents.perplexity_agent import WebSearchResult
 from src.config.logging_config import LoggerMixin
 from src.config.settings import get_settings
 from src.models.conversation import (
@@ -24,11 +26,15 @@ from src.models.conversation import (
 from src.repositories.agent_memory_repository import AgentMemoryRepository
 from src.repositories.conversation_repository import ConversationRepository
 from src.services.circuit_breaker import get_circuit_breaker
-from src.services.orchestrator import get_orchestrator
+from src.services.orchestrator import RoutingDecision, get_orchestrator
 from src.services.rag.config import RAGConfig, RAGResponse
 from src.services.rag.generator import RAGGenerator
-from src.services.rag.retriever import RAGRetriever
+from src.services.rag.retriever import RAGRetriever, RetrievalResult
 from src.services.trace_service import get_trace_service
+from src.utils.background_loop import get_background_loop
+
+# Attente maximale d'une requête synchrone (RAGEngine.query)
+SYNC_QUERY_TIMEOUT_SECONDS = 120
 
 
 class RAGEngine(LoggerMixin):
@@ -103,6 +109,10 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
         self._session_id = str(uuid4())
         return self._session_id
 
+    async def aclose(self) -> None:
+        """Libère les connexions HTTP persistantes."""
+        await self._retriever.aclose()
+
     async def query_async(
         self,
         question: str,
@@ -114,6 +124,7 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
         api_key_id: str | None = None,
         model_id: str | None = None,
         agent_id: str | None = None,
+        log_trace: bool = True,
     ) -> RAGResponse:
         """
         Traite une requête de manière asynchrone avec routage intelligent.
@@ -128,6 +139,7 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
             api_key_id: ID de la clé API/agent pour isolation documents.
             model_id: Modèle LLM à utiliser.
             agent_id: ID de l'agent pour la mémoire conversationnelle.
+            log_trace: Enregistrer une trace LLM (TraceService).
 
         Returns:
             RAGResponse avec la réponse et les sources.
@@ -159,19 +171,18 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
             confidence=routing.confidence,
         )
 
-        # 2. Recherche vectorielle (si nécessaire)
+        # 2-3. Recherches vectorielle et web (si nécessaires), en parallèle
+        vector_task, web_task = self._start_searches(routing, question, user_id, api_key_id)
+
         vector_context = ""
-        if routing.should_use_rag:
-            result = await self._retriever.search_vector_store(
-                question, user_id, api_key_id
-            )
+        if vector_task is not None:
+            result = await vector_task
             vector_context = result.context
             sources.extend(result.sources)
 
-        # 3. Recherche web (si nécessaire)
         web_context = ""
-        if routing.should_use_web:
-            web_result = await self._retriever.search_web(question)
+        if web_task is not None:
+            web_result = await web_task
             if web_result:
                 web_context = web_result.content
                 sources.append(
@@ -206,13 +217,13 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
         )
 
         # 8. Génération avec Circuit Breaker et Fallback
+        # Le prompt système est déjà le premier message: le passer aussi en
+        # system_prompt l'enverrait deux fois (et casserait le préfixe
+        # commun que les providers mettent en cache d'une requête à l'autre)
         async def call_llm():
             if routing.use_reflection:
                 return await provider.generate_with_reflection(messages)
-            return await provider.generate(
-                messages,
-                system_prompt=system_prompt or self.DEFAULT_SYSTEM_PROMPT,
-            )
+            return await provider.generate(messages)
 
         async def fallback_call():
             self.logger.warning("Primary provider failing, attempting fallback")
@@ -250,6 +261,7 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
             user_id=user_id,
             thought_process=llm_response.thought_process,
             routing_decision=routing,
+            log_trace=log_trace,
         )
 
         self.logger.info(
@@ -318,16 +330,20 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
         vector_context = ""
         web_context = ""
 
-        if routing.should_use_rag:
+        vector_task, web_task = self._start_searches(routing, question, user_id, api_key_id)
+        if vector_task is not None:
             yield {"event": "search_start", "data": {"type": "rag"}}
-            result = await self._retriever.search_vector_store(question, user_id, api_key_id)
+        if web_task is not None:
+            yield {"event": "search_start", "data": {"type": "web"}}
+
+        if vector_task is not None:
+            result = await vector_task
             vector_context = result.context
             sources.extend(result.sources)
             yield {"event": "search_complete", "data": {"type": "rag", "results": len(result.sources)}}
 
-        if routing.should_use_web:
-            yield {"event": "search_start", "data": {"type": "web"}}
-            web_result = await self._retriever.search_web(question)
+        if web_task is not None:
+            web_result = await web_task
             if web_result:
                 web_context = web_result.content
                 sources.append(
@@ -393,20 +409,74 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
             },
         }
 
+    def _start_searches(
+        self,
+        routing: RoutingDecision,
+        question: str,
+        user_id: str | None,
+        api_key_id: str | None,
+    ) -> tuple[asyncio.Task[RetrievalResult] | None, asyncio.Task[WebSearchResult | None] | None]:
+        """
+        Lance les recherches demandées par le routage, sans les attendre.
+
+        Les recherches vectorielle et web sont indépendantes: la latence est
+        celle de la plus lente au lieu de leur somme. Les deux méthodes du
+        retriever interceptent leurs erreurs.
+
+        Returns:
+            Tâches (vectorielle, web), None si la recherche n'est pas requise.
+        """
+        vector_task = None
+        web_task = None
+        if routing.should_use_rag:
+            vector_task = asyncio.create_task(
+                self._retriever.search_vector_store(question, user_id, api_key_id)
+            )
+        if routing.should_use_web:
+            web_task = asyncio.create_task(self._retriever.search_web(question))
+        return vector_task, web_task
+
     def query(
         self,
         question: str,
         system_prompt: str | None = None,
         use_web: bool | None = None,
+        timeout: float = SYNC_QUERY_TIMEOUT_SECONDS,
     ) -> RAGResponse:
-        """Version synchrone de query_async."""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        """
+        Version synchrone de query_async, pour les scripts et la CLI.
+
+        La requête s'exécute sur la boucle d'arrière-plan partagée: ses
+        clients HTTP (et leurs connexions) sont réutilisés d'un appel à
+        l'autre, y compris depuis une boucle asyncio déjà en cours.
+
+        Les ressources liées à la boucle de l'application (flush des
+        traces, pool asyncpg, client Mistral partagé) ne doivent pas être
+        utilisées depuis deux boucles: aucune trace n'est enregistrée ici,
+        et l'API (FastAPI) appelle query_async sur sa propre boucle.
 
-        return loop.run_until_complete(self.query_async(question, system_prompt, use_web))
+        Args:
+            question: Question de l'utilisateur.
+            system_prompt: Prompt système personnalisé.
+            use_web: Forcer/désactiver la recherche web.
+            timeout: Attente maximale en secondes.
+
+        Returns:
+            RAGResponse avec la réponse et les sources.
+
+        Raises:
+            TimeoutError: Si la requête dépasse `timeout` (elle est annulée).
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.query_async(question, system_prompt, use_web, log_trace=False),
+            get_background_loop(),
+        )
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.logger.error("Query timed out", timeout=timeout)
+            raise TimeoutError(f"RAG query timed out after {timeout}s") from None
 
     async def _log_conversation(
         self,
@@ -418,8 +488,9 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
         user_id: str | None = None,
         thought_process: str | None = None,
         routing_decision: Any | None = None,
+        log_trace: bool = True,
     ) -> str | None:
-        """Enregistre la conversation."""
+        """Enregistre la conversation (et sa trace LLM si `log_trace`)."""
         try:
             routing_info = None
             if routing_decision:
@@ -451,7 +522,7 @@ Réponds dans la langue de la question. Tutoie si l'utilisateur tutoie, vouvoie
 
             created = self._conversation_repo.log_conversation(conv)
 
-            if user_id:
+            if user_id and log_trace:
                 self._trace_service.log_success(
                     user_id=user_id,
                     model_used=self.config.llm_model,
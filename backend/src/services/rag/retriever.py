@@ -7,6 +7,7 @@ Responsable de la récupération de contexte depuis différentes sources :
 - Recherche Web (Perplexity)
 """
 
+import asyncio
 from dataclasses import dataclass
 
 from src.agents.perplexity_agent import PerplexityAgent, WebSearchResult
@@ -56,6 +57,10 @@ class RAGRetriever(LoggerMixin):
         """
         Recherche dans le Vector Store avec isolation par agent.
 
+        L'embedding passe par le client asynchrone de Mistral; le client
+        Supabase étant synchrone, la recherche s'exécute dans un thread. La
+        boucle reste libre pour les autres requêtes et la recherche web.
+
         Args:
             query: Requête de recherche.
             user_id: ID utilisateur pour filtrage.
@@ -66,10 +71,11 @@ class RAGRetriever(LoggerMixin):
         """
         try:
             # Générer l'embedding de la requête
-            query_embedding = self._embedding_service.embed_query(query)
+            query_embedding = await self._embedding_service.aembed_query(query)
 
             # Rechercher les documents similaires
-            matches = self._document_repo.search_similar(
+            matches = await asyncio.to_thread(
+                self._document_repo.search_similar,
                 query_embedding,
                 threshold=self.config.vector_threshold,
                 limit=self.config.vector_max_results,
@@ -126,6 +132,10 @@ class RAGRetriever(LoggerMixin):
             self.logger.error("Web search failed", error=str(e))
             return None
 
+    async def aclose(self) -> None:
+        """Ferme le client HTTP de la recherche web."""
+        await self._perplexity.aclose()
+
     def build_context(
         self,
         vector_context: str,
@@ -8,12 +8,26 @@ Prend en charge les limites par clé API et par IP.
 
 import time
 
+from redis.exceptions import ResponseError
+
 from src.config.logging_config import get_logger
 from src.config.redis import get_redis_client
 from src.config.settings import get_settings
 
 logger = get_logger(__name__)
 
+# INCRBY + EXPIRE atomiques en un seul aller-retour (EVALSHA)
+_FIXED_WINDOW_INCR_LUA = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[2])
+if count == tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+# Nombre max de réservations locales conservées (fenêtres expirées incluses)
+_MAX_LOCAL_LEASES = 10_000
+
 
 class RateLimiter:
     """
@@ -22,6 +36,11 @@ class RateLimiter:
 
     def __init__(self):
         self.settings = get_settings()
+        self._incr_script = None
+        self._incr_script_client = None
+        self._scripting_supported = True
+        # Réservations locales: redis_key -> (prochain compteur, dernier compteur réservé)
+        self._leases: dict[str, tuple[int, int]] = {}
 
     async def is_allowed(
         self, key: str, limit: int | None = None, window: int = 60
@@ -56,16 +75,32 @@ class RateLimiter:
         window_id = current_time // window
         redis_key = f"rl:{key}:{window_id}"
 
-        try:
-            # Incrémenter et récupérer le compteur
-            # On utilise pipeline pour s'assurer de l'expiration
-            pipe = redis.pipeline()
-            pipe.incr(redis_key)
-            pipe.expire(redis_key, window + 5)  # Un peu plus que la fenêtre
-            results = await pipe.execute()
+        # Réservation locale en cours: admission sans aller-retour Redis
+        lease = self._leases.get(redis_key)
+        if lease is not None:
+            next_count, last_count = lease
+            if next_count < last_count:
+                self._leases[redis_key] = (next_count + 1, last_count)
+            else:
+                del self._leases[redis_key]
+            return True, next_count, 0
+
+        lease_size = min(self.settings.rate_limit_local_lease, max_requests)
 
-            count = results[0]
-            allowed = count <= max_requests
+        try:
+            # Réserver lease_size requêtes et récupérer le compteur
+            total = await self._incr_window(
+                redis, redis_key, window + 5, lease_size  # Un peu plus que la fenêtre
+            )
+            first = total - lease_size + 1
+            granted = max(0, min(lease_size, max_requests - first + 1))
+            allowed = granted > 0
+            count = first if allowed else total
+
+            if granted > 1:
+                if len(self._leases) >= _MAX_LOCAL_LEASES:
+                    self._leases.clear()
+                self._leases[redis_key] = (first + 1, first + granted - 1)
 
             # Temps restant avant la fin de la fenêtre
             retry_after = window - (current_time % window) if not allowed else 0
@@ -79,6 +114,43 @@ class RateLimiter:
             logger.error("Rate limiter error", error=str(e))
             return True, 0, 0
 
+    async def _incr_window(self, redis, redis_key: str, ttl: int, amount: int = 1) -> int:
+        """
+        Incrémente le compteur d'une fenêtre et pose son expiration.
+
+        Utilise un script Lua (un seul aller-retour, atomique). Si le serveur
+        refuse les scripts, repli définitif sur un pipeline INCR + EXPIRE.
+
+        Args:
+            redis: Client Redis asynchrone.
+            redis_key: Clé du compteur de la fenêtre.
+            ttl: Expiration en secondes.
+            amount: Valeur de l'incrément (taille de la réservation).
+
+        Returns:
+            Valeur du compteur après incrément.
+        """
+        if self._scripting_supported:
+            try:
+                script = self._get_incr_script(redis)
+                return int(await script(keys=[redis_key], args=[ttl, amount]))
+            except ResponseError as e:
+                logger.warning("Redis scripting unavailable, using pipeline", error=str(e))
+                self._scripting_supported = False
+
+        pipe = redis.pipeline()
+        pipe.incrby(redis_key, amount)
+        pipe.expire(redis_key, ttl)
+        results = await pipe.execute()
+        return results[0]
+
+    def _get_incr_script(self, redis):
+        """Enregistre le script Lua une fois par client Redis."""
+        if self._incr_script is None or self._incr_script_client is not redis:
+            self._incr_script = redis.register_script(_FIXED_WINDOW_INCR_LUA)
+            self._incr_script_client = redis
+        return self._incr_script
+
     async def check_reflection_limit(
         self,
         user_id: str,
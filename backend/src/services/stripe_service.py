@@ -9,40 +9,73 @@ Gère les interactions avec l'API Stripe :
 - Synchronisation des abonnements
 """
 
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
 from typing import Any
 
 import stripe
 
+from src.config.database import get_db_pool
 from src.config.logging_config import get_logger
 from src.config.settings import get_settings
 from src.repositories.user_repository import UserRepository
 
 logger = get_logger(__name__)
 
+# Âge maximal d'un webhook accepté (anti-rejeu)
+WEBHOOK_MAX_AGE_SECONDS = 300
+
+# Réservation directe d'un event (pool Postgres): TRUE si la ligne est
+# insérée, NULL si l'event existait déjà
+_CLAIM_EVENT_SQL = (
+    "INSERT INTO public.processed_webhook_events (event_id, event_type) "
+    "VALUES ($1, $2) ON CONFLICT (event_id) DO NOTHING RETURNING TRUE"
+)
+
+# Events traités par ce processus: event_id -> instant (time.monotonic).
+# Un event plus vieux que WEBHOOK_MAX_AGE_SECONDS est rejeté avant tout
+# contrôle de rejeu: inutile de le retenir plus longtemps.
+_recent_event_ids: OrderedDict[str, float] = OrderedDict()
+
+
+def _remember_processed_event(event_id: str) -> None:
+    """Retient un event traité et oublie ceux sortis de la fenêtre anti-rejeu."""
+    now = time.monotonic()
+    while _recent_event_ids:
+        oldest_id, seen_at = next(iter(_recent_event_ids.items()))
+        if now - seen_at <= WEBHOOK_MAX_AGE_SECONDS:
+            break
+        del _recent_event_ids[oldest_id]
+    _recent_event_ids[event_id] = now
+
 
 class StripeService:
     def __init__(self):
         settings = get_settings()
         stripe.api_key = settings.stripe_secret_key
         self.webhook_secret = settings.stripe_webhook_secret
+        # HMAC-SHA256 pré-initialisé avec le secret: copié à chaque webhook
+        # au lieu de re-dériver la clé (ipad/opad) à chaque vérification
+        self._signing_mac = hmac.new(self.webhook_secret.encode("utf-8"), digestmod=hashlib.sha256)
         self.user_repo = UserRepository()
         self.frontend_url = settings.frontend_url
+        # Price IDs lus une fois (les settings ne changent pas à chaud)
+        self._price_ids = (settings.stripe_price_pro_monthly, settings.stripe_price_pro_yearly)
 
     async def create_checkout_session(self, user_id: str, plan_type: str) -> str:
         """
         Crée une session Stripe Checkout pour un utilisateur.
         """
-        settings = get_settings()
         user = self.user_repo.get_by_id(user_id)
         if not user:
             raise ValueError("Utilisateur non trouvé")
 
         # Déterminer le Price ID
-        price_id = (
-            settings.stripe_price_pro_monthly
-            if plan_type == "monthly"
-            else settings.stripe_price_pro_yearly
-        )
+        monthly_price_id, yearly_price_id = self._price_ids
+        price_id = monthly_price_id if plan_type == "monthly" else yearly_price_id
 
         try:
             session = stripe.checkout.Session.create(
@@ -97,14 +130,16 @@ class StripeService:
         Traite les événements envoyés par Stripe.
 
         Sécurité anti-rejeu:
-        - Vérifie que l'event n'a pas déjà été traité
         - Vérifie que l'event n'est pas trop vieux (> 5 minutes)
-        - Enregistre l'event_id après traitement réussi
+        - Réserve atomiquement l'event_id (rejet si déjà traité)
+        - Libère la réservation si le traitement échoue
         """
-        import time
+        # Une seule lecture de l'horloge pour tous les contrôles d'âge
+        now = int(time.time())
 
         try:
-            event = stripe.Webhook.construct_event(payload, sig_header, self.webhook_secret)
+            self._verify_signature(payload, sig_header, now)
+            event = json.loads(payload)
         except ValueError:
             logger.warning("Webhook: Invalid payload")
             return False
@@ -116,18 +151,19 @@ class StripeService:
         event_type = event.get("type")
         event_created = event.get("created", 0)
 
-        # Vérification 1: Event trop vieux (> 5 minutes = 300 secondes)
-        current_time = int(time.time())
-        if current_time - event_created > 300:
+        # Vérification 1: Event trop vieux (> 5 minutes = 300 secondes),
+        # avant tout aller-retour DB
+        event_age = now - event_created
+        if event_age > WEBHOOK_MAX_AGE_SECONDS:
             logger.warning(
                 "Webhook rejected: Event too old",
                 event_id=event_id,
-                event_age_seconds=current_time - event_created,
+                event_age_seconds=event_age,
             )
             return False
 
-        # Vérification 2: Event déjà traité (anti-rejeu)
-        if self._is_event_already_processed(event_id):
+        # Vérification 2: Réserver l'event (anti-rejeu, un seul aller-retour DB)
+        if not await self._try_claim_event(event_id, event_type):
             logger.warning(
                 "Webhook rejected: Replay attack detected", event_id=event_id, event_type=event_type
             )
@@ -145,8 +181,7 @@ class StripeService:
                 subscription = event["data"]["object"]
                 await self._handle_subscription_deleted(subscription)
 
-            # Enregistrer l'event comme traité
-            self._mark_event_as_processed(event_id, event_type)
+            _remember_processed_event(event_id)
 
             logger.info("Webhook processed successfully", event_id=event_id, event_type=event_type)
             return True
@@ -155,35 +190,114 @@ class StripeService:
             logger.error(
                 "Webhook processing error", event_id=event_id, event_type=event_type, error=str(e)
             )
-            # Ne pas marquer comme traité en cas d'erreur pour permettre un retry
+            # Libérer la réservation pour permettre un retry de Stripe
+            self._release_event(event_id)
             return False
 
-    def _is_event_already_processed(self, event_id: str) -> bool:
-        """Vérifie si un event a déjà été traité."""
+    def _verify_signature(
+        self, payload: bytes, sig_header: str | None, now: int | None = None
+    ) -> None:
+        """
+        Vérifie la signature Stripe d'un webhook (schéma v1).
+
+        Même contrôle que stripe.Webhook.construct_event: HMAC-SHA256 de
+        "{timestamp}.{payload}", comparaison en temps constant avec l'une
+        des signatures v1, puis tolérance sur le timestamp.
+
+        Args:
+            payload: Corps brut de la requête.
+            sig_header: En-tête Stripe-Signature ("t=...,v1=...").
+            now: Horodatage courant (time.time() par défaut).
+
+        Raises:
+            stripe.error.SignatureVerificationError: Signature absente,
+                invalide ou trop ancienne.
+        """
+        if not self.webhook_secret:
+            raise stripe.error.SignatureVerificationError(
+                "Webhook secret not configured", sig_header, payload
+            )
+
+        timestamp = None
+        signatures = []
+        for item in (sig_header or "").split(","):
+            key, _, value = item.strip().partition("=")
+            if key == "t":
+                timestamp = value
+            elif key == "v1":
+                signatures.append(value)
+
+        if not timestamp or not signatures:
+            raise stripe.error.SignatureVerificationError(
+                "Unable to extract timestamp and signatures from header", sig_header, payload
+            )
+
+        mac = self._signing_mac.copy()
+        mac.update(timestamp.encode("utf-8") + b".")
+        mac.update(payload.encode("utf-8") if isinstance(payload, str) else payload)
+        expected = mac.hexdigest()
+
+        if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+            raise stripe.error.SignatureVerificationError(
+                "No signatures found matching the expected signature for payload",
+                sig_header,
+                payload,
+            )
+
         try:
-            result = (
-                self.user_repo.client.table("processed_webhook_events")
-                .select("event_id")
-                .eq("event_id", event_id)
-                .execute()
+            signed_at = int(timestamp)
+        except ValueError:
+            raise stripe.error.SignatureVerificationError(
+                "Invalid timestamp in header", sig_header, payload
+            ) from None
+
+        if now is None:
+            now = int(time.time())
+        if now - signed_at > WEBHOOK_MAX_AGE_SECONDS:
+            raise stripe.error.SignatureVerificationError(
+                "Timestamp outside the tolerance zone", sig_header, payload
             )
-            return len(result.data) > 0
+
+    async def _try_claim_event(self, event_id: str, event_type: str) -> bool:
+        """
+        Réserve un event avant son traitement.
+
+        INSERT ... ON CONFLICT DO NOTHING: un seul aller-retour, atomique.
+        Passe par le pool Postgres s'il est configuré, sinon par la
+        fonction SQL claim_webhook_event via l'API Supabase.
+
+        Returns:
+            True si l'event est nouveau, False s'il a déjà été traité.
+        """
+        # Rejeu d'un event traité par ce processus: pas d'aller-retour DB
+        if event_id in _recent_event_ids:
+            return False
+
+        try:
+            pool = await get_db_pool()
+            if pool is not None:
+                claimed = await pool.fetchval(_CLAIM_EVENT_SQL, event_id, event_type)
+                return claimed is True
+
+            result = self.user_repo.client.rpc(
+                "claim_webhook_event",
+                {"p_event_id": event_id, "p_event_type": event_type},
+            ).execute()
+            return result.data is True
         except Exception as e:
-            logger.error("Error checking webhook event", error=str(e))
+            logger.error("Error claiming webhook event", error=str(e))
             # En cas d'erreur DB, on refuse par précaution
-            return True
+            return False
 
-    def _mark_event_as_processed(self, event_id: str, event_type: str) -> None:
-        """Enregistre un event comme traité."""
+    def _release_event(self, event_id: str) -> None:
+        """Supprime la réservation d'un event dont le traitement a échoué."""
         try:
-            self.user_repo.client.table("processed_webhook_events").insert(
-                {"event_id": event_id, "event_type": event_type}
+            self.user_repo.client.table("processed_webhook_events").delete().eq(
+                "event_id", event_id
             ).execute()
         except Exception as e:
-            # Log mais ne pas échouer - l'event est déjà traité
-            logger.warning(
-                "Failed to mark webhook event as processed", event_id=event_id, error=str(e)
-            )
+            # Sans libération, Stripe verra ses retries rejetés comme rejeux
+            logger.error("Failed to release webhook event", event_id=event_id, error=str(e))
 
     async def _handle_checkout_completed(self, session: Any):
         user_id = session.get("client_reference_id")
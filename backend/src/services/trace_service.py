@@ -6,20 +6,59 @@ Service pour monitorer et tracer les requêtes d'agent en temps réel.
 Stocke l'historique des requêtes, des routages et des performances.
 """
 
+import asyncio
+import json
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
-from supabase import create_client
-
+from src.config.database import get_db_pool
 from src.config.logging_config import get_logger
-from src.config.settings import get_settings
+from src.repositories.base import get_supabase_client
 
 logger = get_logger(__name__)
 
-
-@dataclass
+# Écritures groupées: une insertion par lot plutôt qu'une par appel LLM
+TRACE_BATCH_SIZE = 100
+TRACE_FLUSH_INTERVAL_SECONDS = 1.0
+
+# Longueur maximale du query_preview stocké (suffixe "..." inclus)
+QUERY_PREVIEW_MAX_CHARS = 200
+_QUERY_PREVIEW_CUT = QUERY_PREVIEW_MAX_CHARS - 3
+
+# Colonnes de agent_traces, dans l'ordre des paramètres SQL
+TRACE_COLUMNS = (
+    "user_id",
+    "agent_id",
+    "api_key_id",
+    "model_used",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_cost_cents",
+    "latency_ms",
+    "query_preview",
+    "status",
+    "error_message",
+    "error_code",
+    "routing_decision",
+    "sources_count",
+)
+_JSONB_COLUMNS = frozenset({"routing_decision"})
+
+# Insertion directe via asyncpg (routing_decision est passé en JSON texte)
+_TRACE_INSERT_SQL = "INSERT INTO public.agent_traces ({}) VALUES ({})".format(
+    ", ".join(TRACE_COLUMNS),
+    ", ".join(
+        f"${i}::jsonb" if column in _JSONB_COLUMNS else f"${i}"
+        for i, column in enumerate(TRACE_COLUMNS, start=1)
+    ),
+)
+
+
+@dataclass(slots=True)
 class TraceData:
-    """Données d'une trace LLM."""
+    """Données d'une trace LLM (slots: une instance par appel LLM)."""
 
     user_id: str
     model_used: str
@@ -58,6 +97,37 @@ MODEL_COSTS: dict[str, tuple[float, float]] = {
 }
 
 
+# Coûts par défaut pour un modèle inconnu
+DEFAULT_MODEL_COSTS: tuple[float, float] = (0.2, 0.6)
+
+
+@lru_cache(maxsize=128)
+def _model_costs(model: str) -> tuple[float, float]:
+    """
+    Résout les coûts d'un modèle (recherche exacte, puis par préfixe).
+
+    Mis en cache: le nombre de modèles distincts est faible et la
+    résolution par préfixe parcourt toute la table.
+
+    Args:
+        model: Identifiant du modèle.
+
+    Returns:
+        Tuple (input_cost_per_1k, output_cost_per_1k).
+    """
+    model_lower = model.lower()
+    costs = MODEL_COSTS.get(model_lower)
+    if costs:
+        return costs
+
+    # Chercher par préfixe
+    for key, value in MODEL_COSTS.items():
+        if model_lower.startswith(key.split("-")[0]):
+            return value
+
+    return DEFAULT_MODEL_COSTS
+
+
 def estimate_cost_cents(model: str, prompt_tokens: int, completion_tokens: int) -> float:
     """
     Estime le coût d'une requête LLM en centimes.
@@ -70,87 +140,186 @@ def estimate_cost_cents(model: str, prompt_tokens: int, completion_tokens: int)
     Returns:
         Coût estimé en centimes.
     """
-    # Trouver le modèle correspondant
-    model_lower = model.lower()
-    costs = MODEL_COSTS.get(model_lower)
+    input_cost, output_cost = _model_costs(model)
+    return (prompt_tokens * input_cost + completion_tokens * output_cost) / 1000.0
 
-    if not costs:
-        # Chercher par préfixe
-        for key, value in MODEL_COSTS.items():
-            if model_lower.startswith(key.split("-")[0]):
-                costs = value
-                break
 
-        # Default si non trouvé
-        if not costs:
-            costs = (0.2, 0.6)
+class TraceService:
+    """
+    Service pour enregistrer les traces d'exécution LLM.
 
-    input_cost, output_cost = costs
-    return (prompt_tokens / 1000.0 * input_cost) + (completion_tokens / 1000.0 * output_cost)
+    Les traces sont accumulées en mémoire puis insérées par lots de
+    TRACE_BATCH_SIZE lignes, ou toutes les TRACE_FLUSH_INTERVAL_SECONDS
+    secondes par une tâche de fond. Hors boucle asyncio (scripts,
+    workers synchrones), chaque trace est écrite immédiatement.
+    """
 
+    def __init__(self):
+        self._client = get_supabase_client()
+        self._buffer: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_task: asyncio.Task | None = None
+        # Références fortes vers les flushs déclenchés par taille de lot
+        self._pending_flushes: set[asyncio.Task] = set()
+
+    def log_trace(self, trace: TraceData) -> None:
+        """
+        Ajoute une trace au lot en attente d'insertion.
 
-class TraceService:
-    """Service pour enregistrer les traces d'exécution LLM."""
+        L'insertion est asynchrone: l'ID de la trace n'est pas connu
+        au moment de l'appel.
 
-    def __init__(self):
-        settings = get_settings()
-        self._client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_role_key,
-        )
+        Args:
+            trace: Données de la trace.
+        """
+        try:
+            row = self._build_row(trace)
+        except Exception as e:
+            logger.error("Failed to log trace", error=str(e))
+            return
 
-    def log_trace(self, trace: TraceData) -> str | None:
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= TRACE_BATCH_SIZE
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Pas de boucle: aucun flush périodique possible, écrire tout de suite
+            self._write_rows(self._drain())
+            return
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._periodic_flush())
+
+        if full:
+            task = loop.create_task(self.flush())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+
+    async def flush(self) -> int:
         """
-        Enregistre une trace dans la base de données.
+        Insère immédiatement les traces en attente.
+
+        Returns:
+            Nombre de traces insérées.
+        """
+        rows = self._drain()
+        if not rows:
+            return 0
+
+        # Connexion Postgres directe si configurée
+        pool = await get_db_pool()
+        if pool is not None:
+            return await self._write_rows_pg(pool, rows)
+
+        # Le client Supabase est synchrone: ne pas bloquer la boucle
+        return await asyncio.to_thread(self._write_rows, rows)
+
+    async def aclose(self) -> None:
+        """
+        Arrête le flush périodique et insère les traces restantes.
+
+        Les flushs déclenchés par taille de lot ont déjà retiré leurs
+        lignes du buffer: ils sont attendus avant le flush final.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes, return_exceptions=True)
+        await self.flush()
+
+    async def _periodic_flush(self) -> None:
+        """Tâche de fond: vide le lot à intervalle régulier."""
+        while True:
+            await asyncio.sleep(TRACE_FLUSH_INTERVAL_SECONDS)
+            await self.flush()
+
+    def _drain(self) -> list[dict[str, Any]]:
+        """Retire et retourne les traces en attente."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        return rows
+
+    def _write_rows(self, rows: list[dict[str, Any]]) -> int:
+        """
+        Insère un lot de traces en une seule requête.
 
         Args:
-            trace: Données de la trace.
+            rows: Lignes à insérer.
 
         Returns:
-            ID de la trace créée ou None en cas d'erreur.
+            Nombre de traces insérées (0 en cas d'erreur).
         """
+        if not rows:
+            return 0
         try:
-            # Calculer le coût
-            cost_cents = estimate_cost_cents(
-                trace.model_used, trace.prompt_tokens, trace.completion_tokens
-            )
+            self._client.table("agent_traces").insert(rows).execute()
+            return len(rows)
+        except Exception as e:
+            logger.error("Failed to log traces", count=len(rows), error=str(e))
+            return 0
 
-            # Préparer le query_preview (max 200 caractères)
-            query_preview = trace.query_preview
-            if query_preview and len(query_preview) > 200:
-                query_preview = query_preview[:197] + "..."
-
-            # Insérer la trace
-            result = (
-                self._client.table("agent_traces")
-                .insert(
-                    {
-                        "user_id": trace.user_id,
-                        "agent_id": trace.agent_id,
-                        "api_key_id": trace.api_key_id,
-                        "model_used": trace.model_used,
-                        "prompt_tokens": trace.prompt_tokens,
-                        "completion_tokens": trace.completion_tokens,
-                        "total_cost_cents": cost_cents,
-                        "latency_ms": trace.latency_ms,
-                        "query_preview": query_preview,
-                        "status": trace.status,
-                        "error_message": trace.error_message,
-                        "error_code": trace.error_code,
-                        "routing_decision": trace.routing_decision,
-                        "sources_count": trace.sources_count,
-                    }
-                )
-                .execute()
-            )
+    @staticmethod
+    async def _write_rows_pg(pool: Any, rows: list[dict[str, Any]]) -> int:
+        """
+        Insère un lot de traces via le pool asyncpg.
 
-            if result.data:
-                return result.data[0].get("id")
-            return None
+        Args:
+            pool: Pool asyncpg.
+            rows: Lignes à insérer.
 
+        Returns:
+            Nombre de traces insérées (0 en cas d'erreur).
+        """
+        records = [
+            tuple(
+                (
+                    json.dumps(row[column])
+                    if column in _JSONB_COLUMNS and row[column] is not None
+                    else row[column]
+                )
+                for column in TRACE_COLUMNS
+            )
+            for row in rows
+        ]
+        try:
+            await pool.executemany(_TRACE_INSERT_SQL, records)
+            return len(records)
         except Exception as e:
-            logger.error("Failed to log trace", error=str(e))
-            return None
+            logger.error("Failed to log traces", count=len(records), error=str(e))
+            return 0
+
+    @staticmethod
+    def _build_row(trace: TraceData) -> dict[str, Any]:
+        """Convertit une trace en ligne de la table agent_traces."""
+        # Calculer le coût
+        cost_cents = estimate_cost_cents(
+            trace.model_used, trace.prompt_tokens, trace.completion_tokens
+        )
+
+        # Préparer le query_preview (tronqué à QUERY_PREVIEW_MAX_CHARS)
+        query_preview = trace.query_preview
+        if query_preview and len(query_preview) > QUERY_PREVIEW_MAX_CHARS:
+            query_preview = query_preview[:_QUERY_PREVIEW_CUT] + "..."
+
+        return {
+            "user_id": trace.user_id,
+            "agent_id": trace.agent_id,
+            "api_key_id": trace.api_key_id,
+            "model_used": trace.model_used,
+            "prompt_tokens": trace.prompt_tokens,
+            "completion_tokens": trace.completion_tokens,
+            "total_cost_cents": cost_cents,
+            "latency_ms": trace.latency_ms,
+            "query_preview": query_preview,
+            "status": trace.status,
+            "error_message": trace.error_message,
+            "error_code": trace.error_code,
+            "routing_decision": trace.routing_decision,
+            "sources_count": trace.sources_count,
+        }
 
     def log_success(
         self,
@@ -164,9 +333,9 @@ class TraceService:
         api_key_id: str | None = None,
         routing_decision: dict | None = None,
         sources_count: int = 0,
-    ) -> str | None:
+    ) -> None:
         """Raccourci pour logger une trace de succès."""
-        return self.log_trace(
+        self.log_trace(
             TraceData(
                 user_id=user_id,
                 model_used=model_used,
@@ -192,9 +361,9 @@ class TraceService:
         query_preview: str | None = None,
         agent_id: str | None = None,
         api_key_id: str | None = None,
-    ) -> str | None:
+    ) -> None:
         """Raccourci pour logger une trace d'erreur."""
-        return self.log_trace(
+        self.log_trace(
             TraceData(
                 user_id=user_id,
                 model_used=model_used,
@@ -216,9 +385,9 @@ class TraceService:
         query_preview: str | None = None,
         agent_id: str | None = None,
         api_key_id: str | None = None,
-    ) -> str | None:
+    ) -> None:
         """Raccourci pour logger une trace de timeout."""
-        return self.log_trace(
+        self.log_trace(
             TraceData(
                 user_id=user_id,
                 model_used=model_used,
@@ -238,9 +407,9 @@ class TraceService:
         query_preview: str | None = None,
         agent_id: str | None = None,
         api_key_id: str | None = None,
-    ) -> str | None:
+    ) -> None:
         """Raccourci pour logger une trace de rate limiting."""
-        return self.log_trace(
+        self.log_trace(
             TraceData(
                 user_id=user_id,
                 model_used=model_used,
@@ -263,3 +432,11 @@ def get_trace_service() -> TraceService:
     if _trace_service is None:
         _trace_service = TraceService()
     return _trace_service
+
+
+async def close_trace_service() -> None:
+    """Insère les traces en attente et arrête le flush périodique."""
+    global _trace_service
+    if _trace_service is not None:
+        await _trace_service.aclose()
+        _trace_service = None
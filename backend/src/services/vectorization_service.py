@@ -6,6 +6,9 @@ Service d'ingestion pour transformer les données en embeddings
 et les stocker dans Supabase.
 """
 
+import asyncio
+import itertools
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 from src.config.logging_config import LoggerMixin
@@ -14,6 +17,18 @@ from src.providers.base import BaseProvider
 from src.repositories.document_repository import DocumentRepository
 from src.services.embedding_service import EmbeddingService
 
+# Documents par lot: un SELECT des hashes, un appel embed_batch (max 25
+# textes côté Mistral) et un INSERT par lot
+INGEST_BATCH_SIZE = 25
+
+# Lots vectorisés simultanément (appels embedding I/O-bound)
+INGEST_CONCURRENCY = 4
+
+# Résultat de l'ingestion d'un document
+_CREATED = "created"
+_SKIPPED = "skipped"
+_ERROR = "error"
+
 
 @dataclass
 class IngestionStats:
@@ -24,6 +39,15 @@ class IngestionStats:
     total_skipped: int = 0
     total_errors: int = 0
 
+    def add(self, outcome: str) -> None:
+        """Comptabilise le résultat d'un document."""
+        if outcome == _CREATED:
+            self.total_created += 1
+        elif outcome == _SKIPPED:
+            self.total_skipped += 1
+        else:
+            self.total_errors += 1
+
 
 class VectorizationService(LoggerMixin):
     """
@@ -44,14 +68,55 @@ class VectorizationService(LoggerMixin):
         sources: list[str],
         skip_duplicates: bool = True,
         user_id: str | None = None,
+    ) -> IngestionStats:
+        """
+        Ingère des documents depuis un provider (version synchrone).
+
+        À appeler hors boucle asyncio (CLI, workers): depuis du code
+        asynchrone, utiliser ingest_from_provider_async.
+
+        Args:
+            provider: Provider de données à utiliser.
+            sources: Liste des sources à extraire.
+            skip_duplicates: Ignorer les documents déjà présents.
+
+        Returns:
+            Statistiques d'ingestion.
+        """
+        return asyncio.run(
+            self.ingest_from_provider_async(
+                provider,
+                sources,
+                skip_duplicates=skip_duplicates,
+                user_id=user_id,
+            )
+        )
+
+    async def ingest_from_provider_async(
+        self,
+        provider: BaseProvider,
+        sources: list[str],
+        skip_duplicates: bool = True,
+        user_id: str | None = None,
+        concurrency: int = INGEST_CONCURRENCY,
+        batch_size: int = INGEST_BATCH_SIZE,
     ) -> IngestionStats:
         """
         Ingère des documents depuis un provider.
 
+        L'extraction (itérateur synchrone du provider) et le traitement
+        des lots tournent dans des threads: les lots déjà extraits sont
+        vectorisés pendant que le provider lit le lot suivant, avec au
+        plus `concurrency` lots en vol. Chaque lot coûte une requête de
+        déduplication, un appel embed_batch et un INSERT.
+
         Args:
             provider: Provider de données à utiliser.
             sources: Liste des sources à extraire.
             skip_duplicates: Ignorer les documents déjà présents.
+            user_id: Propriétaire des documents (multi-tenant).
+            concurrency: Nombre maximum de lots traités en parallèle.
+            batch_size: Nombre de documents par lot.
 
         Returns:
             Statistiques d'ingestion.
@@ -64,30 +129,37 @@ class VectorizationService(LoggerMixin):
             sources_count=len(sources),
         )
 
-        for doc in provider.extract_all(sources):
-            stats.total_processed += 1
-
-            try:
-                # Vérifier les doublons
-                if skip_duplicates and self._document_repo.exists_by_hash(doc.content):
-                    self.logger.debug("Duplicate skipped", source_id=doc.source_id)
-                    stats.total_skipped += 1
-                    continue
-
-                # Générer l'embedding
-                embedding = self._embedding_service.embed_text(doc.content)
-
-                # Stocker dans Supabase
-                self._document_repo.create_from_model(doc, embedding, user_id=user_id)
-                stats.total_created += 1
-
-            except Exception as e:
-                self.logger.error(
-                    "Ingestion error",
-                    source_id=doc.source_id,
-                    error=str(e),
-                )
-                stats.total_errors += 1
+        batch_size = max(1, batch_size)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        tasks: set[asyncio.Task] = set()
+
+        def record(task: asyncio.Task, size: int) -> None:
+            semaphore.release()
+            tasks.discard(task)
+            outcomes = [_ERROR] * size if task.cancelled() else task.result()
+            for outcome in outcomes:
+                stats.add(outcome)
+
+        documents = provider.extract_all(sources)
+        while True:
+            # Le lot suivant est extrait pendant le traitement des lots en
+            # vol; la contre-pression limite l'avance à un lot extrait
+            batch = await asyncio.to_thread(self._next_batch, documents, batch_size)
+            if not batch:
+                break
+            await semaphore.acquire()
+
+            stats.total_processed += len(batch)
+            task = asyncio.create_task(
+                asyncio.to_thread(self._ingest_batch, batch, skip_duplicates, user_id)
+            )
+            tasks.add(task)
+            task.add_done_callback(lambda t, size=len(batch): record(t, size))
+            if len(batch) < batch_size:
+                break
+
+        if tasks:
+            await asyncio.wait(tasks)
 
         self.logger.info(
             "Ingestion completed",
@@ -96,6 +168,101 @@ class VectorizationService(LoggerMixin):
 
         return stats
 
+    @staticmethod
+    def _next_batch(documents: Iterator[DocumentCreate], size: int) -> list[DocumentCreate]:
+        """Extrait jusqu'à `size` documents du provider."""
+        return list(itertools.islice(documents, size))
+
+    def _ingest_batch(
+        self,
+        docs: list[DocumentCreate],
+        skip_duplicates: bool,
+        user_id: str | None,
+    ) -> list[str]:
+        """
+        Déduplique, vectorise et stocke un lot de documents.
+
+        Les doublons internes au lot sont toujours ignorés (index unique
+        sur content_hash). Si une étape du lot échoue, les documents
+        restants sont repris un par un pour isoler l'erreur.
+
+        Returns:
+            Résultat par document: "created", "skipped" ou "error".
+        """
+        outcomes: list[str] = []
+        remaining = docs
+        try:
+            hashes = [Document.compute_hash(doc.content) for doc in docs]
+            seen = self._document_repo.get_existing_hashes(hashes) if skip_duplicates else set()
+
+            pending: list[DocumentCreate] = []
+            pending_hashes: list[str] = []
+            for doc, content_hash in zip(docs, hashes, strict=True):
+                if content_hash in seen:
+                    outcomes.append(_SKIPPED)
+                    continue
+                seen.add(content_hash)
+                pending.append(doc)
+                pending_hashes.append(content_hash)
+            remaining = pending
+
+            if pending:
+                embeddings = self._embedding_service.embed_batch([doc.content for doc in pending])
+                self._document_repo.bulk_create_from_models(
+                    pending, embeddings, user_id=user_id, content_hashes=pending_hashes
+                )
+            return outcomes + [_CREATED] * len(pending)
+
+        except Exception as e:
+            self.logger.warning(
+                "Batch ingestion failed, retrying documents one by one",
+                batch_size=len(remaining),
+                error=str(e),
+            )
+            return outcomes + [
+                self._ingest_document(doc, skip_duplicates, user_id) for doc in remaining
+            ]
+
+    def _ingest_document(
+        self,
+        doc: DocumentCreate,
+        skip_duplicates: bool,
+        user_id: str | None,
+    ) -> str:
+        """
+        Vérifie, vectorise et stocke un document.
+
+        Returns:
+            Résultat: "created", "skipped" ou "error".
+        """
+        try:
+            # Hash calculé une fois: déduplication et stockage
+            content_hash = Document.compute_hash(doc.content)
+
+            # Vérifier les doublons
+            if skip_duplicates and self._document_repo.exists_by_hash(
+                doc.content, content_hash=content_hash
+            ):
+                self.logger.debug("Duplicate skipped", source_id=doc.source_id)
+                return _SKIPPED
+
+            # Générer l'embedding
+            embedding = self._embedding_service.embed_text(doc.content)
+
+            # Stocker dans Supabase
+            self._document_repo.create_from_model(
+                doc, embedding, user_id=user_id, content_hash=content_hash
+            )
+            return _CREATED
+
+        except Exception as e:
+            self.logger.error(
+                "Ingestion error",
+                source_id=doc.source_id,
+                error=str(e),
+            )
+            return _ERROR
+
     def ingest_documents(
         self,
         documents: list[DocumentCreate],
@@ -103,7 +270,7 @@ class VectorizationService(LoggerMixin):
         user_id: str | None = None,
     ) -> IngestionStats:
         """
-        Ingère une liste de documents.
+        Ingère une liste de documents, par lots de INGEST_BATCH_SIZE.
 
         Args:
             documents: Documents à ingérer.
@@ -114,21 +281,12 @@ class VectorizationService(LoggerMixin):
         """
         stats = IngestionStats()
 
-        for doc in documents:
-            stats.total_processed += 1
+        for i in range(0, len(documents), INGEST_BATCH_SIZE):
+            batch = documents[i : i + INGEST_BATCH_SIZE]
+            stats.total_processed += len(batch)
 
-            try:
-                if skip_duplicates and self._document_repo.exists_by_hash(doc.content):
-                    stats.total_skipped += 1
-                    continue
-
-                embedding = self._embedding_service.embed_text(doc.content)
-                self._document_repo.create_from_model(doc, embedding, user_id=user_id)
-                stats.total_created += 1
-
-            except Exception as e:
-                self.logger.error("Error", source_id=doc.source_id, error=str(e))
-                stats.total_errors += 1
+            for outcome in self._ingest_batch(batch, skip_duplicates, user_id):
+                stats.add(outcome)
 
         return stats
 
@@ -153,8 +311,9 @@ class VectorizationService(LoggerMixin):
             Document créé ou None si erreur.
         """
         try:
-            # Vérifier les doublons
-            if self._document_repo.exists_by_hash(content):
+            # Vérifier les doublons (hash réutilisé à l'insertion)
+            content_hash = Document.compute_hash(content)
+            if self._document_repo.exists_by_hash(content, content_hash=content_hash):
                 self.logger.info("Document already exists", source_id=source_id)
                 return None
 
@@ -168,6 +327,7 @@ class VectorizationService(LoggerMixin):
                 "source_type": source_type,
                 "source_id": source_id,
                 "metadata": metadata or {},
+                "content_hash": content_hash,
             }
             if user_id:
                 data["user_id"] = user_id
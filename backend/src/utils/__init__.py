@@ -5,6 +5,7 @@ Utils Package
 Utilitaires partagés pour le backend.
 """
 
+from src.utils.background_loop import get_background_loop
 from src.utils.prompt_sanitizer import (
     check_prompt_complexity,
     detect_injection_attempt,
@@ -13,6 +14,7 @@ from src.utils.prompt_sanitizer import (
     validate_prompt_length,
     validate_system_prompt,
 )
+from src.utils.vectors import l2_normalize, to_pgvector
 
 __all__ = [
     "sanitize_system_prompt",
@@ -21,4 +23,7 @@ __all__ = [
     "validate_system_prompt",
     "estimate_prompt_tokens",
     "check_prompt_complexity",
+    "l2_normalize",
+    "get_background_loop",
+    "to_pgvector",
 ]
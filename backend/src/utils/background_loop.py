@@ -0,0 +1,46 @@
+"""
+Background Event Loop
+======================
+
+Boucle d'événements d'arrière-plan partagée par les API synchrones
+(RAGEngine.query, PerplexityAgent.search_sync).
+
+Les coroutines y sont soumises avec asyncio.run_coroutine_threadsafe:
+la boucle (et les pools de connexions HTTP liés à elle) survit d'un
+appel à l'autre, au lieu d'une nouvelle boucle par appel.
+"""
+
+import asyncio
+import threading
+
+try:
+    import uvloop  # installé avec uvicorn[standard] (hors Windows)
+except ImportError:
+    uvloop = None
+
+# Boucle dédiée aux appels synchrones, démarrée à la demande
+_background_loop: asyncio.AbstractEventLoop | None = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Retourne la boucle d'événements d'arrière-plan.
+
+    La boucle tourne dans un thread daemon: les appels synchrones y sont
+    exécutés sans bloquer (ni réutiliser) la boucle de l'appelant.
+
+    Returns:
+        Boucle d'événements partagée.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever,
+                name="background-loop",
+                daemon=True,
+            ).start()
+            _background_loop = loop
+    return _background_loop
@@ -13,10 +13,20 @@ Métriques disponibles:
 - circuit_breaker_state: État des circuit breakers
 - rag_searches_total: Nombre de recherches RAG
 - documents_ingested_total: Documents ingérés
+- embedding_texts_total: Textes vectorisés ou dédupliqués dans un batch
 """
 
+import re
+
 from prometheus_client import Counter, Gauge, Histogram, Info
 
+# Regex de normalisation des endpoints (compilées une seule fois)
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    re.IGNORECASE,
+)
+_NUM_RE = re.compile(r"/\d+")
+
 # ==============================================
 # API Metrics
 # ==============================================
@@ -126,6 +136,16 @@ ingestion_duration = Histogram(
     buckets=[1.0, 5.0, 10.0, 30.0, 60.0, 120.0],
 )
 
+# ==============================================
+# Embedding Metrics
+# ==============================================
+
+embedding_texts_total = Counter(
+    "embedding_texts_total",
+    "Texts passed to embed_batch",
+    ["result"],  # embedded, deduplicated
+)
+
 # ==============================================
 # Rate Limiting Metrics
 # ==============================================
@@ -229,22 +249,22 @@ def record_rag_search(intent: str, success: bool, duration: float, docs_count: i
     rag_documents_retrieved.labels(intent=intent).observe(docs_count)
 
 
+def record_embedding_batch(total: int, unique: int) -> None:
+    """Record texts embedded vs. served by in-batch deduplication."""
+    embedding_texts_total.labels(result="embedded").inc(unique)
+    if total > unique:
+        embedding_texts_total.labels(result="deduplicated").inc(total - unique)
+
+
 def _normalize_endpoint(endpoint: str) -> str:
     """Normalize endpoint to reduce cardinality.
 
     Replaces UUIDs and numeric IDs with placeholders.
     """
-    import re
-
     # Replace UUIDs
-    endpoint = re.sub(
-        r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
-        "{id}",
-        endpoint,
-        flags=re.IGNORECASE,
-    )
+    endpoint = _UUID_RE.sub("{id}", endpoint)
 
     # Replace numeric IDs
-    endpoint = re.sub(r"/\d+", "/{id}", endpoint)
+    endpoint = _NUM_RE.sub("/{id}", endpoint)
 
     return endpoint
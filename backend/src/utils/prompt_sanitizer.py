@@ -7,6 +7,13 @@ pour prévenir les attaques par injection.
 """
 
 import re
+import threading
+from functools import lru_cache
+
+try:
+    import hyperscan
+except ImportError:  # Dépendance optionnelle: fallback sur re
+    hyperscan = None
 
 # Patterns dangereux à bloquer
 DANGEROUS_PATTERNS = [
@@ -43,6 +50,97 @@ SUSPICIOUS_KEYWORDS = [
 ]
 
 
+def _scoped(pattern: str) -> str:
+    """Convertit un flag (?i) global en groupe scopé, utilisable dans une alternance."""
+    if pattern.startswith("(?i)"):
+        return f"(?i:{pattern[4:]})"
+    return f"(?:{pattern})"
+
+
+# Alternance unique de tous les patterns dangereux (un seul passage sur le prompt)
+_DANGEROUS_RE = re.compile("|".join(_scoped(p) for p in DANGEROUS_PATTERNS))
+_DANGEROUS_COMPILED = [(p, re.compile(p)) for p in DANGEROUS_PATTERNS]
+
+
+def _build_hyperscan_db():
+    """
+    Compile DANGEROUS_PATTERNS en une base Hyperscan (scan multi-patterns).
+
+    Returns:
+        Base compilée, ou None si hyperscan est absent ou refuse un pattern.
+    """
+    if hyperscan is None:
+        return None
+
+    expressions, flags = [], []
+    for pattern in DANGEROUS_PATTERNS:
+        flag = hyperscan.HS_FLAG_SINGLEMATCH
+        if pattern.startswith("(?i)"):
+            pattern = pattern[4:]
+            flag |= hyperscan.HS_FLAG_CASELESS
+        expressions.append(pattern.encode("ascii"))
+        flags.append(flag)
+
+    database = hyperscan.Database()
+    try:
+        database.compile(expressions=expressions, ids=list(range(len(expressions))), flags=flags)
+    except hyperscan.HyperscanError:
+        return None
+    return database
+
+
+_HS_DATABASE = _build_hyperscan_db()
+# Scratch Hyperscan: un par thread (un scratch ne supporte pas les scans concurrents)
+_HS_LOCAL = threading.local()
+
+
+def _stop_on_first_match(pattern_id, start, end, flags, context) -> bool:
+    """Callback Hyperscan: interrompt le scan au premier match."""
+    return True
+
+
+def _has_dangerous_pattern(prompt: str) -> bool:
+    """
+    Indique si le prompt contient au moins un pattern dangereux.
+
+    Hyperscan n'est utilisé que pour les prompts ASCII: au-delà, sa gestion
+    de la casse et des espaces Unicode diffère de `re`, qui reste la référence.
+    """
+    if _HS_DATABASE is None or not prompt.isascii():
+        return _DANGEROUS_RE.search(prompt) is not None
+
+    scratch = getattr(_HS_LOCAL, "scratch", None)
+    if scratch is None:
+        scratch = _HS_LOCAL.scratch = hyperscan.Scratch(_HS_DATABASE)
+    try:
+        _HS_DATABASE.scan(
+            prompt.encode("ascii"), match_event_handler=_stop_on_first_match, scratch=scratch
+        )
+    except hyperscan.ScanTerminated:
+        return True
+    return False
+
+
+_SUSPICIOUS_RE = re.compile("|".join(re.escape(kw.lower()) for kw in SUSPICIOUS_KEYWORDS))
+
+# Table str.translate: supprime les caractères de contrôle sauf \t, \n et \r
+_CONTROL_CHARS_TABLE = dict.fromkeys(
+    [c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D)] + [0x7F]
+)
+_SPACES_RE = re.compile(r"[ \t]+")
+_NEWLINES_RE = re.compile(r"\n{4,}")
+_SCRIPT_TAG_RE = re.compile(r"<script[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
+_JAVASCRIPT_URL_RE = re.compile(r"javascript\s*:", re.IGNORECASE)
+
+# Marqueurs littéraux de code (recherche par sous-chaîne, sans regex)
+_CODE_MARKERS = ("```", "def ", "class ", "function ", "const ", "let ", "var ")
+
+# Cache des prompts sanitizés (les prompts système d'un agent reviennent à chaque requête)
+SANITIZE_CACHE_SIZE = 1024
+SANITIZE_CACHE_MAX_CHARS = 8192
+VALIDATION_CACHE_SIZE = 2048
+
+
 def sanitize_system_prompt(prompt: str) -> str:
     """
     Sanitize un prompt système en supprimant les caractères dangereux.
@@ -56,20 +154,34 @@ def sanitize_system_prompt(prompt: str) -> str:
     if not prompt:
         return prompt
 
+    # Les prompts très longs ne sont pas mis en cache (mémoire bornée)
+    if len(prompt) > SANITIZE_CACHE_MAX_CHARS:
+        return _sanitize(prompt)
+    return _sanitize_cached(prompt)
+
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+def _sanitize_cached(prompt: str) -> str:
+    """Version mémoïsée de _sanitize (fonction pure)."""
+    return _sanitize(prompt)
+
+
+def _sanitize(prompt: str) -> str:
+    """Applique les passes de sanitization sur un prompt non vide."""
     # Supprimer les caractères de contrôle (sauf newline, tab)
-    sanitized = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", prompt)
+    sanitized = prompt.translate(_CONTROL_CHARS_TABLE)
 
     # Normaliser les espaces multiples
-    sanitized = re.sub(r"[ \t]+", " ", sanitized)
+    sanitized = _SPACES_RE.sub(" ", sanitized)
 
     # Limiter les newlines consécutifs
-    sanitized = re.sub(r"\n{4,}", "\n\n\n", sanitized)
+    sanitized = _NEWLINES_RE.sub("\n\n\n", sanitized)
 
     # Supprimer les balises script
-    sanitized = re.sub(r"<script[^>]*>.*?</script>", "", sanitized, flags=re.IGNORECASE | re.DOTALL)
+    sanitized = _SCRIPT_TAG_RE.sub("", sanitized)
 
-    # Supprimer les URLs javascript:
-    sanitized = re.sub(r"javascript\s*:", "", sanitized, flags=re.IGNORECASE)
+    # Supprimer les URLs javascript: (après les balises, qui peuvent en masquer une)
+    sanitized = _JAVASCRIPT_URL_RE.sub("", sanitized)
 
     return sanitized.strip()
 
@@ -88,10 +200,15 @@ def validate_prompt_length(prompt: str, max_length: int = 4000) -> tuple[bool, s
     if not prompt:
         return True, ""
 
-    if len(prompt) > max_length:
+    return _check_length(len(prompt), max_length)
+
+
+def _check_length(length: int, max_length: int) -> tuple[bool, str]:
+    """Valide une longueur déjà calculée (évite de recalculer len())."""
+    if length > max_length:
         return (
             False,
-            f"System prompt exceeds maximum length of {max_length} characters (got {len(prompt)})",
+            f"System prompt exceeds maximum length of {max_length} characters (got {length})",
         )
 
     return True, ""
@@ -111,21 +228,16 @@ def detect_injection_attempt(prompt: str) -> tuple[bool, str, list[str]]:
     if not prompt:
         return False, "", []
 
-    matched = []
-
-    # Vérifier les patterns dangereux
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, prompt):
-            matched.append(pattern)
-
-    if matched:
+    # Vérifier les patterns dangereux: un seul scan, le détail
+    # des patterns n'est calculé que si le prompt est suspect
+    if _has_dangerous_pattern(prompt):
+        matched = [pattern for pattern, regex in _DANGEROUS_COMPILED if regex.search(prompt)]
         return True, "blocked", matched
 
     # Vérifier les mots-clés suspects
     lower_prompt = prompt.lower()
-    suspicious_found = [kw for kw in SUSPICIOUS_KEYWORDS if kw.lower() in lower_prompt]
-
-    if suspicious_found:
+    if _SUSPICIOUS_RE.search(lower_prompt):
+        suspicious_found = [kw for kw in SUSPICIOUS_KEYWORDS if kw.lower() in lower_prompt]
         return True, "warning", suspicious_found
 
     return False, "", []
@@ -148,11 +260,26 @@ def validate_system_prompt(
     if not prompt:
         return True, None, ""
 
+    if len(prompt) > SANITIZE_CACHE_MAX_CHARS:
+        return _validate(prompt, max_length, block_injection)
+    return _validate_cached(prompt, max_length, block_injection)
+
+
+@lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def _validate_cached(
+    prompt: str, max_length: int, block_injection: bool
+) -> tuple[bool, str | None, str]:
+    """Version mémoïsée de _validate (résultat immuable)."""
+    return _validate(prompt, max_length, block_injection)
+
+
+def _validate(prompt: str, max_length: int, block_injection: bool) -> tuple[bool, str | None, str]:
+    """Pipeline de validation d'un prompt non vide."""
     # 1. Sanitization de base
     sanitized = sanitize_system_prompt(prompt)
 
     # 2. Validation longueur
-    valid, error = validate_prompt_length(sanitized, max_length)
+    valid, error = _check_length(len(sanitized), max_length)
     if not valid:
         return False, error, sanitized
 
@@ -185,8 +312,12 @@ def estimate_prompt_tokens(prompt: str) -> int:
     if not prompt:
         return 0
 
-    # Utiliser une moyenne de 3.5 caractères par token
-    return len(prompt) // 4 + 1
+    return _estimate_tokens_from_length(len(prompt))
+
+
+def _estimate_tokens_from_length(length: int) -> int:
+    """Estimation de tokens à partir d'une longueur déjà calculée (≈ 4 caractères/token)."""
+    return (length >> 2) + 1
 
 
 def check_prompt_complexity(prompt: str) -> dict:
@@ -213,8 +344,8 @@ def check_prompt_complexity(prompt: str) -> dict:
 
     length = len(prompt)
     newlines = prompt.count("\n")
-    has_code = bool(re.search(r"```|def |class |function |const |let |var ", prompt))
-    estimated_tokens = estimate_prompt_tokens(prompt)
+    has_code = any(marker in prompt for marker in _CODE_MARKERS)
+    estimated_tokens = _estimate_tokens_from_length(length)
 
     # Score de complexité
     score = 1
@@ -0,0 +1,63 @@
+"""
+Vector Utilities
+=================
+
+Opérations sur les vecteurs d'embedding.
+
+Les embeddings sont stockés normalisés (norme L2 = 1): la similarité
+cosinus se réduit alors à un produit scalaire.
+"""
+
+import json
+from collections.abc import Sequence
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle: fallback sur json
+    orjson = None
+
+
+def _unit(vector: Sequence[float] | np.ndarray) -> np.ndarray:
+    """Vecteur float32 de norme 1 (inchangé s'il est nul)."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    if norm > 0:
+        v = v / norm
+    return v
+
+
+def l2_normalize(vector: Sequence[float] | np.ndarray) -> list[float]:
+    """
+    Normalise un vecteur à la norme L2 unitaire.
+
+    Args:
+        vector: Vecteur d'embedding.
+
+    Returns:
+        Vecteur normalisé (inchangé s'il est nul).
+    """
+    return _unit(vector).tolist()
+
+
+def to_pgvector(vector: Sequence[float] | np.ndarray, normalize: bool = False) -> str:
+    """
+    Formate un vecteur au format texte de pgvector ("[x,y,...]").
+
+    PostgREST accepte ce texte pour un paramètre ou une colonne vector:
+    le client n'a plus à sérialiser 1024 floats Python avec json.dumps.
+    orjson écrit directement le tableau float32, environ 10 fois plus vite,
+    et la représentation float32 la plus courte réduit la requête de moitié.
+
+    Args:
+        vector: Vecteur d'embedding.
+        normalize: Normaliser le vecteur (norme L2 = 1) avant formatage.
+
+    Returns:
+        Littéral pgvector.
+    """
+    v = _unit(vector) if normalize else np.asarray(vector, dtype=np.float32)
+    if orjson is not None:
+        return orjson.dumps(v, option=orjson.OPT_SERIALIZE_NUMPY).decode("ascii")
+    return json.dumps(v.tolist(), separators=(",", ":"))
@@ -8,7 +8,8 @@ Ces tâches sont enqueued par l'API et exécutées par un worker séparé.
 Chaque tâche met à jour son statut pour permettre le polling côté frontend.
 """
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, replace
 from datetime import datetime
 from enum import Enum
 from typing import Any
@@ -19,6 +20,11 @@ from src.config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Clés de métadonnées ajoutées à chaque document ingéré (internées une fois)
+_K_APIK = sys.intern("api_key_id")
+_K_USER = sys.intern("user_id")
+_K_FILE = sys.intern("original_filename")
+
 
 class JobStatus(str, Enum):
     """Statuts possibles d'un job."""
@@ -74,6 +80,201 @@ def update_job_progress(
         job.save_meta()
 
 
+# ==============================================
+# Checkpoints de reprise
+# ==============================================
+
+# Fréquence des checkpoints (en documents) et durée de rétention
+_CHECKPOINT_EVERY = 25
+_CHECKPOINT_TTL = 86400
+
+
+def _checkpoint_key(job_id: str) -> str:
+    """Clé Redis du checkpoint d'un job d'ingestion."""
+    return f"ingest:{job_id}"
+
+
+def _read_checkpoint() -> int | None:
+    """
+    Lit le checkpoint du job courant (documents déjà stockés).
+
+    Returns:
+        Nombre de documents stockés lors d'une exécution précédente,
+        ou None si le job n'a jamais atteint l'étape de stockage.
+    """
+    job = get_current_job()
+    if not job:
+        return None
+
+    try:
+        value = job.connection.hget(_checkpoint_key(job.id), "checkpoint")
+        return int(value) if value is not None else None
+    except Exception as e:
+        logger.warning("Failed to read checkpoint", job_id=job.id, error=str(e))
+        return None
+
+
+def _save_checkpoint(stored_count: int) -> None:
+    """
+    Enregistre le checkpoint du job courant dans Redis.
+
+    Les documents en échec ne sont pas listés: absents de la base, ils
+    sont simplement ré-essayés lors de la reprise.
+
+    Args:
+        stored_count: Nombre total de documents stockés.
+    """
+    job = get_current_job()
+    if not job:
+        return
+
+    key = _checkpoint_key(job.id)
+    try:
+        pipe = job.connection.pipeline()
+        pipe.hset(key, "checkpoint", stored_count)
+        pipe.expire(key, _CHECKPOINT_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Failed to save checkpoint", job_id=job.id, error=str(e))
+
+
+def _skip_stored_documents(
+    documents: list[Any],
+    doc_repo: Any,
+    api_key_id: str,
+) -> tuple[list[Any], int]:
+    """
+    Retire les documents déjà stockés pour cette clé API.
+
+    Args:
+        documents: Documents extraits (avec source_id).
+        doc_repo: DocumentRepository utilisé pour la vérification.
+        api_key_id: ID de la clé API propriétaire.
+
+    Returns:
+        Tuple (documents restants, nombre de documents ignorés).
+    """
+    try:
+        existing = doc_repo.get_existing_source_ids(
+            [doc.source_id for doc in documents],
+            api_key_id=api_key_id,
+        )
+    except Exception as e:
+        logger.warning("Failed to check stored documents", error=str(e))
+        return documents, 0
+
+    if not existing:
+        return documents, 0
+
+    remaining = [doc for doc in documents if doc.source_id not in existing]
+    return remaining, len(documents) - len(remaining)
+
+
+def _store_batch(
+    provider: Any,
+    documents: list[Any],
+    embeddings: list[list[float]],
+    doc_repo: Any,
+    owner_metadata: dict[str, str],
+    user_id: str,
+    api_key_id: str,
+) -> int:
+    """
+    Stocke un lot de documents extraits en un seul INSERT.
+
+    Si l'INSERT du lot échoue, les documents sont repris un par un
+    pour isoler l'erreur.
+
+    Args:
+        provider: Provider d'extraction (conversion en DocumentCreate).
+        documents: Documents extraits du lot.
+        embeddings: Embeddings des documents, dans le même ordre.
+        doc_repo: DocumentRepository utilisé pour le stockage.
+        owner_metadata: Métadonnées de propriété ajoutées à chaque document.
+        user_id: ID de l'utilisateur propriétaire.
+        api_key_id: ID de la clé API propriétaire.
+
+    Returns:
+        Nombre de documents stockés.
+    """
+    models: list[Any] = []
+    model_embeddings: list[list[float]] = []
+    for doc, embedding in zip(documents, embeddings, strict=True):
+        try:
+            models.append(
+                provider.to_document(replace(doc, metadata={**doc.metadata, **owner_metadata}))
+            )
+            model_embeddings.append(embedding)
+        except Exception as e:
+            logger.warning("Failed to store document", source_id=doc.source_id, error=str(e))
+
+    if not models:
+        return 0
+
+    try:
+        doc_repo.bulk_create_from_models(
+            models, model_embeddings, user_id=user_id, api_key_id=api_key_id
+        )
+        return len(models)
+    except Exception as e:
+        logger.warning("Batch store failed, retrying documents one by one", error=str(e))
+
+    stored_count = 0
+    for model, embedding in zip(models, model_embeddings, strict=True):
+        try:
+            doc_repo.create_from_model(model, embedding, user_id=user_id, api_key_id=api_key_id)
+            stored_count += 1
+        except Exception as e:
+            logger.warning("Failed to store document", source_id=model.source_id, error=str(e))
+    return stored_count
+
+
+def _store_documents(
+    provider: Any,
+    documents: list[Any],
+    embeddings: list[list[float]],
+    doc_repo: Any,
+    owner_metadata: dict[str, str],
+    user_id: str,
+    api_key_id: str,
+    skipped_count: int,
+) -> int:
+    """
+    Stocke les documents par lots de _CHECKPOINT_EVERY, avec un checkpoint par lot.
+
+    Args:
+        provider: Provider d'extraction (conversion en DocumentCreate).
+        documents: Documents extraits restant à stocker.
+        embeddings: Embeddings des documents, dans le même ordre.
+        doc_repo: DocumentRepository utilisé pour le stockage.
+        owner_metadata: Métadonnées de propriété ajoutées à chaque document.
+        user_id: ID de l'utilisateur propriétaire.
+        api_key_id: ID de la clé API propriétaire.
+        skipped_count: Documents déjà stockés lors d'une exécution précédente.
+
+    Returns:
+        Nombre de documents stockés par cette exécution.
+    """
+    total = len(documents)
+    stored_count = 0
+    _save_checkpoint(skipped_count)
+    for start in range(0, total, _CHECKPOINT_EVERY):
+        end = min(start + _CHECKPOINT_EVERY, total)
+        update_job_progress(70 + int((start / total) * 25), f"Stockage {end}/{total}...")
+
+        stored_count += _store_batch(
+            provider,
+            documents[start:end],
+            embeddings[start:end],
+            doc_repo,
+            owner_metadata,
+            user_id,
+            api_key_id,
+        )
+        _save_checkpoint(skipped_count + stored_count)
+    return stored_count
+
+
 def get_job_status(job_id: str) -> JobProgress | None:
     """
     Récupère le statut d'un job par son ID.
@@ -146,7 +347,7 @@ def ingest_github_repository_task(
     Returns:
         Résultat avec nombre de documents ingérés.
     """
-    from src.providers.github_provider import GitHubProvider
+    from src.providers.github_provider import GithubProvider
     from src.repositories.document_repository import DocumentRepository
     from src.services.embedding_service import EmbeddingService
 
@@ -161,7 +362,7 @@ def ingest_github_repository_task(
     try:
         # Étape 1: Extraire les fichiers
         update_job_progress(10, "Extraction des fichiers...")
-        github = GitHubProvider()
+        github = GithubProvider()
         documents = list(github.extract(repo_url))
 
         if not documents:
@@ -176,40 +377,45 @@ def ingest_github_repository_task(
         total_docs = len(documents)
         logger.info("Files extracted", count=total_docs)
 
+        # Reprise: ignorer les documents stockés lors d'une exécution précédente
+        doc_repo = DocumentRepository()
+        skipped_count = 0
+        checkpoint = _read_checkpoint()
+        if checkpoint is not None:
+            documents, skipped_count = _skip_stored_documents(documents, doc_repo, api_key_id)
+            logger.info("Resuming ingestion", checkpoint=checkpoint, skipped=skipped_count)
+        pending_count = len(documents)
+
         # Étape 2: Générer les embeddings
-        update_job_progress(30, f"Génération des embeddings ({total_docs} fichiers)...")
+        update_job_progress(30, f"Génération des embeddings ({pending_count} fichiers)...")
         embedding_service = EmbeddingService()
 
         texts = [doc.content for doc in documents]
         embeddings = embedding_service.embed_batch(texts)
+        if len(embeddings) != len(documents):
+            raise ValueError(
+                f"Embedding count mismatch: {len(embeddings)} for {len(documents)} documents"
+            )
 
         # Étape 3: Stocker dans Supabase
         update_job_progress(70, "Stockage dans la base vectorielle...")
-        doc_repo = DocumentRepository()
-
-        stored_count = 0
-        for i, (doc, embedding) in enumerate(zip(documents, embeddings, strict=True)):
-            progress = 70 + int((i / total_docs) * 25)
-            update_job_progress(progress, f"Stockage {i + 1}/{total_docs}...")
-
-            try:
-                doc_repo.store_document(
-                    content=doc.content,
-                    embedding=embedding,
-                    source_id=doc.source_id,
-                    metadata={
-                        **doc.metadata,
-                        "api_key_id": api_key_id,
-                        "user_id": user_id,
-                    },
-                )
-                stored_count += 1
-            except Exception as e:
-                logger.warning("Failed to store document", source_id=doc.source_id, error=str(e))
+        owner_metadata = {_K_APIK: api_key_id, _K_USER: user_id}
+
+        stored_count = _store_documents(
+            github,
+            documents,
+            embeddings,
+            doc_repo,
+            owner_metadata,
+            user_id,
+            api_key_id,
+            skipped_count,
+        )
 
         result = {
             "documents_count": stored_count,
             "total_extracted": total_docs,
+            "skipped_existing": skipped_count,
             "repo_url": repo_url,
         }
 
@@ -283,41 +489,45 @@ def ingest_pdf_document_task(
         total_pages = len(documents)
         logger.info("PDF extracted", pages=total_pages)
 
+        # Reprise: ignorer les documents stockés lors d'une exécution précédente
+        doc_repo = DocumentRepository()
+        skipped_count = 0
+        checkpoint = _read_checkpoint()
+        if checkpoint is not None:
+            documents, skipped_count = _skip_stored_documents(documents, doc_repo, api_key_id)
+            logger.info("Resuming ingestion", checkpoint=checkpoint, skipped=skipped_count)
+        pending_count = len(documents)
+
         # Étape 2: Générer les embeddings
-        update_job_progress(30, f"Génération des embeddings ({total_pages} pages)...")
+        update_job_progress(30, f"Génération des embeddings ({pending_count} pages)...")
         embedding_service = EmbeddingService()
 
         texts = [doc.content for doc in documents]
         embeddings = embedding_service.embed_batch(texts)
+        if len(embeddings) != len(documents):
+            raise ValueError(
+                f"Embedding count mismatch: {len(embeddings)} for {len(documents)} documents"
+            )
 
         # Étape 3: Stocker
         update_job_progress(70, "Stockage dans la base vectorielle...")
-        doc_repo = DocumentRepository()
-
-        stored_count = 0
-        for i, (doc, embedding) in enumerate(zip(documents, embeddings, strict=True)):
-            progress = 70 + int((i / total_pages) * 25)
-            update_job_progress(progress, f"Stockage page {i + 1}/{total_pages}...")
-
-            try:
-                doc_repo.store_document(
-                    content=doc.content,
-                    embedding=embedding,
-                    source_id=doc.source_id,
-                    metadata={
-                        **doc.metadata,
-                        "api_key_id": api_key_id,
-                        "user_id": user_id,
-                        "original_filename": filename,
-                    },
-                )
-                stored_count += 1
-            except Exception as e:
-                logger.warning("Failed to store page", page=i + 1, error=str(e))
+        owner_metadata = {_K_APIK: api_key_id, _K_USER: user_id, _K_FILE: filename}
+
+        stored_count = _store_documents(
+            pdf_provider,
+            documents,
+            embeddings,
+            doc_repo,
+            owner_metadata,
+            user_id,
+            api_key_id,
+            skipped_count,
+        )
 
         result = {
             "pages_count": stored_count,
             "total_pages": total_pages,
+            "skipped_existing": skipped_count,
             "filename": filename,
         }
 
@@ -17,7 +17,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from redis import Redis
-from rq import Queue, Worker
+from rq import Queue, SimpleWorker, Worker
 
 from src.config.logging_config import get_logger, setup_logging
 from src.config.settings import get_settings
@@ -29,6 +29,10 @@ def run_worker() -> None:
 
     Le worker écoute la queue 'ingestion' et exécute les tâches
     d'ingestion de documents (GitHub, PDF, etc.).
+
+    Par défaut, un SimpleWorker exécute les jobs dans son propre process
+    (pas de fork par job, les libs lourdes restent chargées). Le Worker
+    forké reste disponible via RQ_USE_FORK pour isoler la mémoire.
     """
     setup_logging()
     logger = get_logger("worker")
@@ -54,10 +58,15 @@ def run_worker() -> None:
         ]
 
         # Créer et lancer le worker
-        worker = Worker(queues, connection=redis_conn)
-
-        logger.info("Worker started, listening for jobs...")
-        worker.work(with_scheduler=True)
+        worker_class = Worker if settings.rq_use_fork else SimpleWorker
+        worker = worker_class(queues, connection=redis_conn)
+
+        logger.info(
+            "Worker started, listening for jobs...",
+            worker_class=worker_class.__name__,
+        )
+        # Aucun job différé (enqueue_in/enqueue_at): pas besoin du scheduler
+        worker.work(with_scheduler=False)
 
     except Exception as e:
         logger.error("Worker failed to start", error=str(e))
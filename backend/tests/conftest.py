@@ -8,6 +8,7 @@ import pytest
 import sys
 from pathlib import Path
 from unittest.mock import Mock, AsyncMock
+from uuid import uuid4
 
 # Ajouter le répertoire racine au path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -18,6 +19,162 @@ def _generate_test_key(prefix: str = "test") -> str:
     return f"{prefix}_{secrets.token_hex(16)}"
 
 
+class FakeClock:
+    """Horloge monotone contrôlée par les tests (avance instantanément)."""
+
+    def __init__(self, t: float = 1000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class FakeResponse:
+    """Réponse Supabase factice (attribut data)."""
+
+    def __init__(self, data=None):
+        self.data = data
+
+
+class FakeQuery:
+    """Requête Supabase chaînable: enregistre les filtres jusqu'à execute()."""
+
+    def __init__(self, table: "FakeTable", operation: str, payload=None):
+        self.table = table
+        self.operation = operation
+        self.payload = payload
+        self.filters: list[tuple] = []
+        self.in_filters: list[tuple] = []
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def select(self, *columns):
+        return self
+
+    def in_(self, column, values):
+        self.in_filters.append((column, set(values)))
+        return self
+
+    def limit(self, count):
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def single(self):
+        return self
+
+    def execute(self) -> FakeResponse:
+        return self.table._execute(self)
+
+
+class FakeTable:
+    """Table en mémoire: lignes lues par select, opérations d'écriture enregistrées."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: list[dict] = []
+        self.inserts: list = []
+        self.deletes: list[list[tuple]] = []
+        self.selects = 0
+        self.error: Exception | None = None
+
+    def insert(self, data) -> FakeQuery:
+        return FakeQuery(self, "insert", data)
+
+    def select(self, *columns) -> FakeQuery:
+        return FakeQuery(self, "select")
+
+    def delete(self) -> FakeQuery:
+        return FakeQuery(self, "delete")
+
+    def _execute(self, query: FakeQuery) -> FakeResponse:
+        if self.error is not None:
+            raise self.error
+        if query.operation == "insert":
+            self.inserts.append(query.payload)
+            rows = query.payload if isinstance(query.payload, list) else [query.payload]
+            return FakeResponse([{"id": str(uuid4()), **row} for row in rows])
+        if query.operation == "delete":
+            self.deletes.append(query.filters)
+            return FakeResponse([])
+        self.selects += 1
+        rows = [
+            r
+            for r in self.rows
+            if all(r.get(c) == v for c, v in query.filters)
+            and all(r.get(c) in values for c, values in query.in_filters)
+        ]
+        return FakeResponse(rows)
+
+
+class _FakeRpc:
+    """Appel RPC différé jusqu'à execute()."""
+
+    def __init__(self, client: "FakeSupabase", name: str):
+        self.client = client
+        self.name = name
+
+    def execute(self) -> FakeResponse:
+        result = self.client.rpc_results.get(self.name)
+        if isinstance(result, Exception):
+            raise result
+        return FakeResponse(result)
+
+
+class FakeSupabase:
+    """
+    Client Supabase en mémoire (table() / rpc()).
+
+    Plus léger et plus lisible que les chaînes de MagicMock: les écritures
+    sont inspectées via tables[nom].inserts / deletes et rpc_calls.
+    """
+
+    def __init__(self):
+        self.tables: dict[str, FakeTable] = {}
+        self.rpc_calls: list[tuple[str, dict]] = []
+        self.rpc_results: dict = {}
+
+    def table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            self.tables[name] = FakeTable(name)
+        return self.tables[name]
+
+    def rpc(self, name: str, params: dict) -> _FakeRpc:
+        self.rpc_calls.append((name, params))
+        return _FakeRpc(self, name)
+
+
+@pytest.fixture
+def fake_supabase():
+    """Fixture pour un client Supabase en mémoire."""
+    return FakeSupabase()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warmup_singletons():
+    """Initialise une seule fois les singletons de services avant les tests."""
+    from src.services.circuit_breaker import get_circuit_breaker
+
+    get_circuit_breaker()
+    try:
+        from src.services.document_processor import get_document_processor
+
+        get_document_processor()
+    except Exception:
+        # Settings incomplets: les tests concernés créeront (ou non) le singleton
+        pass
+    yield
+
+
+@pytest.fixture
+def clock():
+    """Fixture pour une horloge factice injectable (time_source)."""
+    return FakeClock()
+
+
 @pytest.fixture
 def mock_settings():
     """Fixture pour les settings mockés avec clés générées dynamiquement."""
@@ -4,28 +4,41 @@ Tests for Circuit Breaker Service
 """
 
 import pytest
-import asyncio
-from unittest.mock import AsyncMock, patch
 
 from src.services.circuit_breaker import (
     CircuitBreaker,
     CircuitBreakerConfig,
     CircuitState,
     CircuitOpenError,
+    CircuitStats,
     get_circuit_breaker,
 )
 
 
+class _FakeAPIError(Exception):
+    """Erreur simulée d'une API LLM."""
+
+
+def open_circuit(breaker: CircuitBreaker, provider: str) -> None:
+    """Place directement le circuit d'un provider en état OPEN."""
+    breaker._circuits[provider] = CircuitStats(
+        failures=breaker.config.failure_threshold,
+        state=CircuitState.OPEN,
+        opened_at=breaker._now(),
+    )
+
+
 class TestCircuitBreaker:
     """Tests unitaires pour le Circuit Breaker."""
     
     @pytest.fixture
-    def breaker(self):
+    def breaker(self, clock):
         """Fixture pour un circuit breaker avec configuration de test."""
         config = CircuitBreakerConfig(
             failure_threshold=3,
             success_threshold=2,
             recovery_timeout=1,  # 1 seconde pour les tests
+            time_source=clock,
         )
         return CircuitBreaker(config)
     
@@ -50,11 +63,11 @@ class TestCircuitBreaker:
     async def test_failures_open_circuit(self, breaker):
         """Les échecs répétés ouvrent le circuit."""
         async def failing_operation():
-            raise Exception("API Error")
+            raise _FakeAPIError("API Error")
         
         # Provoquer 3 échecs (threshold)
         for _ in range(3):
-            with pytest.raises(Exception):
+            with pytest.raises(_FakeAPIError):
                 await breaker.execute("openai", failing_operation)
         
         # Le circuit doit être ouvert
@@ -64,13 +77,8 @@ class TestCircuitBreaker:
     @pytest.mark.asyncio
     async def test_open_circuit_rejects_immediately(self, breaker):
         """Un circuit ouvert rejette les requêtes immédiatement."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         # Les prochaines requêtes doivent être rejetées
         with pytest.raises(CircuitOpenError) as exc_info:
@@ -81,13 +89,8 @@ class TestCircuitBreaker:
     @pytest.mark.asyncio
     async def test_open_circuit_uses_fallback(self, breaker):
         """Un circuit ouvert utilise le fallback si fourni."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         # Le fallback doit être utilisé
         result = await breaker.execute(
@@ -99,40 +102,30 @@ class TestCircuitBreaker:
         assert result == "fallback_result"
     
     @pytest.mark.asyncio
-    async def test_circuit_transitions_to_half_open(self, breaker):
+    async def test_circuit_transitions_to_half_open(self, breaker, clock):
         """Le circuit passe en HALF_OPEN après le timeout."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         assert breaker.get_state("openai") == CircuitState.OPEN
         
-        # Attendre le recovery timeout
-        await asyncio.sleep(1.1)
+        # Avancer l'horloge au-delà du recovery timeout
+        clock.t += 1.1
         
         # Le circuit doit être en HALF_OPEN
         assert breaker.get_state("openai") == CircuitState.HALF_OPEN
     
     @pytest.mark.asyncio
-    async def test_half_open_success_closes_circuit(self, breaker):
+    async def test_half_open_success_closes_circuit(self, breaker, clock):
         """Des succès en HALF_OPEN ferment le circuit."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         async def success_operation():
             return "success"
         
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
-        # Attendre le recovery timeout
-        await asyncio.sleep(1.1)
+        # Avancer l'horloge au-delà du recovery timeout
+        clock.t += 1.1
         
         # Exécuter des succès en HALF_OPEN
         for _ in range(2):  # success_threshold = 2
@@ -142,21 +135,19 @@ class TestCircuitBreaker:
         assert breaker.get_state("openai") == CircuitState.CLOSED
     
     @pytest.mark.asyncio
-    async def test_half_open_failure_reopens_circuit(self, breaker):
+    async def test_half_open_failure_reopens_circuit(self, breaker, clock):
         """Un échec en HALF_OPEN réouvre le circuit."""
         async def failing_operation():
-            raise Exception("API Error")
+            raise _FakeAPIError("API Error")
         
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
-        # Attendre le recovery timeout
-        await asyncio.sleep(1.1)
+        # Avancer l'horloge au-delà du recovery timeout
+        clock.t += 1.1
         
         # Un échec en HALF_OPEN
-        with pytest.raises(Exception):
+        with pytest.raises(_FakeAPIError):
             await breaker.execute("openai", failing_operation)
         
         # Le circuit doit être à nouveau ouvert
@@ -165,13 +156,8 @@ class TestCircuitBreaker:
     @pytest.mark.asyncio
     async def test_different_providers_independent(self, breaker):
         """Chaque provider a son propre circuit."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit pour openai
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         # Le circuit mistral doit être toujours fermé
         assert breaker.get_state("openai") == CircuitState.OPEN
@@ -195,13 +181,8 @@ class TestCircuitBreaker:
     @pytest.mark.asyncio
     async def test_manual_reset(self, breaker):
         """reset() réinitialise un circuit."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         assert breaker.get_state("openai") == CircuitState.OPEN
         
@@ -213,13 +194,8 @@ class TestCircuitBreaker:
     @pytest.mark.asyncio
     async def test_retry_after_calculation(self, breaker):
         """get_retry_after retourne le temps restant."""
-        async def failing_operation():
-            raise Exception("API Error")
-        
         # Ouvrir le circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await breaker.execute("openai", failing_operation)
+        open_circuit(breaker, "openai")
         
         retry_after = breaker.get_retry_after("openai")
         
@@ -227,6 +203,7 @@ class TestCircuitBreaker:
         assert 0 < retry_after <= 1
 
 
+@pytest.mark.xdist_group("singletons")
 class TestCircuitBreakerSingleton:
     """Tests pour le singleton du circuit breaker."""
     
@@ -0,0 +1,59 @@
+"""
+Tests unitaires pour le pool de connexions Postgres.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import database
+
+
+@pytest.fixture
+def create_pool(monkeypatch):
+    """asyncpg factice: create_pool lent, enregistre ses appels."""
+    calls = []
+
+    async def fake_create_pool(dsn, **kwargs):
+        calls.append(dsn)
+        await asyncio.sleep(0.01)
+        if create_pool.error is not None:
+            raise create_pool.error
+        return SimpleNamespace(dsn=dsn)
+
+    create_pool = SimpleNamespace(calls=calls, error=None)
+    monkeypatch.setattr(database, "asyncpg", SimpleNamespace(create_pool=fake_create_pool))
+    monkeypatch.setattr(
+        database, "get_settings", lambda: SimpleNamespace(supabase_db_url="postgres://db")
+    )
+    monkeypatch.setattr(database, "_db_pool", None)
+    monkeypatch.setattr(database, "_db_pool_failed_at", None)
+    monkeypatch.setattr(database, "_db_pool_lock", asyncio.Lock())
+    return create_pool
+
+
+class TestGetDbPool:
+    """Tests pour get_db_pool."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_calls_create_one_pool(self, create_pool):
+        """Des premiers appels simultanés partagent un seul pool."""
+        pools = await asyncio.gather(*(database.get_db_pool() for _ in range(5)))
+
+        assert len(create_pool.calls) == 1
+        assert all(pool is pools[0] for pool in pools)
+
+    @pytest.mark.asyncio
+    async def test_failure_is_not_retried_before_cooldown(self, create_pool):
+        """Après un échec, pas de nouvelle tentative avant DB_POOL_RETRY_SECONDS."""
+        create_pool.error = OSError("connection refused")
+
+        assert await database.get_db_pool() is None
+        assert await database.get_db_pool() is None
+        assert len(create_pool.calls) == 1
+
+        create_pool.error = None
+        database._db_pool_failed_at -= database.DB_POOL_RETRY_SECONDS
+        assert await database.get_db_pool() is not None
+        assert len(create_pool.calls) == 2
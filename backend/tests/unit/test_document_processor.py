@@ -4,6 +4,7 @@ Tests for Document Processor Service
 """
 
 import pytest
+import pytest_asyncio
 from uuid import uuid4
 
 from src.services.document_processor import (
@@ -15,19 +16,27 @@ from src.services.document_processor import (
 )
 
 
+# Corpus de test construits une seule fois
+_LOREM_TEXT = "Lorem ipsum dolor sit amet. " * 10  # ~280 chars
+_PARAGRAPHS_TEXT = "Paragraphe un.\n\nParagraphe deux.\n\nParagraphe trois.\n\n" * 5
+_HIERARCHY_TEXT = "Premier paragraphe.\n\nDeuxième paragraphe.\n\nTroisième."
+_OVERLAP_TEXT = "A" * 40 + "\n\n" + "B" * 40 + "\n\n" + "C" * 40
+
+
+@pytest.fixture(scope="module")
+def splitter():
+    """Fixture pour un splitter avec configuration de test (sans état, partagé)."""
+    config = ChunkingConfig(
+        chunk_size=100,
+        chunk_overlap=20,
+        min_chunk_size=10,
+    )
+    return RecursiveTextSplitter(config)
+
+
 class TestRecursiveTextSplitter:
     """Tests pour le splitter de texte."""
     
-    @pytest.fixture
-    def splitter(self):
-        """Fixture pour un splitter avec configuration de test."""
-        config = ChunkingConfig(
-            chunk_size=100,
-            chunk_overlap=20,
-            min_chunk_size=10,
-        )
-        return RecursiveTextSplitter(config)
-    
     def test_short_text_not_split(self, splitter):
         """Un texte court n'est pas divisé."""
         text = "Ceci est un texte court."
@@ -43,16 +52,24 @@ class TestRecursiveTextSplitter:
     
     def test_long_text_is_split(self, splitter):
         """Un texte long est divisé en chunks."""
-        # Créer un texte de plus de 100 caractères
-        text = "Lorem ipsum dolor sit amet. " * 10  # ~280 chars
-        chunks = splitter.split(text)
+        chunks = splitter.split(_LOREM_TEXT)
         
         assert len(chunks) > 1
     
+    @pytest.mark.parametrize(
+        ("length", "expected_chunks"),
+        [(99, 1), (100, 1), (101, 2)],
+        ids=["below_chunk_size", "at_chunk_size", "above_chunk_size"],
+    )
+    def test_chunk_size_boundary(self, splitter, length, expected_chunks):
+        """Le découpage ne commence qu'au-delà de chunk_size."""
+        chunks = splitter.split("x" * length)
+
+        assert len(chunks) == expected_chunks
+
     def test_chunks_respect_max_size(self, splitter):
         """Les chunks respectent la taille maximale (avec overlap)."""
-        text = "Paragraphe un.\n\nParagraphe deux.\n\nParagraphe trois.\n\n" * 5
-        chunks = splitter.split(text)
+        chunks = splitter.split(_PARAGRAPHS_TEXT)
         
         # Vérifier la taille (avec marge pour l'overlap)
         for chunk in chunks:
@@ -69,8 +86,7 @@ class TestRecursiveTextSplitter:
         )
         splitter = RecursiveTextSplitter(config)
         
-        text = "Premier paragraphe.\n\nDeuxième paragraphe.\n\nTroisième."
-        chunks = splitter.split(text)
+        chunks = splitter.split(_HIERARCHY_TEXT)
         
         # Doit utiliser \n\n comme séparateur principal
         assert len(chunks) >= 2
@@ -83,8 +99,7 @@ class TestRecursiveTextSplitter:
         )
         splitter = RecursiveTextSplitter(config)
         
-        text = "A" * 40 + "\n\n" + "B" * 40 + "\n\n" + "C" * 40
-        chunks = splitter.split(text)
+        chunks = splitter.split(_OVERLAP_TEXT)
         
         # Les chunks après le premier doivent contenir le préfixe d'overlap
         if len(chunks) > 1:
@@ -99,20 +114,24 @@ class TestDocumentProcessor:
         """Fixture pour un processor de test."""
         return DocumentProcessor(batch_size=2, max_retries=2)
     
-    @pytest.mark.asyncio
-    async def test_create_job(self, processor):
-        """create_job crée un job avec le bon statut."""
+    @pytest_asyncio.fixture
+    async def created_job(self, processor):
+        """Fixture pour un job créé et son statut initial."""
         job_id = await processor.create_job(
             api_key_id=str(uuid4()),
             user_id=str(uuid4()),
-            content="Test content for processing.",
-            source_filename="test.txt",
-            source_type="text",
+            content="Test content",
+            source_filename="document.pdf",
+            source_type="pdf",
         )
+        return job_id, await processor.get_job_status(job_id)
+    
+    @pytest.mark.asyncio
+    async def test_create_job(self, created_job):
+        """create_job crée un job avec le bon statut."""
+        job_id, status = created_job
         
         assert job_id is not None
-        
-        status = await processor.get_job_status(job_id)
         assert status is not None
         assert status["status"] == JobStatus.PENDING.value
     
@@ -123,20 +142,14 @@ class TestDocumentProcessor:
         assert status is None
     
     @pytest.mark.asyncio
-    async def test_job_includes_source_info(self, processor):
+    async def test_job_includes_source_info(self, created_job):
         """Le job contient les infos sur la source."""
-        job_id = await processor.create_job(
-            api_key_id=str(uuid4()),
-            user_id=str(uuid4()),
-            content="Test content",
-            source_filename="document.pdf",
-            source_type="pdf",
-        )
+        _, status = created_job
         
-        status = await processor.get_job_status(job_id)
         assert status["source_filename"] == "document.pdf"
 
 
+@pytest.mark.xdist_group("singletons")
 class TestDocumentProcessorSingleton:
     """Tests pour le singleton du processor."""
     
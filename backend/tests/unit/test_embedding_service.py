@@ -0,0 +1,223 @@
+"""
+Tests unitaires pour l'EmbeddingService.
+"""
+
+import threading
+import time
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from src.services import embedding_service as embedding_module
+from src.services.embedding_service import EmbeddingService
+
+
+@pytest.fixture(params=["simsimd", "numpy"])
+def backend(request, monkeypatch):
+    """Exécute chaque test avec SimSIMD puis avec le fallback NumPy."""
+    if request.param == "numpy":
+        monkeypatch.setattr(embedding_module, "simsimd", None)
+    elif embedding_module.simsimd is None:
+        pytest.skip("simsimd non installé")
+    return request.param
+
+
+class TestComputeSimilarity:
+    """Tests pour EmbeddingService.compute_similarity."""
+
+    def test_identical_vectors(self, backend):
+        """Des vecteurs identiques ont une similarité de 1."""
+        vector = [0.1 * i for i in range(1, 1025)]
+
+        assert EmbeddingService.compute_similarity(vector, vector) == pytest.approx(1.0, abs=1e-5)
+
+    def test_matches_reference_cosine(self, backend):
+        """Le score correspond au cosinus calculé en float64."""
+        rng = np.random.default_rng(0)
+        a, b = rng.random(1024), rng.random(1024)
+        expected = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+        assert EmbeddingService.compute_similarity(a.tolist(), b) == pytest.approx(
+            expected, abs=1e-5
+        )
+
+    def test_orthogonal_and_zero_vectors(self, backend):
+        """Vecteurs orthogonaux ou nuls: similarité 0."""
+        assert EmbeddingService.compute_similarity([1.0, 0.0], [0.0, 1.0]) == pytest.approx(0.0)
+        assert EmbeddingService.compute_similarity([0.0, 0.0], [1.0, 1.0]) == 0.0
+
+    def test_dimension_mismatch(self, backend):
+        """Des dimensions différentes lèvent une ValueError."""
+        with pytest.raises(ValueError):
+            EmbeddingService.compute_similarity([1.0, 2.0], [1.0, 2.0, 3.0])
+
+
+class TestQueryCache:
+    """Tests pour le cache des embeddings de requêtes."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Service dont embed_text est factice et l'horloge contrôlée."""
+        clock = [100.0]
+        monkeypatch.setattr(embedding_module.time, "monotonic", lambda: clock[0])
+        service = EmbeddingService()
+        service._query_cache_ttl = 60
+        service.embed_text = Mock(side_effect=lambda text: [float(len(text))])
+        service.clock = clock
+        return service
+
+    def test_repeated_query_hits_cache(self, service):
+        """Une requête identique ne rappelle pas l'API."""
+        first = service.embed_query("Quels projets ?")
+        second = service.embed_query("Quels projets ?")
+
+        assert second == first
+        service.embed_text.assert_called_once_with("Quels projets ?")
+
+    def test_entries_expire(self, service):
+        """Passé le TTL, l'embedding est recalculé."""
+        service.embed_query("Question")
+        service.clock[0] += 60
+        service.embed_query("Question")
+
+        assert service.embed_text.call_count == 2
+
+    def test_lru_eviction(self, service, monkeypatch):
+        """Au-delà de la taille max, la requête la moins récente est évincée."""
+        monkeypatch.setattr(embedding_module, "QUERY_CACHE_MAX_ENTRIES", 2)
+        service.embed_query("a")
+        service.embed_query("b")
+        service.embed_query("a")
+        service.embed_query("c")
+
+        assert list(service._query_cache) == ["a", "c"]
+
+    def test_disabled_with_zero_ttl(self, service):
+        """Un TTL de 0 désactive le cache."""
+        service._query_cache_ttl = 0
+        service.embed_query("Question")
+        service.embed_query("Question")
+
+        assert service.embed_text.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_aembed_query_shares_cache(self, service):
+        """La version asynchrone lit et alimente le même cache."""
+        service.aembed_text = AsyncMock(return_value=[1.0])
+
+        assert await service.aembed_query("a") == [1.0]
+        assert await service.aembed_query("a") == [1.0]
+        assert service.embed_query("a") == [1.0]
+
+        service.aembed_text.assert_awaited_once_with("a")
+        service.embed_text.assert_not_called()
+
+
+class TestAsyncEmbedding:
+    """Tests pour les embeddings asynchrones."""
+
+    @pytest.mark.asyncio
+    async def test_aembed_query_uses_async_client(self):
+        """La requête est vectorisée via le client HTTP asynchrone de Mistral."""
+        service = EmbeddingService()
+        service.model = "mistral-embed"
+        service._client = Mock()
+        service._client.embeddings.create_async = AsyncMock(
+            return_value=Mock(data=[Mock(embedding=[0.1, 0.2])])
+        )
+
+        embedding = await service.aembed_query("Question")
+
+        assert embedding == [0.1, 0.2]
+        service._client.embeddings.create_async.assert_awaited_once_with(
+            model="mistral-embed", inputs=["Question"]
+        )
+        service._client.embeddings.create.assert_not_called()
+
+
+class TestTruncateText:
+    """Tests pour la troncature des textes à vectoriser."""
+
+    @pytest.fixture
+    def service(self):
+        """Service sans client API."""
+        return EmbeddingService.__new__(EmbeddingService)
+
+    def test_short_text_is_unchanged(self, service):
+        """Un texte sous la limite n'est pas modifié."""
+        assert service._truncate_text("Bonjour le monde", max_tokens=100) == "Bonjour le monde"
+
+    def test_truncates_to_token_count(self, service):
+        """Le texte tronqué tient dans max_tokens tokens du tokenizer Mistral."""
+        tokenizer = embedding_module._get_tokenizer()
+        if tokenizer is None:
+            pytest.skip("mistral-common non installé")
+        text = "日本語のテキスト " * 500
+
+        truncated = service._truncate_text(text, max_tokens=100)
+
+        assert text.startswith(truncated.strip())
+        assert len(tokenizer.encode(truncated, bos=False, eos=False)) <= 100
+
+    def test_falls_back_to_char_estimate(self, service, monkeypatch):
+        """Sans tokenizer, la limite est estimée à 4 caractères par token."""
+        monkeypatch.setattr(embedding_module, "_get_tokenizer", lambda: None)
+
+        assert service._truncate_text("a" * 1000, max_tokens=100) == "a" * 400
+
+
+class TestEmbedBatch:
+    """Tests pour embed_batch."""
+
+    @pytest.fixture
+    def service(self):
+        """Service dont le client renvoie un embedding par texte reçu."""
+        service = EmbeddingService.__new__(EmbeddingService)
+        service.model = "mistral-embed"
+        service._client = Mock()
+        service._client.embeddings.create.side_effect = lambda model, inputs: Mock(
+            data=[Mock(embedding=[float(len(text))]) for text in inputs]
+        )
+        return service
+
+    def test_identical_texts_are_embedded_once(self, service):
+        """Les doublons ne sont envoyés qu'une fois et l'ordre est conservé."""
+        texts = ["licence MIT", "code", "licence MIT", "a", "code"]
+
+        embeddings = service.embed_batch(texts)
+
+        assert embeddings == [[11.0], [4.0], [11.0], [1.0], [4.0]]
+        inputs = service._client.embeddings.create.call_args.kwargs["inputs"]
+        assert inputs == ["licence MIT", "code", "a"]
+
+    def test_unique_texts_split_by_batch_size(self, service):
+        """Les textes uniques sont envoyés par lots de batch_size."""
+        embeddings = service.embed_batch(["a", "bb", "a", "ccc"], batch_size=2)
+
+        assert embeddings == [[1.0], [2.0], [1.0], [3.0]]
+        assert service._client.embeddings.create.call_count == 2
+
+    def test_batches_are_sent_concurrently(self, service):
+        """Plusieurs batches sont envoyés en parallèle, dans l'ordre d'origine."""
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def create(model, inputs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return Mock(data=[Mock(embedding=[float(text)]) for text in inputs])
+
+        service._client.embeddings.create.side_effect = create
+        texts = [str(i) for i in range(10)]
+
+        embeddings = service.embed_batch(texts, batch_size=2, concurrency=3)
+
+        assert embeddings == [[float(i)] for i in range(10)]
+        assert 1 < peak <= 3
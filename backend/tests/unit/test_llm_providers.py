@@ -3,7 +3,7 @@ Tests unitaires pour les LLM Providers et la Factory.
 """
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
+from unittest.mock import Mock, AsyncMock
 from dataclasses import asdict
 
 from src.providers.llm import (
@@ -18,22 +18,31 @@ from src.providers.llm import (
 )
 
 
+class _StubLLMProvider:
+    """
+    Stub minimal de BaseLLMProvider.
+
+    Remplace Mock(spec=BaseLLMProvider), qui introspecte la classe à chaque
+    construction: seules les méthodes fournies sont exposées.
+    """
+
+    def __init__(self, **methods):
+        for name, method in methods.items():
+            setattr(self, name, method)
+
+
 class TestLLMProvider:
     """Tests pour l'enum LLMProvider."""
     
     def test_provider_values(self):
-        """Vérifie les valeurs des providers."""
-        assert LLMProvider.MISTRAL.value == "mistral"
-        assert LLMProvider.OPENAI.value == "openai"
-        assert LLMProvider.GEMINI.value == "gemini"
-        assert LLMProvider.DEEPSEEK.value == "deepseek"
-        assert LLMProvider.ANTHROPIC.value == "anthropic"
-    
-    def test_all_providers_exist(self):
-        """Vérifie que tous les providers attendus existent."""
-        expected = {"MISTRAL", "OPENAI", "GEMINI", "DEEPSEEK", "ANTHROPIC"}
-        actual = {p.name for p in LLMProvider}
-        assert expected == actual
+        """Vérifie que tous les providers attendus existent avec leurs valeurs."""
+        assert {(p.name, p.value) for p in LLMProvider} == {
+            ("MISTRAL", "mistral"),
+            ("OPENAI", "openai"),
+            ("GEMINI", "gemini"),
+            ("DEEPSEEK", "deepseek"),
+            ("ANTHROPIC", "anthropic"),
+        }
 
 
 class TestLLMConfig:
@@ -158,15 +167,56 @@ class TestMistralLLMProvider:
         """Test que le provider hérite de BaseLLMProvider."""
         assert issubclass(MistralLLMProvider, BaseLLMProvider)
 
+    @pytest.fixture
+    def mistral(self):
+        """Provider Mistral dont le client SDK est factice."""
+        provider = MistralLLMProvider(config=LLMConfig(model="mistral-small-latest"))
+        provider._client = Mock()
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_generate_uses_async_client(self, mistral):
+        """Test que la génération attend l'API asynchrone du SDK."""
+        mistral._client.chat.complete_async = AsyncMock(
+            return_value=Mock(
+                choices=[Mock(message=Mock(content="Bonjour"), finish_reason="stop")],
+                usage=Mock(prompt_tokens=5, completion_tokens=2),
+            )
+        )
+
+        response = await mistral.generate([{"role": "user", "content": "Salut"}])
+
+        assert response.content == "Bonjour"
+        assert response.tokens_output == 2
+        mistral._client.chat.complete_async.assert_awaited_once()
+        mistral._client.chat.complete.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_generate_stream_uses_async_client(self, mistral):
+        """Test que le streaming itère le flux asynchrone du SDK."""
+        async def events():
+            for content, finish in (("Bon", None), ("jour", "stop")):
+                delta = Mock(content=content)
+                yield Mock(data=Mock(choices=[Mock(delta=delta, finish_reason=finish)]))
+
+        mistral._client.chat.stream_async = AsyncMock(return_value=events())
+
+        chunks = [c async for c in mistral.generate_stream([{"role": "user", "content": "Salut"}])]
+
+        assert [c.content for c in chunks] == ["Bon", "jour"]
+        assert chunks[-1].is_final is True
+        mistral._client.chat.stream.assert_not_called()
+
+
+@pytest.fixture(scope="module")
+def factory():
+    """Factory partagée pour les tests en lecture seule."""
+    return LLMProviderFactory()
+
 
 class TestLLMProviderFactory:
     """Tests pour la Factory de providers."""
     
-    @pytest.fixture
-    def factory(self):
-        """Créer une factory pour les tests."""
-        return LLMProviderFactory()
-    
     def test_factory_has_cache(self, factory):
         """Test que la factory a un cache."""
         assert hasattr(factory, "_cache")
@@ -184,8 +234,9 @@ class TestLLMProviderFactory:
         with pytest.raises(ValueError):
             factory.get_provider("invalid_provider_name")
     
-    def test_factory_has_clear_cache(self, factory):
+    def test_factory_has_clear_cache(self):
         """Test que la méthode clear_cache existe."""
+        factory = LLMProviderFactory()
         assert hasattr(factory, "clear_cache")
         factory.clear_cache()
         assert len(factory._cache) == 0
@@ -235,17 +286,17 @@ class TestLLMProviderIntegration:
     @pytest.fixture
     def mock_provider(self):
         """Créer un mock provider pour les tests."""
-        provider = Mock(spec=BaseLLMProvider)
-        provider.generate = AsyncMock(return_value=LLMResponse(
-            content="Test response",
-            tokens_input=10,
-            tokens_output=5,
-        ))
-        provider.build_messages = Mock(return_value=[
-            {"role": "system", "content": "You are helpful."},
-            {"role": "user", "content": "Hello"},
-        ])
-        return provider
+        return _StubLLMProvider(
+            generate=AsyncMock(return_value=LLMResponse(
+                content="Test response",
+                tokens_input=10,
+                tokens_output=5,
+            )),
+            build_messages=Mock(return_value=[
+                {"role": "system", "content": "You are helpful."},
+                {"role": "user", "content": "Hello"},
+            ]),
+        )
     
     @pytest.mark.asyncio
     async def test_generate_flow(self, mock_provider):
@@ -267,8 +318,6 @@ class TestProviderReflectionMode:
     @pytest.fixture
     def mock_reflection_provider(self):
         """Créer un mock provider avec réflexion."""
-        provider = Mock(spec=BaseLLMProvider)
-        
         async def mock_generate_with_reflection(messages):
             return LLMResponse(
                 content="The answer is 42.",
@@ -277,8 +326,9 @@ class TestProviderReflectionMode:
                 thought_process="Let me analyze this step by step...",
             )
         
-        provider.generate_with_reflection = AsyncMock(side_effect=mock_generate_with_reflection)
-        return provider
+        return _StubLLMProvider(
+            generate_with_reflection=AsyncMock(side_effect=mock_generate_with_reflection),
+        )
     
     @pytest.mark.asyncio
     async def test_reflection_returns_thought_process(self, mock_reflection_provider):
@@ -0,0 +1,241 @@
+"""
+Tests unitaires pour la configuration du logging.
+"""
+
+import io
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+import structlog
+
+from src.config import logging_config
+from src.config.logging_config import (
+    LoggerMixin,
+    _CoalescingWriter,
+    _orjson_renderer,
+    get_logger,
+    log_function_call,
+    setup_logging,
+)
+
+
+@pytest.fixture
+def production(monkeypatch):
+    """Settings de production; restaure la configuration structlog ensuite."""
+    settings = SimpleNamespace(is_production=True, log_level="INFO", log_flush_interval=0.0)
+    monkeypatch.setattr(logging_config, "get_settings", lambda: settings)
+    yield settings
+    structlog.reset_defaults()
+
+
+class TestOrjsonRenderer:
+    """Tests pour le rendu JSON orjson."""
+
+    def test_renders_bytes_with_utc_timestamp(self):
+        """Le rendu produit des bytes et un horodatage ISO en Z."""
+        event = {
+            "event": "Hello",
+            "timestamp": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "count": 3,
+        }
+
+        rendered = _orjson_renderer(None, "info", event)
+
+        assert isinstance(rendered, bytes)
+        assert json.loads(rendered) == {
+            "event": "Hello",
+            "timestamp": "2024-01-02T03:04:05Z",
+            "count": 3,
+        }
+
+    def test_unserializable_values_use_repr(self):
+        """Les valeurs non sérialisables sont rendues via repr."""
+        rendered = _orjson_renderer(None, "info", {"event": "x", "obj": {1, 2}})
+
+        assert json.loads(rendered)["obj"] == repr({1, 2})
+
+
+class TestSetupLogging:
+    """Tests pour setup_logging."""
+
+    def test_production_writes_json_bytes(self, production, capsysbinary):
+        """En production, chaque log est une ligne JSON écrite en bytes."""
+        setup_logging()
+        get_logger("test").info("Application started", version="1.0.0")
+
+        line = json.loads(capsysbinary.readouterr().out.splitlines()[-1])
+        assert line["event"] == "Application started"
+        assert line["version"] == "1.0.0"
+        assert line["level"] == "info"
+        assert line["timestamp"].endswith("Z")
+
+    def test_filtered_levels_skip_processors(self, production, monkeypatch):
+        """Un log sous le niveau minimal ne traverse aucun processeur."""
+        calls = []
+
+        def spy(_, __, event_dict):
+            calls.append(event_dict["event"])
+            return event_dict
+
+        monkeypatch.setattr(logging_config, "_add_utc_timestamp", spy)
+        setup_logging()
+        logger = get_logger("filtered")
+
+        logger.debug("Ignoré")
+        logger.info("Conservé")
+
+        assert calls == ["Conservé"]
+
+    def test_structlog_bypasses_stdlib_handlers(self, production, capsys):
+        """Les logs applicatifs ne passent pas par les handlers du module logging."""
+        production.is_production = False
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logging.getLogger().addHandler(handler)
+        try:
+            setup_logging()
+            get_logger("test").info("Document processed")
+        finally:
+            logging.getLogger().removeHandler(handler)
+
+        assert "Document processed" in capsys.readouterr().out
+        assert records == []
+
+
+class TestCoalescingWriter:
+    """Tests pour le regroupement des écritures de logs."""
+
+    def test_flush_is_deferred_until_interval(self, monkeypatch):
+        """Les logs restent en tampon jusqu'à l'intervalle suivant."""
+        clock = [100.0]
+        monkeypatch.setattr(logging_config.time, "monotonic", lambda: clock[0])
+        target = io.BytesIO()
+        writer = _CoalescingWriter(target, interval=1.0)
+
+        writer.write(b'{"event":"a"}\n')
+        writer.flush()
+        assert target.getvalue() == b""
+
+        clock[0] += 1.0
+        writer.write(b'{"event":"b"}\n')
+        writer.flush()
+        assert target.getvalue() == b'{"event":"a"}\n{"event":"b"}\n'
+
+    def test_flush_now_empties_buffer(self):
+        """flush_now vide le tampon quel que soit l'intervalle (sortie du process)."""
+        target = io.BytesIO()
+        writer = _CoalescingWriter(target, interval=60.0)
+
+        writer.write(b"x\n")
+        writer.flush_now()
+
+        assert target.getvalue() == b"x\n"
+
+
+    def test_error_records_are_flushed_immediately(self):
+        """Un log ERROR est écrit sans attendre l'intervalle."""
+        target = io.BytesIO()
+        writer = _CoalescingWriter(target, interval=60.0)
+
+        writer.flush_urgent(None, "info", {})
+        writer.write(b'{"event":"a"}\n')
+        writer.flush()
+        assert target.getvalue() == b""
+
+        writer.flush_urgent(None, "error", {})
+        writer.write(b'{"event":"b"}\n')
+        writer.flush()
+        assert target.getvalue() == b'{"event":"a"}\n{"event":"b"}\n'
+
+    def test_idle_buffer_is_flushed_by_thread(self):
+        """Sans nouveau log, le thread vide le tampon à chaque intervalle."""
+        target = io.BytesIO()
+        writer = _CoalescingWriter(target, interval=0.01)
+        writer.start()
+        try:
+            writer.write(b"x\n")
+            writer.flush()
+            deadline = time.monotonic() + 5
+            while target.getvalue() == b"" and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            writer.close()
+
+        assert target.getvalue() == b"x\n"
+
+    def test_production_error_reaches_stdout(self, production, capsysbinary):
+        """Avec un intervalle long, un log ERROR atteint stdout immédiatement."""
+        production.log_flush_interval = 60.0
+        setup_logging()
+        logger = get_logger("test")
+
+        logger.info("Buffered")
+        assert capsysbinary.readouterr().out == b""
+
+        logger.error("Payment failed")
+        lines = capsysbinary.readouterr().out.splitlines()
+        assert [json.loads(line)["event"] for line in lines] == ["Buffered", "Payment failed"]
+
+        production.log_flush_interval = 0.0
+        setup_logging()
+
+
+class TestGetLogger:
+    """Tests pour get_logger."""
+
+    def test_logger_is_memoized_until_setup(self, production):
+        """Le même logger est renvoyé pour un nom, jusqu'à la reconfiguration."""
+        first = get_logger("memo")
+
+        assert get_logger("memo") is first
+        setup_logging()
+        assert get_logger("memo") is not first
+
+
+class TestLoggerMixin:
+    """Tests pour LoggerMixin."""
+
+    def test_logger_is_created_once_per_class(self):
+        """Chaque sous-classe a son logger, partagé par ses instances."""
+
+        class First(LoggerMixin):
+            pass
+
+        class Second(First):
+            pass
+
+        assert First().logger is First().logger
+        assert Second.logger is not First.logger
+        assert Second.logger._logger_factory_args == ("Second",)
+
+
+class TestLogFunctionCall:
+    """Tests pour log_function_call."""
+
+    def test_skipped_when_debug_disabled(self, monkeypatch):
+        """Au-dessus de DEBUG, rien n'est construit ni loggé."""
+        logger = Mock()
+        logger.is_enabled_for.return_value = False
+        monkeypatch.setattr(logging_config, "_function_call_logger", logger)
+
+        log_function_call("embed_text", text_length=500)
+
+        logger.is_enabled_for.assert_called_once_with(logging.DEBUG)
+        logger.debug.assert_not_called()
+
+    def test_parameters_logged_at_debug(self, production, capsysbinary):
+        """En DEBUG, les paramètres privés (_x) sont exclus."""
+        production.log_level = "DEBUG"
+        setup_logging()
+
+        log_function_call("embed_text", text_length=500, _secret="x")
+
+        line = json.loads(capsysbinary.readouterr().out.splitlines()[-1])
+        assert line["function"] == "embed_text"
+        assert line["parameters"] == {"text_length": 500}
@@ -7,11 +7,13 @@ Tests unitaires pour le module de métriques Prometheus.
 
 import pytest
 
+from src.utils import metrics
 from src.utils.metrics import (
     record_api_request,
     record_llm_request,
     record_circuit_breaker_state,
     record_rag_search,
+    record_embedding_batch,
     _normalize_endpoint,
 )
 
@@ -25,6 +27,15 @@ class TestMetricsRecording:
         record_api_request("GET", "/api/v1/query", 200, 0.5)
         record_api_request("POST", "/api/v1/query", 500, 1.2)
 
+    def test_record_embedding_batch(self):
+        """Test le comptage des textes dédupliqués par embed_batch."""
+        counter = metrics.embedding_texts_total
+        before = counter.labels(result="deduplicated")._value.get()
+
+        record_embedding_batch(total=5, unique=3)
+
+        assert counter.labels(result="deduplicated")._value.get() == before + 2
+
     def test_record_llm_request_success(self):
         """Test l'enregistrement d'une requête LLM réussie."""
         record_llm_request(
@@ -63,26 +74,18 @@ class TestMetricsRecording:
 class TestEndpointNormalization:
     """Tests pour la normalisation des endpoints."""
 
-    def test_normalize_uuid(self):
-        """Test la normalisation des UUIDs."""
-        endpoint = "/api/v1/keys/550e8400-e29b-41d4-a716-446655440000"
-        normalized = _normalize_endpoint(endpoint)
-        assert normalized == "/api/v1/keys/{id}"
-
-    def test_normalize_numeric_id(self):
-        """Test la normalisation des IDs numériques."""
-        endpoint = "/api/v1/documents/12345"
-        normalized = _normalize_endpoint(endpoint)
-        assert normalized == "/api/v1/documents/{id}"
-
-    def test_normalize_no_id(self):
-        """Test qu'un endpoint sans ID reste inchangé."""
-        endpoint = "/api/v1/query"
-        normalized = _normalize_endpoint(endpoint)
-        assert normalized == "/api/v1/query"
-
-    def test_normalize_health(self):
-        """Test que /health reste inchangé."""
-        endpoint = "/health"
-        normalized = _normalize_endpoint(endpoint)
-        assert normalized == "/health"
+    @pytest.mark.parametrize(
+        ("endpoint", "expected"),
+        [
+            ("/api/v1/keys/550e8400-e29b-41d4-a716-446655440000", "/api/v1/keys/{id}"),
+            ("/api/v1/keys/550E8400-E29B-41D4-A716-446655440000", "/api/v1/keys/{id}"),
+            ("/api/v1/documents/12345", "/api/v1/documents/{id}"),
+            ("/api/v1/agents/42/documents/7", "/api/v1/agents/{id}/documents/{id}"),
+            ("/api/v1/query", "/api/v1/query"),
+            ("/health", "/health"),
+        ],
+        ids=["uuid", "uuid_uppercase", "numeric_id", "numeric_ids", "no_id", "health"],
+    )
+    def test_normalize(self, endpoint, expected):
+        """Les UUIDs et IDs numériques sont remplacés par {id}."""
+        assert _normalize_endpoint(endpoint) == expected
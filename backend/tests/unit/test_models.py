@@ -2,9 +2,10 @@
 Tests unitaires pour les modèles.
 """
 
+import hashlib
 import pytest
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timezone
 
 from src.models.document import (
     Document,
@@ -46,6 +47,46 @@ class TestDocumentModels:
         )
         
         assert doc.content == "Texte avec espaces multiples"
+
+    @pytest.mark.parametrize(
+        "content, expected",
+        [
+            ("Texte déjà propre", "Texte déjà propre"),
+            ("Ligne 1\nLigne 2\tfin", "Ligne 1 Ligne 2 fin"),
+            ("Espace\xa0insécable", "Espace insécable"),
+            (" bord", "bord"),
+        ],
+    )
+    def test_document_create_cleans_all_whitespace(self, content, expected):
+        """Test que tous les blancs Unicode sont normalisés."""
+        doc = DocumentCreate(content=content, source_type=SourceType.PDF)
+
+        assert doc.content == expected
+    
+    def test_document_compute_hash(self):
+        """Test que le hash est identique pour le texte et ses bytes UTF-8."""
+        content = "Contenu à dédupliquer"
+
+        digest = Document.compute_hash(content)
+
+        assert len(digest) == 64
+        assert Document.compute_hash(content.encode("utf-8")) == digest
+        assert Document.compute_hash(memoryview(content.encode("utf-8"))) == digest
+
+    def test_document_compute_hash_long_content(self):
+        """Test que le hash par tranches égale le SHA-256 du texte complet."""
+        content = "Résumé é" * 20_000
+
+        expected = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+        assert Document.compute_hash(content) == expected
+    
+    def test_document_timestamps_default_to_utc(self):
+        """Test que les horodatages par défaut sont en UTC (aware)."""
+        doc = Document(id=uuid4(), content="Texte", source_type=SourceType.PDF)
+
+        assert doc.created_at.tzinfo is timezone.utc
+        assert doc.updated_at.tzinfo is timezone.utc
     
     def test_document_metadata_defaults(self):
         """Test les valeurs par défaut des métadonnées."""
@@ -3,8 +3,10 @@ Tests unitaires pour l'orchestrateur de routage intelligent.
 """
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
 import asyncio
+import time
+from dataclasses import FrozenInstanceError, replace
+from types import SimpleNamespace
 
 from src.services.orchestrator import (
     QueryOrchestrator,
@@ -86,6 +88,14 @@ class TestRoutingDecision:
         )
         
         assert decision.should_use_web is True
+    
+    def test_routing_decision_uses_slots(self):
+        """RoutingDecision n'a pas de __dict__ par instance."""
+        decision = RoutingDecision(intent=QueryIntent.GENERAL)
+        
+        assert not hasattr(decision, "__dict__")
+        with pytest.raises(AttributeError):
+            decision.unknown_field = True
 
 
 class TestOrchestratorConfig:
@@ -113,6 +123,15 @@ class TestOrchestratorConfig:
         assert config.enable_smart_routing is False
         assert config.cache_ttl_seconds == 60
         assert config.router_timeout_ms == 1000
+    
+    def test_default_config_is_shared_and_frozen(self):
+        """Les orchestrateurs sans config partagent une config par défaut immuable."""
+        first = QueryOrchestrator()
+        second = QueryOrchestrator()
+        
+        assert first.config is second.config
+        with pytest.raises(FrozenInstanceError):
+            first.config.cache_ttl_seconds = 1
 
 
 class TestQueryOrchestratorQuickDetection:
@@ -164,6 +183,21 @@ class TestQueryOrchestratorQuickDetection:
             # Accepte WEB_SEARCH ou HYBRID
             assert decision.use_web is True, f"Failed for: {query}"
     
+    @pytest.mark.parametrize("use_automaton", [True, False], ids=["automaton", "fallback"])
+    def test_quick_detect_priorities(self, orchestrator, use_automaton):
+        """Salutation > documents > web, avec ou sans automate Aho-Corasick."""
+        if not use_automaton:
+            orchestrator._keyword_automaton = None
+        
+        assert orchestrator._quick_detect("bonjour, mon cv").intent == QueryIntent.GREETING
+        assert orchestrator._quick_detect("mon cv récemment").intent == QueryIntent.DOCUMENTS
+        assert orchestrator._quick_detect("quoi de neuf récemment").intent == QueryIntent.WEB_SEARCH
+        assert orchestrator._quick_detect("explique la relativité") is None
+    
+    def test_greeting_must_start_query(self, orchestrator):
+        """Une salutation au milieu de la requête n'est pas détectée."""
+        assert orchestrator._quick_detect("dis bonjour à ma mère") is None
+    
     @pytest.mark.asyncio
     async def test_force_rag_override(self, orchestrator):
         """Test du forçage RAG."""
@@ -195,32 +229,64 @@ class TestQueryOrchestratorQuickDetection:
         assert decision.use_reflection is True
 
 
+class _FakeResponse:
+    """Réponse LLM minimale (attribut content)."""
+    
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _FakeProvider:
+    """Provider LLM factice: renvoie `content` ou lève `error`."""
+    
+    def __init__(self):
+        self.content = ""
+        self.error: Exception | None = None
+        self.delay = 0.0
+        self.calls = 0
+    
+    async def generate(self, messages, **kwargs):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return _FakeResponse(self.content)
+
+
+class _FakeFactory:
+    """Factory LLM factice retournant toujours le même provider."""
+    
+    def __init__(self, provider: _FakeProvider):
+        self.provider = provider
+        self.calls = 0
+    
+    def get_provider(self, *args, **kwargs):
+        self.calls += 1
+        return self.provider
+
+
 class TestQueryOrchestratorSmartRouting:
     """Tests pour le routage intelligent via LLM."""
     
     @pytest.fixture
-    def orchestrator_with_mock_llm(self):
-        """Créer un orchestrateur avec LLM mocké."""
+    def orchestrator_with_fake_llm(self):
+        """Créer un orchestrateur avec un LLM factice."""
         config = OrchestratorConfig(enable_smart_routing=True)
         orchestrator = QueryOrchestrator(config)
         
-        # Mocker le factory LLM
-        orchestrator._factory = Mock()
-        mock_provider = Mock()
-        mock_provider.generate = AsyncMock()
-        orchestrator._factory.get_provider.return_value = mock_provider
+        provider = _FakeProvider()
+        orchestrator._factory = _FakeFactory(provider)
         
-        return orchestrator, mock_provider
+        return orchestrator, provider
     
     @pytest.mark.asyncio
-    async def test_smart_routing_parses_json_response(self, orchestrator_with_mock_llm):
+    async def test_smart_routing_parses_json_response(self, orchestrator_with_fake_llm):
         """Test du parsing de la réponse JSON du routeur."""
-        orchestrator, mock_provider = orchestrator_with_mock_llm
+        orchestrator, provider = orchestrator_with_fake_llm
         
         # Simuler une réponse JSON du LLM
-        mock_response = Mock()
-        mock_response.content = '{"intent": "documents", "use_rag": true, "use_web": false, "reasoning": "User wants their docs"}'
-        mock_provider.generate.return_value = mock_response
+        provider.content = '{"intent": "documents", "use_rag": true, "use_web": false, "reasoning": "User wants their docs"}'
         
         decision = await orchestrator.route("Quels sont mes projets GitHub?")
         
@@ -228,32 +294,150 @@ class TestQueryOrchestratorSmartRouting:
         assert decision.intent in QueryIntent
     
     @pytest.mark.asyncio
-    async def test_smart_routing_fallback_on_invalid_json(self, orchestrator_with_mock_llm):
+    async def test_smart_routing_fallback_on_invalid_json(self, orchestrator_with_fake_llm):
         """Test du fallback si JSON invalide."""
-        orchestrator, mock_provider = orchestrator_with_mock_llm
+        orchestrator, provider = orchestrator_with_fake_llm
         
         # Simuler une réponse invalide
-        mock_response = Mock()
-        mock_response.content = "Je ne suis pas sûr de comprendre."
-        mock_provider.generate.return_value = mock_response
+        provider.content = "Je ne suis pas sûr de comprendre."
         
         decision = await orchestrator.route("Question quelconque")
         
         # Doit retourner une décision valide
         assert decision.intent in [QueryIntent.HYBRID, QueryIntent.GENERAL]
     
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '```json\n{"intent": "documents", "use_rag": true}\n```',
+            'Voici ma réponse : {"intent": "documents", "use_rag": true} voilà.',
+            '{invalide} puis {"intent": "documents", "use_rag": true}',
+        ],
+        ids=["code-fence", "surrounding-text", "after-invalid-object"],
+    )
+    def test_parse_router_response_extracts_json(self, orchestrator_with_fake_llm, content):
+        """Le JSON est extrait d'une réponse bruitée."""
+        orchestrator, _ = orchestrator_with_fake_llm
+        
+        decision = orchestrator._parse_router_response(content)
+        
+        assert decision.intent == QueryIntent.DOCUMENTS
+        assert decision.use_rag is True
+    
     @pytest.mark.asyncio
-    async def test_smart_routing_fallback_on_exception(self, orchestrator_with_mock_llm):
+    async def test_smart_routing_fallback_on_exception(self, orchestrator_with_fake_llm):
         """Test du fallback en cas d'exception."""
-        orchestrator, mock_provider = orchestrator_with_mock_llm
+        orchestrator, provider = orchestrator_with_fake_llm
         
         # Simuler une exception
-        mock_provider.generate.side_effect = Exception("API error")
+        provider.error = Exception("API error")
         
         decision = await orchestrator.route("Question quelconque")
         
         # Doit utiliser le fallback
         assert decision.intent in QueryIntent
+    
+    @pytest.mark.asyncio
+    async def test_router_provider_resolved_once(self, orchestrator_with_fake_llm):
+        """Le provider du routeur n'est résolu qu'une fois."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        provider.content = '{"intent": "general"}'
+        
+        await orchestrator.route("Première question")
+        await orchestrator.route("Deuxième question")
+        
+        assert orchestrator._factory.calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_queries_share_router_call(self, orchestrator_with_fake_llm):
+        """Des requêtes identiques concurrentes partagent un seul appel au routeur."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        
+        provider.content = '{"intent": "general"}'
+        provider.delay = 0.01
+        
+        decisions = await asyncio.gather(
+            orchestrator.route("Question quelconque"),
+            orchestrator.route("question quelconque", force_rag=True),
+        )
+        
+        assert provider.calls == 1
+        assert decisions[0] is not decisions[1]
+        assert decisions[0].force_rag is False
+        assert decisions[1].force_rag is True
+        assert orchestrator._router_inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_router_batches_concurrent_queries(self, orchestrator_with_fake_llm):
+        """Les requêtes d'une même fenêtre partagent un seul appel au routeur."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        orchestrator.config = replace(orchestrator.config, router_batch_window_ms=20)
+        
+        provider.content = (
+            '[{"intent": "documents", "use_rag": true},'
+            ' {"intent": "web_search", "use_web": true},'
+            ' {"intent": "general"}]'
+        )
+        
+        decisions = await asyncio.gather(
+            orchestrator.route("Question A"),
+            orchestrator.route("Question B"),
+            orchestrator.route("Question C"),
+        )
+        
+        assert provider.calls == 1
+        assert [d.intent for d in decisions] == [
+            QueryIntent.DOCUMENTS,
+            QueryIntent.WEB_SEARCH,
+            QueryIntent.GENERAL,
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_router_batch_falls_back_to_single_calls(self, orchestrator_with_fake_llm):
+        """Une réponse de lot invalide déclenche un appel par requête."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        orchestrator.config = replace(orchestrator.config, router_batch_window_ms=20)
+        
+        provider.content = '{"intent": "documents", "use_rag": true}'
+        
+        decisions = await asyncio.gather(
+            orchestrator.route("Question A"),
+            orchestrator.route("Question B"),
+        )
+        
+        assert provider.calls == 3
+        assert all(d.intent == QueryIntent.DOCUMENTS for d in decisions)
+    
+    @pytest.mark.asyncio
+    async def test_router_batch_propagates_errors(self, orchestrator_with_fake_llm):
+        """Une erreur du routeur en lot mène au fallback pour chaque requête."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        orchestrator.config = replace(orchestrator.config, router_batch_window_ms=20)
+        provider.error = Exception("API error")
+        
+        decisions = await asyncio.gather(
+            orchestrator.route("Question A"),
+            orchestrator.route("Question B"),
+        )
+        
+        assert all(d.intent == QueryIntent.HYBRID for d in decisions)
+    
+    @pytest.mark.asyncio
+    async def test_router_batches_are_per_event_loop(self, orchestrator_with_fake_llm):
+        """Chaque boucle (ex: boucle de fond de RAGEngine.query) a son propre lot."""
+        orchestrator, provider = orchestrator_with_fake_llm
+        orchestrator.config = replace(orchestrator.config, router_batch_window_ms=50)
+        provider.content = '{"intent": "documents", "use_rag": true}'
+        
+        decisions = await asyncio.gather(
+            orchestrator.route("Question A"),
+            asyncio.to_thread(asyncio.run, orchestrator.route("Question B")),
+        )
+        
+        assert provider.calls == 2
+        assert all(d.intent == QueryIntent.DOCUMENTS for d in decisions)
+        assert orchestrator._router_pending == {}
+        assert orchestrator._router_flush_handle == {}
 
 
 class TestQueryOrchestratorCache:
@@ -283,6 +467,28 @@ class TestQueryOrchestratorCache:
         # Les décisions doivent être identiques
         assert decision1.intent == decision2.intent
     
+    def test_cache_evicts_least_recently_used(self):
+        """Le cache est borné et évince l'entrée la moins récemment utilisée."""
+        orchestrator = QueryOrchestrator(OrchestratorConfig(cache_max_entries=2))
+        decision = RoutingDecision(intent=QueryIntent.GENERAL)
+        
+        orchestrator._cache_decision("a", decision)
+        orchestrator._cache_decision("b", decision)
+        orchestrator._get_cached_decision("a")
+        orchestrator._cache_decision("c", decision)
+        
+        assert list(orchestrator._decision_cache) == ["a", "c"]
+    
+    def test_expired_entry_is_dropped(self, orchestrator):
+        """Une entrée expirée n'est pas retournée et est supprimée."""
+        orchestrator._decision_cache["old"] = (
+            RoutingDecision(intent=QueryIntent.GENERAL),
+            time.monotonic() - 60,
+        )
+        
+        assert orchestrator._get_cached_decision("old") is None
+        assert "old" not in orchestrator._decision_cache
+    
     def test_clear_cache(self, orchestrator):
         """Test du nettoyage du cache."""
         # Ajouter une entrée au cache
@@ -313,6 +519,25 @@ class TestGetOrchestrator:
         orch = get_orchestrator()
         
         assert isinstance(orch, QueryOrchestrator)
+    
+    def test_cache_clear_resets_singleton(self):
+        """cache_clear() force la création d'une nouvelle instance."""
+        orch1 = get_orchestrator()
+        get_orchestrator.cache_clear()
+        
+        assert get_orchestrator() is not orch1
+    
+    def test_batch_window_comes_from_settings(self, monkeypatch):
+        """La fenêtre de micro-batching du singleton vient de ROUTER_BATCH_WINDOW_MS."""
+        monkeypatch.setattr(
+            "src.services.orchestrator.get_settings",
+            lambda: SimpleNamespace(router_batch_window_ms=15),
+        )
+        get_orchestrator.cache_clear()
+        try:
+            assert get_orchestrator().config.router_batch_window_ms == 15
+        finally:
+            get_orchestrator.cache_clear()
 
 
 # Tests de performance
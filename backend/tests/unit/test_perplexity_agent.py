@@ -0,0 +1,218 @@
+"""
+Tests unitaires pour l'agent Perplexity.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import time
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from src.agents import perplexity_agent as perplexity_module
+from src.agents.perplexity_agent import PerplexityAgent
+
+
+def _completion(request: httpx.Request) -> httpx.Response:
+    """Réponse factice de l'API Perplexity (vérifie le corps JSON envoyé)."""
+    payload = json.loads(request.content)
+    assert request.headers["Content-Type"] == "application/json"
+    assert payload["messages"][-1]["role"] == "user"
+    return httpx.Response(
+        200,
+        json={
+            "choices": [{"message": {"content": "Réponse"}}],
+            "citations": ["https://example.com"],
+            "usage": {"total_tokens": 42},
+        },
+    )
+
+
+class TestPerplexityAgent:
+    """Tests pour PerplexityAgent."""
+
+    @pytest.fixture
+    def agent(self, monkeypatch):
+        """Agent activé dont le client HTTP passe par un transport factice."""
+        clients = []
+        requests = []
+        real_client = httpx.AsyncClient
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(json.loads(request.content))
+            return _completion(request)
+
+        def make_client(**kwargs):
+            client = real_client(transport=httpx.MockTransport(handler), **kwargs)
+            clients.append(client)
+            return client
+
+        monkeypatch.setattr(perplexity_module.httpx, "AsyncClient", make_client)
+        with patch("src.agents.perplexity_agent.get_settings") as mock:
+            mock.return_value = Mock(perplexity_api_key="pplx-test")
+            agent = PerplexityAgent()
+        agent.clients = clients
+        agent.requests = requests
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused_between_searches(self, agent):
+        """Le client HTTP (et ses connexions) est partagé entre les recherches."""
+        first = await agent.search("Question 1")
+        second = await agent.search("Question 2")
+
+        assert first.content == "Réponse"
+        assert first.sources == ["https://example.com"]
+        assert second.tokens_used == 42
+        assert len(agent.clients) == 1
+        assert agent.clients[0].headers["Authorization"] == "Bearer pplx-test"
+
+        await agent.aclose()
+        assert agent.clients[0].is_closed
+
+    @pytest.mark.asyncio
+    async def test_search_after_aclose_opens_new_client(self, agent):
+        """Une recherche après aclose recrée un client."""
+        await agent.search("Question 1")
+        await agent.aclose()
+        await agent.search("Question 2")
+
+        assert len(agent.clients) == 2
+        await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_asearch_many_shares_one_client(self, agent):
+        """Les recherches groupées passent toutes par le même client."""
+        results = await agent.asearch_many(["Q1", "Q2", "Q3"])
+
+        assert [r.content for r in results] == ["Réponse"] * 3
+        assert len(agent.clients) == 1
+        await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_asearch_many_respects_max_concurrency(self, agent):
+        """Pas plus de max_concurrency requêtes en vol."""
+        in_flight = 0
+        peak = 0
+
+        async def slow_search(query, system_prompt=None, max_tokens=1024):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return query
+
+        agent._max_concurrency = 2
+        agent.search = slow_search
+
+        assert await agent.asearch_many(["a", "b", "c", "d"]) == ["a", "b", "c", "d"]
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_repeated_search_is_served_from_cache(self, agent):
+        """Une recherche identique est servie par le cache, sans requête HTTP."""
+        first = await agent.search("Question")
+        second = await agent.search("Question")
+        await agent.search("Question", max_tokens=256)
+
+        assert second == first and second is not first
+        assert len(agent.requests) == 2  # max_tokens fait partie de la clé
+        await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_searches_share_one_call(self, agent):
+        """Les recherches identiques simultanées partagent un seul appel."""
+        results = await asyncio.gather(*(agent.search("Question") for _ in range(5)))
+
+        assert all(r.content == "Réponse" for r in results)
+        assert len(agent.requests) == 1
+        assert agent._inflight == {}
+        await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cache_expires_and_skips_failures(self, agent):
+        """Les échecs ne sont pas mis en cache et les entrées expirent."""
+        async def failing(*args):
+            return None
+
+        with patch.object(agent, "_search_uncached", failing):
+            assert await agent.search("Question") is None
+        assert agent._result_cache == {}
+
+        await agent.search("Question")
+        key = next(iter(agent._result_cache))
+        result, _ = agent._result_cache[key]
+        agent._result_cache[key] = (
+            result, time.monotonic() - perplexity_module.SEARCH_CACHE_TTL_SECONDS
+        )
+        await agent.search("Question")
+
+        assert len(agent.requests) == 2
+        await agent.aclose()
+
+    def test_search_sync_without_running_loop(self, agent):
+        """search_sync fonctionne depuis du code synchrone."""
+        result = agent.search_sync("Question")
+
+        assert result.content == "Réponse"
+        self._close_on_background_loop(agent)
+
+    @pytest.mark.asyncio
+    async def test_search_sync_inside_running_loop(self, agent):
+        """search_sync ne réutilise pas la boucle en cours de l'appelant."""
+        result = agent.search_sync("Question")
+
+        assert result.content == "Réponse"
+        self._close_on_background_loop(agent)
+
+    @pytest.mark.asyncio
+    async def test_each_loop_keeps_its_client(self, agent):
+        """Alterner search et search_sync ne recrée pas le client à chaque appel."""
+        await agent.search("Question 1")
+        agent.search_sync("Question 2")
+        await agent.search("Question 3")
+        agent.search_sync("Question 4")
+
+        assert len(agent.clients) == 2
+
+        # aclose ferme aussi le client de la boucle d'arrière-plan, sur sa boucle
+        await agent.aclose()
+        deadline = time.monotonic() + 5
+        while not all(c.is_closed for c in agent.clients) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        assert all(c.is_closed for c in agent.clients)
+
+    def test_client_of_closed_loop_is_dropped(self, agent):
+        """Le client d'une boucle fermée n'est plus référencé."""
+        asyncio.run(agent.search("Question 1"))
+        asyncio.run(agent.search("Question 2"))
+
+        assert len(agent.clients) == 2
+        assert list(agent._clients.values()) == [agent.clients[1]]
+
+    def test_cache_is_thread_safe(self, agent, monkeypatch):
+        """Lectures et écritures concurrentes du cache depuis plusieurs threads."""
+        monkeypatch.setattr(perplexity_module, "SEARCH_CACHE_MAX_ENTRIES", 8)
+        result = perplexity_module.WebSearchResult("Réponse", [], "sonar", 0)
+
+        def hammer(offset: int) -> None:
+            for i in range(2000):
+                key = ("sonar", None, f"Q{(offset + i) % 16}", 1024)
+                agent._cache_result(key, result)
+                agent._get_cached_result(key)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(hammer, range(4)))
+
+        assert len(agent._result_cache) <= 8
+
+    @staticmethod
+    def _close_on_background_loop(agent):
+        """Ferme le client créé sur la boucle d'arrière-plan."""
+        future = asyncio.run_coroutine_threadsafe(
+            agent.aclose(), perplexity_module._get_background_loop()
+        )
+        future.result(timeout=5)
@@ -2,12 +2,17 @@
 Tests unitaires pour les providers.
 """
 
+import json
+
+import ijson
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 
 from src.providers.base import BaseProvider, ExtractedContent
 from src.providers.github_provider import GithubProvider
+from src.providers import linkedin_provider
+from src.providers.linkedin_provider import LinkedInProvider
 from src.providers.pdf_provider import PDFProvider
 from src.models.document import SourceType
 
@@ -27,6 +32,14 @@ class TestExtractedContent:
         assert content.source_id == "test:123"
         assert content.metadata["title"] == "Test"
 
+    def test_extracted_content_uses_slots(self):
+        """Test que les instances n'ont pas de __dict__ (slots)."""
+        content = ExtractedContent(content="Test", source_id="test:1", metadata={})
+
+        assert not hasattr(content, "__dict__")
+        content.source_id = "test:2"
+        assert content.source_id == "test:2"
+
 
 class TestGithubProvider:
     """Tests pour GithubProvider."""
@@ -120,6 +133,133 @@ class TestPDFProvider:
         with pytest.raises(ValueError, match="Not a PDF"):
             list(provider.extract(str(txt_file)))
 
+    @staticmethod
+    def _make_pdf(path: Path) -> Path:
+        """Génère un PDF de 2 pages ressemblant à un CV."""
+        import fitz
+
+        with fitz.open() as doc:
+            for text in (
+                "Curriculum Vitae - Expérience professionnelle chez ACME depuis 2020",
+                "Formation et compétences: Python, FastAPI, PostgreSQL, Supabase",
+            ):
+                page = doc.new_page()
+                page.insert_text((72, 72), text)
+            doc.save(str(path))
+        return path
+
+    def test_extract_full_document(self, tmp_path):
+        """Test extraction complète avec détection de CV."""
+        pdf = self._make_pdf(tmp_path / "cv.pdf")
+        provider = PDFProvider()
+
+        [extracted] = list(provider.extract(str(pdf)))
+
+        assert "ACME" in extracted.content and "FastAPI" in extracted.content
+        assert extracted.source_id == "pdf:cv.pdf"
+        assert extracted.metadata["extra"]["is_cv"] is True
+        assert extracted.metadata["extra"]["pages"] == 2
+
+    def test_extract_by_page(self, tmp_path):
+        """Test extraction page par page."""
+        pdf = self._make_pdf(tmp_path / "cv.pdf")
+        provider = PDFProvider(chunk_by_page=True, min_content_length=10)
+
+        pages = list(provider.extract(str(pdf)))
+
+        assert [p.source_id for p in pages] == ["pdf:cv.pdf:page_1", "pdf:cv.pdf:page_2"]
+        assert pages[1].metadata["extra"]["page_number"] == 2
+        assert pages[0].metadata["extra"]["is_cv"] is True
+
+    def test_extract_from_bytes(self, tmp_path):
+        """Test extraction depuis des bytes (upload)."""
+        pdf = self._make_pdf(tmp_path / "cv.pdf")
+        provider = PDFProvider()
+
+        [extracted] = list(provider.extract_from_bytes(pdf.read_bytes(), "cv.pdf"))
+
+        assert extracted.source_id == "pdf:upload:cv.pdf"
+        assert extracted.metadata["extra"]["pages"] == 2
+
+
+class TestLinkedInProvider:
+    """Tests pour LinkedInProvider."""
+
+    EXPORT = {
+        "Profile": {"firstName": "Ada", "lastName": "Lovelace", "headline": "Ingénieure"},
+        "Messages": [{"body": "ignoré"}],
+        "Positions": [
+            {"title": "CTO", "companyName": "Acme", "startDate": "2020"},
+            {"title": "Dev", "companyName": "Initech", "startDate": "2018", "endDate": "2020"},
+        ],
+        "Skills": [{"name": "Python"}, {"name": ""}, {"name": "SQL"}],
+    }
+
+    @pytest.fixture
+    def export_path(self, tmp_path):
+        """Export JSON LinkedIn sur disque."""
+        path = tmp_path / "export.json"
+        path.write_text(json.dumps(self.EXPORT), encoding="utf-8")
+        return path
+
+    def test_extract_json(self, export_path):
+        """Test extraction des sections d'un export JSON."""
+        results = list(LinkedInProvider().extract(str(export_path)))
+
+        assert [r.source_id for r in results] == [
+            "linkedin:export:profile",
+            "linkedin:export:positions",
+            "linkedin:export:skills",
+        ]
+        assert "## CTO @ Acme" in results[1].content
+        assert results[1].metadata["extra"]["count"] == 2
+        assert results[2].metadata["extra"]["skills"] == ["Python", "SQL"]
+
+    def test_sections_fill_missing_fields(self):
+        """Test des valeurs par défaut des champs absents."""
+        provider = LinkedInProvider()
+        positions = next(provider._extract_positions([{"title": "CTO"}], "a"))
+        education = next(provider._extract_education([{"schoolName": "EPFL"}], "a"))
+
+        assert "## CTO @ \n**Période**:  - Présent" in positions.content
+        assert education.content == (
+            "# Formation\n\n\n## EPFL\n**Diplôme**: \n**Domaine**: \n"
+        )
+
+    def test_extract_json_streaming_matches_full_parse(self, export_path, monkeypatch):
+        """Test que le parsing en streaming produit les mêmes sections."""
+        full = list(LinkedInProvider().extract(str(export_path)))
+        monkeypatch.setattr(linkedin_provider, "STREAMING_MIN_BYTES", 0)
+        streamed = list(LinkedInProvider().extract(str(export_path)))
+
+        assert streamed == full
+
+    @pytest.mark.parametrize("streaming_min_bytes", [linkedin_provider.STREAMING_MIN_BYTES, 0])
+    def test_extract_json_skips_empty_sections(self, tmp_path, monkeypatch, streaming_min_bytes):
+        """Test que les sections vides ne produisent aucun contenu."""
+        monkeypatch.setattr(linkedin_provider, "STREAMING_MIN_BYTES", streaming_min_bytes)
+        path = tmp_path / "empty.json"
+        path.write_text(
+            json.dumps({"Profile": {}, "Positions": [], "Skills": [{"name": "Go"}]}),
+            encoding="utf-8",
+        )
+
+        results = list(LinkedInProvider().extract(str(path)))
+
+        assert [r.source_id for r in results] == ["linkedin:empty:skills"]
+
+    def test_extract_invalid_json(self, tmp_path, monkeypatch):
+        """Test qu'un JSON invalide lève une erreur, avec ou sans streaming."""
+        path = tmp_path / "broken.json"
+        path.write_text('{"Profile": {', encoding="utf-8")
+
+        with pytest.raises(json.JSONDecodeError):
+            list(LinkedInProvider().extract(str(path)))
+
+        monkeypatch.setattr(linkedin_provider, "STREAMING_MIN_BYTES", 0)
+        with pytest.raises(ijson.JSONError):
+            list(LinkedInProvider().extract(str(path)))
+
 
 class TestBaseProvider:
     """Tests pour BaseProvider."""
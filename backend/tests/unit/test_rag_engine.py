@@ -0,0 +1,208 @@
+"""
+Tests unitaires pour la récupération de contexte du RAG.
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from src.agents.perplexity_agent import WebSearchResult
+from src.services.rag.config import RAGConfig
+from src.services.rag.engine import RAGEngine
+from src.services.rag.generator import RAGGenerator
+from src.services.rag.retriever import RAGRetriever, RetrievalResult
+from src.utils.background_loop import get_background_loop
+
+
+class TestRAGRetriever:
+    """Tests pour RAGRetriever."""
+
+    @pytest.mark.asyncio
+    async def test_vector_search_does_not_block_event_loop(self):
+        """Embedding asynchrone, recherche Supabase (synchrone) dans un thread."""
+        retriever = RAGRetriever.__new__(RAGRetriever)
+        retriever.config = RAGConfig()
+        threads = []
+
+        def search_similar(query_embedding, **kwargs):
+            threads.append(threading.current_thread())
+            return []
+
+        retriever._embedding_service = MagicMock()
+        retriever._embedding_service.aembed_query = AsyncMock(return_value=[0.1] * 3)
+        retriever._document_repo = MagicMock(search_similar=search_similar)
+
+        result = await retriever.search_vector_store("Question", user_id="user_1")
+
+        assert result.context == ""
+        retriever._embedding_service.aembed_query.assert_awaited_once_with("Question")
+        retriever._embedding_service.embed_query.assert_not_called()
+        assert threads and threads[0] is not threading.main_thread()
+
+
+class TestRAGEngineSearches:
+    """Tests pour le lancement des recherches du RAGEngine."""
+
+    @pytest.fixture
+    def engine(self):
+        """Engine dont le retriever simule deux recherches lentes."""
+        engine = RAGEngine.__new__(RAGEngine)
+        retriever = MagicMock()
+
+        async def search_vector_store(question, user_id, api_key_id):
+            await asyncio.sleep(0.05)
+            return RetrievalResult(context="Contexte", sources=[])
+
+        async def search_web(question):
+            await asyncio.sleep(0.05)
+            return WebSearchResult(content="Web", sources=[], model="sonar", tokens_used=0)
+
+        retriever.search_vector_store = search_vector_store
+        retriever.search_web = search_web
+        engine._retriever = retriever
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_searches_run_concurrently(self, engine):
+        """Les recherches vectorielle et web se chevauchent."""
+        routing = SimpleNamespace(should_use_rag=True, should_use_web=True)
+
+        start = time.perf_counter()
+        vector_task, web_task = engine._start_searches(routing, "Question", None, None)
+        result, web_result = await asyncio.gather(vector_task, web_task)
+        elapsed = time.perf_counter() - start
+
+        assert result.context == "Contexte"
+        assert web_result.content == "Web"
+        assert elapsed < 0.09
+
+    @pytest.mark.asyncio
+    async def test_skipped_searches_are_not_started(self, engine):
+        """Une recherche non requise par le routage n'est pas lancée."""
+        routing = SimpleNamespace(should_use_rag=False, should_use_web=True)
+
+        vector_task, web_task = engine._start_searches(routing, "Question", None, None)
+
+        assert vector_task is None
+        assert (await web_task).content == "Web"
+
+
+class TestRAGEngineGeneration:
+    """Tests pour la génération du RAGEngine."""
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_is_sent_once(self):
+        """Le prompt système n'est envoyé qu'une fois, en premier message."""
+        engine = RAGEngine.__new__(RAGEngine)
+        engine.config = RAGConfig()
+        engine._orchestrator = MagicMock()
+        engine._orchestrator.route = AsyncMock(
+            return_value=SimpleNamespace(
+                intent=SimpleNamespace(value="general"),
+                should_use_rag=False,
+                should_use_web=False,
+                use_reflection=False,
+                confidence=1.0,
+            )
+        )
+        engine._retriever = MagicMock()
+        engine._retriever.build_context.return_value = ""
+        provider = MagicMock()
+        provider.generate = AsyncMock(
+            return_value=SimpleNamespace(
+                content="Réponse",
+                tokens_input=10,
+                tokens_output=5,
+                model_used="mistral-small-latest",
+                thought_process=None,
+            )
+        )
+        engine._generator = RAGGenerator.__new__(RAGGenerator)
+        engine._generator.get_provider = MagicMock(return_value=(provider, "mistral"))
+
+        async def execute(provider_type, operation, fallback=None):
+            return await operation()
+
+        engine._breaker = SimpleNamespace(execute=execute)
+        engine._log_conversation = AsyncMock(return_value=None)
+
+        response = await engine.query_async("Bonjour")
+
+        assert response.answer == "Réponse"
+        (messages,), kwargs = provider.generate.call_args
+        assert kwargs == {}
+        assert [m["role"] for m in messages] == ["system", "user"]
+        assert messages[0]["content"] == RAGEngine.DEFAULT_SYSTEM_PROMPT
+
+
+class TestRAGEngineQuerySync:
+    """Tests pour RAGEngine.query (API synchrone)."""
+
+    @pytest.fixture
+    def engine(self):
+        """Engine dont query_async note la boucle utilisée."""
+        engine = RAGEngine.__new__(RAGEngine)
+        engine.loops = []
+        engine.log_traces = []
+
+        async def query_async(question, system_prompt=None, use_web=None, log_trace=True):
+            engine.loops.append(asyncio.get_running_loop())
+            engine.log_traces.append(log_trace)
+            if question == "Lente":
+                await asyncio.sleep(5)
+            return question
+
+        engine.query_async = query_async
+        return engine
+
+    def test_calls_share_background_loop(self, engine):
+        """Les appels successifs réutilisent la même boucle d'arrière-plan."""
+        assert engine.query("Q1") == "Q1"
+        assert engine.query("Q2") == "Q2"
+
+        assert engine.loops[0] is engine.loops[1] is get_background_loop()
+
+    @pytest.mark.asyncio
+    async def test_query_inside_running_loop(self, engine):
+        """query fonctionne depuis du code appelé dans une boucle en cours."""
+        assert engine.query("Q") == "Q"
+        assert engine.loops[0] is not asyncio.get_running_loop()
+        assert engine.log_traces == [False]
+
+    @pytest.mark.asyncio
+    async def test_query_times_out_inside_running_loop(self, engine):
+        """Au-delà du timeout, query lève TimeoutError et annule la requête."""
+        start = time.perf_counter()
+
+        with pytest.raises(TimeoutError):
+            engine.query("Lente", timeout=0.05)
+
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("log_trace", [True, False])
+    async def test_log_conversation_trace_is_optional(self, log_trace):
+        """La trace LLM n'est enregistrée que si log_trace (pas depuis query)."""
+        engine = RAGEngine.__new__(RAGEngine)
+        engine.config = RAGConfig()
+        engine._session_id = "session-1"
+        engine._conversation_repo = MagicMock()
+        engine._trace_service = MagicMock()
+
+        await engine._log_conversation(
+            "Question",
+            "Réponse",
+            [],
+            {"input": 1, "output": 1},
+            10,
+            user_id=str(uuid4()),
+            log_trace=log_trace,
+        )
+
+        engine._conversation_repo.log_conversation.assert_called_once()
+        assert engine._trace_service.log_success.called is log_trace
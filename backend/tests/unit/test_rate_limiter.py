@@ -2,68 +2,159 @@
 Tests unitaires pour le Rate Limiter.
 """
 
+from types import SimpleNamespace
+
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from redis.exceptions import ResponseError
+
+from src.services import rate_limiter as rate_limiter_module
 from src.services.rate_limiter import RateLimiter
 
+
+class _FakeScript:
+    """Script Lua factice: renvoie les compteurs fournis dans l'ordre."""
+
+    def __init__(self, *counts: int, error: Exception | None = None):
+        self.counts = list(counts)
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, keys=None, args=None, client=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.counts.pop(0)
+
+
+class _FakePipeline:
+    """Pipeline factice (INCRBY + EXPIRE)."""
+
+    def __init__(self, results: list):
+        self.results = results
+
+    def incrby(self, key, amount):
+        pass
+
+    def expire(self, key, ttl):
+        pass
+
+    async def execute(self):
+        return self.results
+
+
+class _FakeRedis:
+    """Client Redis factice exposant register_script et pipeline."""
+
+    def __init__(self, script: _FakeScript, pipeline_results: list | None = None):
+        self.script = script
+        self.pipeline_results = pipeline_results or []
+        self.registered = 0
+
+    def register_script(self, source: str) -> _FakeScript:
+        self.registered += 1
+        return self.script
+
+    def pipeline(self) -> _FakePipeline:
+        return _FakePipeline(self.pipeline_results)
+
+
 class TestRateLimiter:
     """Tests pour le service RateLimiter."""
-    
+
     @pytest.fixture
-    def limiter(self):
-        """Créer un RateLimiter avec settings mockés."""
-        with patch("src.services.rate_limiter.get_settings") as mock_settings:
-            settings = Mock()
-            settings.rate_limit_enabled = True
-            settings.rate_limit_requests = 100
-            settings.rate_limit_reflection = 2
-            mock_settings.return_value = settings
-            
-            limiter = RateLimiter()
-            limiter.settings = settings
-            return limiter
+    def limiter(self, monkeypatch):
+        """Créer un RateLimiter avec des settings factices."""
+        settings = SimpleNamespace(
+            rate_limit_enabled=True,
+            rate_limit_requests=100,
+            rate_limit_reflection=2,
+            rate_limit_local_lease=1,
+        )
+        monkeypatch.setattr(rate_limiter_module, "get_settings", lambda: settings)
+        return RateLimiter()
+
+    @pytest.fixture
+    def use_redis(self, monkeypatch):
+        """Installe un client Redis factice pour get_redis_client."""
+        def install(redis):
+            async def get_redis_client():
+                return redis
+            monkeypatch.setattr(rate_limiter_module, "get_redis_client", get_redis_client)
+            return redis
+        return install
 
     @pytest.mark.asyncio
-    async def test_reflection_limit_works(self, limiter):
+    async def test_reflection_limit_works(self, limiter, use_redis):
         """Vérifie que la limite de réflexion est respectée."""
-        with patch("src.services.rate_limiter.get_redis_client") as mock_redis_func:
-            mock_redis = AsyncMock()
-            mock_redis_func.return_value = mock_redis
-            
-            # Simuler Redis pipeline
-            mock_pipe = AsyncMock()
-            mock_redis.pipeline.return_value = mock_pipe
-            
-            # Premier appel (autorisé)
-            mock_pipe.execute.return_value = [1, True]
-            allowed, count, _ = await limiter.check_reflection_limit("user1")
-            assert allowed is True
-            assert count == 1
-            
-            # Deuxième appel (autorisé)
-            mock_pipe.execute.return_value = [2, True]
-            allowed, count, _ = await limiter.check_reflection_limit("user1")
-            assert allowed is True
-            assert count == 2
-            
-            # Troisième appel (bloqué, limite à 2 définie dans fixture)
-            mock_pipe.execute.return_value = [3, True]
-            allowed, count, retry = await limiter.check_reflection_limit("user1")
-            assert allowed is False
-            assert count == 3
-            assert retry > 0
+        redis = use_redis(_FakeRedis(_FakeScript(1, 2, 3)))
+
+        # Premier appel (autorisé)
+        allowed, count, _ = await limiter.check_reflection_limit("user1")
+        assert allowed is True
+        assert count == 1
+
+        # Deuxième appel (autorisé)
+        allowed, count, _ = await limiter.check_reflection_limit("user1")
+        assert allowed is True
+        assert count == 2
+
+        # Troisième appel (bloqué, limite à 2 définie dans fixture)
+        allowed, count, retry = await limiter.check_reflection_limit("user1")
+        assert allowed is False
+        assert count == 3
+        assert retry > 0
+
+        # Le script n'est enregistré qu'une fois par client
+        assert redis.registered == 1
+
+    @pytest.mark.asyncio
+    async def test_local_lease_skips_redis(self, limiter, use_redis):
+        """Une réservation locale admet plusieurs requêtes pour un seul appel Redis."""
+        limiter.settings.rate_limit_local_lease = 4
+        redis = use_redis(_FakeRedis(_FakeScript(4)))
+
+        results = [await limiter.is_allowed("test", limit=10) for _ in range(4)]
+
+        assert [count for _, count, _ in results] == [1, 2, 3, 4]
+        assert all(allowed for allowed, _, _ in results)
+        assert redis.script.calls == 1
+        assert limiter._leases == {}
+
+    @pytest.mark.asyncio
+    async def test_local_lease_never_exceeds_limit(self, limiter, use_redis):
+        """Une réservation partiellement hors limite n'accorde que le reste."""
+        limiter.settings.rate_limit_local_lease = 4
+        # Compteur 8 -> 12: seules les requêtes 9 et 10 sont dans la limite
+        use_redis(_FakeRedis(_FakeScript(12, 16)))
+
+        results = [await limiter.is_allowed("test", limit=10) for _ in range(3)]
+
+        assert [allowed for allowed, _, _ in results] == [True, True, False]
+        assert [count for _, count, _ in results][:2] == [9, 10]
+
+    @pytest.mark.asyncio
+    async def test_pipeline_fallback_without_scripting(self, limiter, use_redis):
+        """Vérifie le repli sur pipeline si Redis refuse les scripts."""
+        script = _FakeScript(error=ResponseError("unknown command 'EVALSHA'"))
+        use_redis(_FakeRedis(script, pipeline_results=[1, True]))
+
+        allowed, count, _ = await limiter.is_allowed("test")
+        assert allowed is True
+        assert count == 1
+        assert limiter._scripting_supported is False
 
     @pytest.mark.asyncio
     async def test_rate_limit_disabled(self, limiter):
         """Vérifie que le limiter ne bloque rien si désactivé."""
         limiter.settings.rate_limit_enabled = False
-        
+
         allowed, _, _ = await limiter.is_allowed("test")
         assert allowed is True
 
     @pytest.mark.asyncio
-    async def test_redis_unavailable_fallback(self, limiter):
+    async def test_redis_unavailable_fallback(self, limiter, use_redis):
         """Vérifie le fallback si Redis est HS."""
-        with patch("src.services.rate_limiter.get_redis_client", return_value=None):
-            allowed, _, _ = await limiter.is_allowed("test")
-            assert allowed is True
+        use_redis(None)
+
+        allowed, _, _ = await limiter.is_allowed("test")
+        assert allowed is True
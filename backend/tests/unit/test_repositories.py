@@ -0,0 +1,215 @@
+"""
+Tests unitaires pour les repositories.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.conversation import ContextSource, ConversationCreate, ConversationMetadata
+from src.models.document import Document, SourceType
+from src.repositories.base import get_supabase_client
+from src.repositories.conversation_repository import ConversationRepository
+from src.repositories.document_repository import DocumentRepository
+
+
+def _conversation_row(**overrides) -> dict:
+    """Ligne de la table conversations."""
+    return {
+        "id": str(uuid4()),
+        "session_id": "session-1",
+        "user_query": "Question",
+        "ai_response": "Réponse",
+        "context_sources": [],
+        "metadata": {},
+        "created_at": datetime(2024, 1, 1).isoformat(),
+        "thought_process": None,
+        **overrides,
+    }
+
+
+class TestConversationRepository:
+    """Tests pour ConversationRepository."""
+
+    @pytest.fixture
+    def repo(self, fake_supabase):
+        """Repository branché sur le client Supabase en mémoire."""
+        repo = ConversationRepository()
+        repo._client = fake_supabase
+        return repo
+
+    def test_log_conversation_serializes_once(self, repo, fake_supabase):
+        """La conversation est insérée avec des champs JSON (UUIDs en strings)."""
+        user_id, document_id = uuid4(), uuid4()
+        conv = ConversationCreate(
+            session_id="session-1",
+            user_query="Question",
+            ai_response="Réponse",
+            user_id=user_id,
+            context_sources=[
+                ContextSource(source_type="document", document_id=document_id, content_preview="x")
+            ],
+            metadata=ConversationMetadata(
+                reflection_data={"thought_process": "Analyse"},
+                llm_provider="deepseek",
+            ),
+        )
+
+        repo.log_conversation(conv)
+
+        row = fake_supabase.table("conversations").inserts[0]
+        assert row["user_id"] == str(user_id)
+        assert row["context_sources"][0]["document_id"] == str(document_id)
+        assert row["metadata"] == conv.metadata.model_dump(mode="json")
+        assert row["thought_process"] == "Analyse"
+        assert row["reflection_enabled"] is True
+        assert row["llm_provider"] == "deepseek"
+
+    def test_bulk_log_inserts_once(self, repo, fake_supabase):
+        """Les conversations sont insérées en une seule requête."""
+        convs = [
+            ConversationCreate(session_id="session-1", user_query=f"Q{i}", ai_response="R")
+            for i in range(3)
+        ]
+
+        logged = repo.bulk_log(convs)
+
+        inserts = fake_supabase.table("conversations").inserts
+        assert len(inserts) == 1
+        assert [row["user_query"] for row in inserts[0]] == ["Q0", "Q1", "Q2"]
+        assert [c.user_query for c in logged] == ["Q0", "Q1", "Q2"]
+        assert repo.bulk_log([]) == []
+
+    def test_get_by_session_validates_rows(self, repo, fake_supabase):
+        """Les lignes de la session sont converties en Conversation."""
+        fake_supabase.table("conversations").rows = [
+            _conversation_row(user_query="Q1"),
+            _conversation_row(user_query="Q2", feedback_score=4),
+            _conversation_row(session_id="autre"),
+        ]
+
+        conversations = repo.get_by_session("session-1")
+
+        assert [c.user_query for c in conversations] == ["Q1", "Q2"]
+        assert conversations[1].feedback_score == 4
+
+    def test_get_by_session_rejects_invalid_rows(self, repo, fake_supabase):
+        """Une ligne invalide lève une ValidationError, comme Conversation(**row)."""
+        fake_supabase.table("conversations").rows = [_conversation_row(feedback_score=9)]
+
+        with pytest.raises(ValidationError):
+            repo.get_by_session("session-1")
+
+
+class TestDocumentRepository:
+    """Tests pour DocumentRepository."""
+
+    @pytest.fixture
+    def repo(self, fake_supabase):
+        """Repository branché sur le client Supabase en mémoire."""
+        repo = DocumentRepository()
+        repo._client = fake_supabase
+        return repo
+
+    def test_get_by_source_decodes_compressed_rows(self, repo, fake_supabase):
+        """Les contenus compressés sont décodés avant validation."""
+        text = "Page PDF " * 200
+        stored, encoding = DocumentRepository._encode_content(text)
+        fake_supabase.table("documents").rows = [
+            {
+                "id": str(uuid4()),
+                "content": stored,
+                "content_encoding": encoding,
+                "source_type": "pdf",
+                "source_id": "pdf:cv",
+            },
+            {"id": str(uuid4()), "content": "Court", "source_type": "pdf"},
+        ]
+
+        documents = repo.get_by_source(SourceType.PDF)
+
+        assert encoding == "zstd"
+        assert all(isinstance(d, Document) for d in documents)
+        assert [d.content for d in documents] == [text.strip(), "Court"]
+
+    def test_content_compression_is_thread_safe(self):
+        """Compression et décompression concurrentes (un contexte zstd par thread)."""
+        texts = [f"Page PDF {i} " * 500 for i in range(8)]
+
+        def round_trip(text):
+            for _ in range(20):
+                stored, encoding = DocumentRepository._encode_content(text)
+                row = {"content": stored, "content_encoding": encoding}
+                assert DocumentRepository._decode_row(row)["content"] == text
+            return True
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert all(executor.map(round_trip, texts))
+
+    def test_search_similar_returns_matches(self, repo, fake_supabase):
+        """Les résultats du RPC sont convertis en DocumentMatch."""
+        fake_supabase.rpc_results["match_documents_dot"] = [
+            {
+                "id": str(uuid4()),
+                "content": "Contenu",
+                "content_encoding": "identity",
+                "source_type": "github",
+                "similarity": 0.9,
+                "created_at": datetime(2024, 1, 1).isoformat(),
+            }
+        ]
+
+        matches = repo.search_similar([3.0, 0.0, 4.0], api_key_id="key-1")
+
+        assert [m.similarity for m in matches] == [0.9]
+        name, params = fake_supabase.rpc_calls[0]
+        assert name == "match_documents_dot"
+        assert params["filter_api_key_id"] == "key-1"
+        assert json.loads(params["query_embedding"]) == pytest.approx([0.6, 0.0, 0.8])
+
+    def test_create_stores_normalized_embedding(self, repo, fake_supabase):
+        """L'embedding est normalisé (norme L2 = 1) avant l'insertion."""
+        document = repo.create(
+            {"content": "Contenu", "source_type": "github", "embedding": [3.0, 4.0]}
+        )
+
+        stored = fake_supabase.table("documents").inserts[0]["embedding"]
+        assert json.loads(stored) == pytest.approx([0.6, 0.8])
+        assert document.embedding == pytest.approx([0.6, 0.8])
+
+    def test_get_existing_hashes_queries_by_chunk(self, repo, fake_supabase):
+        """Une requête par tranche de hashes, au lieu d'une par document."""
+        hashes = [Document.compute_hash(f"doc {i}") for i in range(5)]
+        table = fake_supabase.table("documents")
+        table.rows = [{"content_hash": hashes[1]}, {"content_hash": hashes[4]}]
+
+        existing = repo.get_existing_hashes(hashes, chunk_size=2)
+
+        assert existing == {hashes[1], hashes[4]}
+        assert table.selects == 3
+        assert repo.get_existing_hashes([]) == set()
+        assert table.selects == 3
+
+
+class TestSharedSupabaseClient:
+    """Tests pour le client Supabase partagé."""
+
+    def test_repositories_share_one_client(self, monkeypatch):
+        """Tous les repositories utilisent le même client (et son pool HTTP)."""
+        created = []
+        monkeypatch.setattr(
+            "src.repositories.base.create_client",
+            lambda url, key: created.append((url, key)) or object(),
+        )
+        get_supabase_client.cache_clear()
+        try:
+            first, second = DocumentRepository(), ConversationRepository()
+
+            assert first.client is second.client
+            assert len(created) == 1
+        finally:
+            get_supabase_client.cache_clear()
@@ -7,6 +7,9 @@ Vérifie que les webhooks Stripe sont protégés contre:
 - Les events trop vieux (> 5 minutes)
 """
 
+import hashlib
+import hmac
+import json
 import pytest
 import time
 from unittest.mock import MagicMock, patch, AsyncMock
@@ -25,17 +28,22 @@ def mock_stripe_settings():
 
 
 @pytest.fixture
-def stripe_service(mock_stripe_settings):
+def stripe_service(mock_stripe_settings, fake_supabase):
     """Crée une instance de StripeService avec mocks."""
     with patch("src.services.stripe_service.get_settings", return_value=mock_stripe_settings):
-        with patch("src.services.stripe_service.UserRepository") as mock_repo:
+        with patch("src.services.stripe_service.UserRepository") as mock_repo, patch(
+            "src.services.stripe_service.get_db_pool", AsyncMock(return_value=None)
+        ):
             mock_repo_instance = MagicMock()
-            mock_repo_instance.client = MagicMock()
+            mock_repo_instance.client = fake_supabase
             mock_repo.return_value = mock_repo_instance
             
+            from src.services import stripe_service as stripe_service_module
             from src.services.stripe_service import StripeService
+            stripe_service_module._recent_event_ids.clear()
             service = StripeService()
             yield service
+            stripe_service_module._recent_event_ids.clear()
 
 
 @pytest.fixture
@@ -78,19 +86,15 @@ class TestWebhookReplayProtection:
     @pytest.mark.asyncio
     async def test_valid_webhook_is_processed(self, stripe_service, valid_webhook_event):
         """Un webhook valide et nouveau doit être traité."""
-        import stripe
-        
-        with patch.object(stripe.Webhook, "construct_event", return_value=valid_webhook_event):
+        with patch.object(stripe_service, "_verify_signature"):
             # Mock: event non traité auparavant
-            stripe_service._is_event_already_processed = MagicMock(return_value=False)
-            stripe_service._mark_event_as_processed = MagicMock()
+            stripe_service._try_claim_event = AsyncMock(return_value=True)
             stripe_service._handle_checkout_completed = AsyncMock()
             
-            result = await stripe_service.handle_webhook(b"payload", "sig_header")
+            result = await stripe_service.handle_webhook(json.dumps(valid_webhook_event).encode(), "sig_header")
             
             assert result is True
-            stripe_service._is_event_already_processed.assert_called_once_with("evt_test_123")
-            stripe_service._mark_event_as_processed.assert_called_once_with(
+            stripe_service._try_claim_event.assert_called_once_with(
                 "evt_test_123", 
                 "checkout.session.completed"
             )
@@ -99,43 +103,56 @@ class TestWebhookReplayProtection:
     @pytest.mark.asyncio
     async def test_replayed_webhook_is_rejected(self, stripe_service, valid_webhook_event):
         """Un webhook déjà traité doit être rejeté."""
-        import stripe
-        
-        with patch.object(stripe.Webhook, "construct_event", return_value=valid_webhook_event):
+        with patch.object(stripe_service, "_verify_signature"):
             # Mock: event déjà traité
-            stripe_service._is_event_already_processed = MagicMock(return_value=True)
+            stripe_service._try_claim_event = AsyncMock(return_value=False)
             stripe_service._handle_checkout_completed = AsyncMock()
             
-            result = await stripe_service.handle_webhook(b"payload", "sig_header")
+            result = await stripe_service.handle_webhook(json.dumps(valid_webhook_event).encode(), "sig_header")
             
             assert result is False
-            stripe_service._is_event_already_processed.assert_called_once_with("evt_test_123")
+            stripe_service._try_claim_event.assert_called_once_with(
+                "evt_test_123",
+                "checkout.session.completed"
+            )
             # Le handler ne doit pas être appelé
             stripe_service._handle_checkout_completed.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_old_webhook_is_rejected(self, stripe_service, old_webhook_event):
         """Un webhook trop vieux (> 5 minutes) doit être rejeté."""
-        import stripe
-        
-        with patch.object(stripe.Webhook, "construct_event", return_value=old_webhook_event):
-            stripe_service._is_event_already_processed = MagicMock(return_value=False)
+        with patch.object(stripe_service, "_verify_signature"):
+            stripe_service._try_claim_event = AsyncMock(return_value=True)
             stripe_service._handle_checkout_completed = AsyncMock()
             
-            result = await stripe_service.handle_webhook(b"payload", "sig_header")
+            result = await stripe_service.handle_webhook(json.dumps(old_webhook_event).encode(), "sig_header")
             
             assert result is False
-            # Ne doit même pas vérifier si déjà traité car trop vieux - l'ordre est timestamp puis rejeu
+            # Ne doit même pas réserver l'event car trop vieux - l'ordre est timestamp puis rejeu
+            stripe_service._try_claim_event.assert_not_called()
             stripe_service._handle_checkout_completed.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_failed_processing_releases_claim(self, stripe_service, valid_webhook_event):
+        """Un échec de traitement libère la réservation pour permettre un retry."""
+        with patch.object(stripe_service, "_verify_signature"):
+            stripe_service._try_claim_event = AsyncMock(return_value=True)
+            stripe_service._release_event = MagicMock()
+            stripe_service._handle_checkout_completed = AsyncMock(side_effect=Exception("boom"))
+            
+            result = await stripe_service.handle_webhook(json.dumps(valid_webhook_event).encode(), "sig_header")
+            
+            assert result is False
+            stripe_service._release_event.assert_called_once_with("evt_test_123")
+
     @pytest.mark.asyncio
     async def test_invalid_signature_is_rejected(self, stripe_service):
         """Un webhook avec signature invalide doit être rejeté."""
         import stripe
         
         with patch.object(
-            stripe.Webhook, 
-            "construct_event", 
+            stripe_service,
+            "_verify_signature",
             side_effect=stripe.error.SignatureVerificationError("Invalid", "sig")
         ):
             result = await stripe_service.handle_webhook(b"payload", "bad_sig")
@@ -145,63 +162,175 @@ class TestWebhookReplayProtection:
     @pytest.mark.asyncio
     async def test_invalid_payload_is_rejected(self, stripe_service):
         """Un webhook avec payload invalide doit être rejeté."""
-        import stripe
-        
-        with patch.object(
-            stripe.Webhook, 
-            "construct_event", 
-            side_effect=ValueError("Invalid JSON")
-        ):
+        with patch.object(stripe_service, "_verify_signature"):
             result = await stripe_service.handle_webhook(b"bad_payload", "sig")
             
             assert result is False
 
 
+def _sign(payload: bytes, secret: str = "whsec_xxx", timestamp: int | None = None) -> str:
+    """Construit un en-tête Stripe-Signature valide pour le payload."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(
+        secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class TestWebhookSignature:
+    """Tests pour la vérification locale des signatures Stripe."""
+
+    def test_valid_signature_is_accepted(self, stripe_service):
+        """Une signature v1 correcte est acceptée."""
+        payload = b'{"id": "evt_1"}'
+        
+        stripe_service._verify_signature(payload, _sign(payload))
+
+    def test_any_matching_v1_signature_is_accepted(self, stripe_service):
+        """Pendant une rotation de secret, une seule signature v1 suffit."""
+        payload = b'{"id": "evt_1"}'
+        header = _sign(payload).replace("v1=", "v1=deadbeef,v1=")
+        
+        stripe_service._verify_signature(payload, header)
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            None,
+            "",
+            "v1=abc",
+            "t=123",
+        ],
+    )
+    def test_malformed_header_is_rejected(self, stripe_service, header):
+        """Un en-tête sans timestamp ou sans signature est rejeté."""
+        import stripe
+        
+        with pytest.raises(stripe.error.SignatureVerificationError):
+            stripe_service._verify_signature(b"{}", header)
+
+    def test_tampered_payload_is_rejected(self, stripe_service):
+        """Une signature calculée sur un autre payload est rejetée."""
+        import stripe
+        
+        header = _sign(b'{"id": "evt_1"}')
+        with pytest.raises(stripe.error.SignatureVerificationError):
+            stripe_service._verify_signature(b'{"id": "evt_2"}', header)
+
+    def test_wrong_secret_is_rejected(self, stripe_service):
+        """Une signature produite avec un autre secret est rejetée."""
+        import stripe
+        
+        payload = b'{"id": "evt_1"}'
+        with pytest.raises(stripe.error.SignatureVerificationError):
+            stripe_service._verify_signature(payload, _sign(payload, secret="whsec_other"))
+
+    def test_old_timestamp_is_rejected(self, stripe_service):
+        """Une signature hors de la fenêtre de tolérance est rejetée."""
+        import stripe
+        
+        payload = b'{"id": "evt_1"}'
+        header = _sign(payload, timestamp=int(time.time()) - 600)
+        with pytest.raises(stripe.error.SignatureVerificationError):
+            stripe_service._verify_signature(payload, header)
+
+    @pytest.mark.asyncio
+    async def test_signed_webhook_is_processed_end_to_end(self, stripe_service, valid_webhook_event):
+        """Un webhook correctement signé est vérifié, décodé puis traité."""
+        payload = json.dumps(valid_webhook_event).encode()
+        stripe_service._try_claim_event = AsyncMock(return_value=True)
+        stripe_service._handle_checkout_completed = AsyncMock()
+        
+        assert await stripe_service.handle_webhook(payload, _sign(payload)) is True
+        stripe_service._handle_checkout_completed.assert_awaited_once_with(
+            valid_webhook_event["data"]["object"]
+        )
+
+
 class TestWebhookEventStorage:
-    """Tests pour le stockage des events traités."""
+    """Tests pour la réservation des events traités."""
 
-    def test_is_event_already_processed_returns_true_when_exists(self, stripe_service):
-        """Doit retourner True si l'event existe en DB."""
-        # Mock la réponse Supabase
-        mock_response = MagicMock()
-        mock_response.data = [{"event_id": "evt_123"}]
-        stripe_service.user_repo.client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_response
+    @pytest.mark.asyncio
+    async def test_try_claim_event_returns_true_for_new_event(self, stripe_service):
+        """Doit retourner True si l'event est nouveau (ligne insérée)."""
+        supabase = stripe_service.user_repo.client
+        supabase.rpc_results["claim_webhook_event"] = True
         
-        result = stripe_service._is_event_already_processed("evt_123")
+        result = await stripe_service._try_claim_event("evt_new", "checkout.session.completed")
         
         assert result is True
+        assert supabase.rpc_calls == [(
+            "claim_webhook_event",
+            {"p_event_id": "evt_new", "p_event_type": "checkout.session.completed"},
+        )]
 
-    def test_is_event_already_processed_returns_false_when_not_exists(self, stripe_service):
-        """Doit retourner False si l'event n'existe pas en DB."""
-        mock_response = MagicMock()
-        mock_response.data = []
-        stripe_service.user_repo.client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_response
+    @pytest.mark.asyncio
+    async def test_try_claim_event_returns_false_when_already_processed(self, stripe_service):
+        """Doit retourner False si l'event existe déjà en DB."""
+        stripe_service.user_repo.client.rpc_results["claim_webhook_event"] = False
         
-        result = stripe_service._is_event_already_processed("evt_new")
+        result = await stripe_service._try_claim_event("evt_123", "checkout.session.completed")
         
         assert result is False
 
-    def test_is_event_already_processed_returns_true_on_db_error(self, stripe_service):
-        """Doit retourner True (refuser) en cas d'erreur DB par sécurité."""
-        stripe_service.user_repo.client.table.side_effect = Exception("DB Error")
+    @pytest.mark.asyncio
+    async def test_try_claim_event_returns_false_on_db_error(self, stripe_service):
+        """Doit retourner False (refuser) en cas d'erreur DB par sécurité."""
+        stripe_service.user_repo.client.rpc_results["claim_webhook_event"] = Exception("DB Error")
+        
+        result = await stripe_service._try_claim_event("evt_123", "test")
+        
+        assert result is False  # Refuse par précaution
+
+    @pytest.mark.asyncio
+    async def test_try_claim_event_uses_db_pool_when_configured(self, stripe_service):
+        """Avec un pool Postgres, la réservation passe par une requête directe."""
+        pool = MagicMock()
+        pool.fetchval = AsyncMock(side_effect=[True, None])
         
-        result = stripe_service._is_event_already_processed("evt_123")
+        with patch("src.services.stripe_service.get_db_pool", AsyncMock(return_value=pool)):
+            assert await stripe_service._try_claim_event("evt_new", "test") is True
+            assert await stripe_service._try_claim_event("evt_new", "test") is False
         
-        assert result is True  # Refuse par précaution
+        assert pool.fetchval.await_args.args[1:] == ("evt_new", "test")
+        assert stripe_service.user_repo.client.rpc_calls == []
 
-    def test_mark_event_as_processed_inserts_record(self, stripe_service):
-        """Doit insérer un enregistrement en DB."""
-        stripe_service._mark_event_as_processed("evt_123", "checkout.session.completed")
+    def test_release_event_deletes_record(self, stripe_service):
+        """Doit supprimer la réservation en DB."""
+        stripe_service._release_event("evt_123")
         
-        stripe_service.user_repo.client.table.assert_called_with("processed_webhook_events")
-        stripe_service.user_repo.client.table.return_value.insert.assert_called_once_with({
-            "event_id": "evt_123",
-            "event_type": "checkout.session.completed"
-        })
+        table = stripe_service.user_repo.client.table("processed_webhook_events")
+        assert table.deletes == [[("event_id", "evt_123")]]
 
-    def test_mark_event_as_processed_handles_error_gracefully(self, stripe_service):
+    def test_release_event_handles_error_gracefully(self, stripe_service):
         """Ne doit pas lever d'exception en cas d'erreur DB."""
-        stripe_service.user_repo.client.table.return_value.insert.side_effect = Exception("DB Error")
+        stripe_service.user_repo.client.table("processed_webhook_events").error = Exception("DB Error")
         
         # Ne doit pas lever d'exception
-        stripe_service._mark_event_as_processed("evt_123", "test")
+        stripe_service._release_event("evt_123")
+
+    @pytest.mark.asyncio
+    async def test_processed_event_is_rejected_without_db_lookup(
+        self, stripe_service, valid_webhook_event
+    ):
+        """Un event traité par ce processus est reconnu sans requête DB."""
+        supabase = stripe_service.user_repo.client
+        supabase.rpc_results["claim_webhook_event"] = True
+        stripe_service._handle_checkout_completed = AsyncMock()
+        with patch.object(stripe_service, "_verify_signature"):
+            assert await stripe_service.handle_webhook(json.dumps(valid_webhook_event).encode(), "sig_header") is True
+        supabase.rpc_calls.clear()
+        
+        assert await stripe_service._try_claim_event("evt_test_123", "checkout.session.completed") is False
+        assert supabase.rpc_calls == []
+
+    def test_remembered_events_expire_with_replay_window(self, stripe_service):
+        """Les events sortis de la fenêtre anti-rejeu sont oubliés."""
+        from src.services import stripe_service as stripe_service_module
+        stripe_service_module._recent_event_ids["evt_old"] = (
+            time.monotonic() - stripe_service_module.WEBHOOK_MAX_AGE_SECONDS - 1
+        )
+        
+        stripe_service_module._remember_processed_event("evt_new")
+        
+        assert list(stripe_service_module._recent_event_ids) == ["evt_new"]
@@ -0,0 +1,151 @@
+"""
+Tests unitaires pour les tâches d'ingestion en background.
+"""
+
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.document import SourceType
+from src.providers.base import BaseProvider, ExtractedContent
+from src.repositories.document_repository import DocumentRepository
+from src.workers import tasks
+
+
+class FakePipeline:
+    """Pipeline Redis: commandes appliquées à execute()."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: list[tuple] = []
+
+    def hset(self, key, field, value):
+        self.commands.append((key, field, value))
+        return self
+
+    def expire(self, key, ttl):
+        return self
+
+    def execute(self):
+        for key, field, value in self.commands:
+            self.redis.hashes.setdefault(key, {})[field] = str(value).encode()
+
+
+class FakeRedis:
+    """Connexion Redis en mémoire (hashes uniquement)."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, bytes]] = {}
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+
+class FakeGitHubProvider(BaseProvider):
+    """Provider renvoyant des fichiers fixes."""
+
+    source_type = SourceType.GITHUB
+
+    def __init__(self, count: int = 3):
+        self.count = count
+
+    def extract(self, source: str) -> Iterator[ExtractedContent]:
+        for i in range(self.count):
+            yield ExtractedContent(content=f"Fichier {i}", source_id=f"file-{i}", metadata={})
+
+
+class FakeEmbeddingService:
+    """Service d'embeddings enregistrant les textes vectorisés."""
+
+    texts: list[str] = []
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        FakeEmbeddingService.texts = list(texts)
+        return [[1.0, 0.0]] * len(texts)
+
+
+@pytest.fixture
+def job(monkeypatch):
+    """Job RQ courant avec une connexion Redis en mémoire."""
+    job = SimpleNamespace(id="job-1", connection=FakeRedis(), meta={}, save_meta=lambda: None)
+    monkeypatch.setattr(tasks, "get_current_job", lambda: job)
+    return job
+
+
+@pytest.fixture
+def repo(monkeypatch, fake_supabase):
+    """DocumentRepository branché sur le client Supabase en mémoire."""
+    repo = DocumentRepository()
+    repo._client = fake_supabase
+    monkeypatch.setattr("src.repositories.document_repository.DocumentRepository", lambda: repo)
+    monkeypatch.setattr("src.providers.github_provider.GithubProvider", FakeGitHubProvider)
+    monkeypatch.setattr("src.services.embedding_service.EmbeddingService", FakeEmbeddingService)
+    return repo
+
+
+class TestIngestionCheckpoint:
+    """Tests pour la reprise des ingestions via checkpoint."""
+
+    def test_stores_documents_and_saves_checkpoint(self, job, repo, fake_supabase):
+        """Sans checkpoint, tous les documents sont stockés en un INSERT."""
+        result = tasks.ingest_github_repository_task("user-1", "owner/repo", "key-1")
+
+        inserts = fake_supabase.table("documents").inserts
+        assert result["documents_count"] == 3
+        assert result["skipped_existing"] == 0
+        assert len(inserts) == 1
+        assert [row["source_id"] for row in inserts[0]] == ["file-0", "file-1", "file-2"]
+        assert all(row["api_key_id"] == "key-1" for row in inserts[0])
+        assert inserts[0][0]["metadata"]["user_id"] == "user-1"
+        assert job.connection.hget("ingest:job-1", "checkpoint") == b"3"
+
+    def test_missing_checkpoint_does_not_query_stored_documents(self, job, repo, fake_supabase):
+        """Sans checkpoint, aucune vérification des documents déjà stockés."""
+        fake_supabase.table("documents").rows = [{"source_id": "file-0", "api_key_id": "key-1"}]
+
+        tasks.ingest_github_repository_task("user-1", "owner/repo", "key-1")
+
+        assert fake_supabase.table("documents").selects == 0
+        assert FakeEmbeddingService.texts == ["Fichier 0", "Fichier 1", "Fichier 2"]
+
+    def test_resume_skips_stored_documents(self, job, repo, fake_supabase):
+        """Avec un checkpoint, les documents de la clé déjà stockés sont ignorés."""
+        job.connection.hashes["ingest:job-1"] = {"checkpoint": b"1"}
+        fake_supabase.table("documents").rows = [
+            {"source_id": "file-0", "api_key_id": "key-1"},
+            {"source_id": "file-1", "api_key_id": "autre-cle"},
+        ]
+
+        result = tasks.ingest_github_repository_task("user-1", "owner/repo", "key-1")
+
+        inserts = fake_supabase.table("documents").inserts
+        assert result["skipped_existing"] == 1
+        assert result["documents_count"] == 2
+        assert FakeEmbeddingService.texts == ["Fichier 1", "Fichier 2"]
+        assert [row["source_id"] for row in inserts[0]] == ["file-1", "file-2"]
+        assert job.connection.hget("ingest:job-1", "checkpoint") == b"3"
+
+    def test_failed_batch_is_retried_one_by_one(self, job, repo, monkeypatch):
+        """Si l'INSERT du lot échoue, les documents sont stockés un par un."""
+        stored = []
+
+        def bulk_create_from_models(*args, **kwargs):
+            raise RuntimeError("duplicate key")
+
+        def create_from_model(doc, embedding, user_id=None, api_key_id=None):
+            if doc.source_id == "file-1":
+                raise RuntimeError("duplicate key")
+            stored.append(doc.source_id)
+
+        monkeypatch.setattr(repo, "bulk_create_from_models", bulk_create_from_models)
+        monkeypatch.setattr(repo, "create_from_model", create_from_model)
+
+        result = tasks.ingest_github_repository_task("user-1", "owner/repo", "key-1")
+
+        assert stored == ["file-0", "file-2"]
+        assert result["documents_count"] == 2
+        assert job.connection.hget("ingest:job-1", "checkpoint") == b"2"
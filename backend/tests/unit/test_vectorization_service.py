@@ -0,0 +1,170 @@
+"""
+Tests unitaires pour le VectorizationService.
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.models.document import Document, DocumentCreate, SourceType
+from src.providers.base import BaseProvider, ExtractedContent
+
+
+class _FakeProvider(BaseProvider):
+    """Provider factice: un document par source."""
+
+    @property
+    def source_type(self) -> SourceType:
+        return SourceType.GITHUB
+
+    def extract(self, source: str):
+        if source == "broken":
+            raise RuntimeError("boom")
+        yield ExtractedContent(content=f"contenu {source}", source_id=source, metadata={})
+
+
+class TestVectorizationService:
+    """Tests pour l'ingestion depuis un provider."""
+
+    @pytest.fixture
+    def service(self):
+        """Service avec embedding et repository factices."""
+        with patch("src.services.vectorization_service.EmbeddingService"), patch(
+            "src.services.vectorization_service.DocumentRepository"
+        ):
+            from src.services.vectorization_service import VectorizationService
+
+            service = VectorizationService()
+        repo = service._document_repo
+        repo.get_existing_hashes.return_value = {Document.compute_hash("contenu dup")}
+        repo.exists_by_hash.side_effect = (
+            lambda content, content_hash=None: content == "contenu dup"
+        )
+        service._embedding_service.embed_text.return_value = [0.1] * 3
+        service._embedding_service.embed_batch.side_effect = lambda texts: [[0.1] * 3] * len(texts)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_ingest_from_provider_async_batches_calls(self, service):
+        """Un lot = une déduplication, un embed_batch et un INSERT."""
+        repo = service._document_repo
+
+        stats = await service.ingest_from_provider_async(
+            _FakeProvider(), ["a", "b", "dup", "broken", "c"], user_id="user_1"
+        )
+
+        assert stats.total_processed == 4  # "broken" échoue à l'extraction
+        assert stats.total_created == 3
+        assert stats.total_skipped == 1
+        assert repo.get_existing_hashes.call_count == 1
+        service._embedding_service.embed_batch.assert_called_once_with(
+            ["contenu a", "contenu b", "contenu c"]
+        )
+        (docs, embeddings), kwargs = repo.bulk_create_from_models.call_args
+        assert [d.source_id for d in docs] == ["a", "b", "c"]
+        assert kwargs["user_id"] == "user_1"
+        assert kwargs["content_hashes"] == [Document.compute_hash(d.content) for d in docs]
+        service._embedding_service.embed_text.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_per_document(self, service):
+        """Si l'INSERT du lot échoue, chaque document est repris seul."""
+        repo = service._document_repo
+        repo.bulk_create_from_models.side_effect = RuntimeError("duplicate key")
+
+        def create_from_model(doc, embedding, user_id=None, content_hash=None):
+            if doc.source_id == "fail":
+                raise RuntimeError("db")
+            return MagicMock()
+
+        repo.create_from_model.side_effect = create_from_model
+
+        stats = await service.ingest_from_provider_async(
+            _FakeProvider(), ["a", "b", "dup", "fail"], user_id="user_1"
+        )
+
+        assert stats.total_created == 2
+        assert stats.total_skipped == 1
+        assert stats.total_errors == 1
+        # Le doublon déjà écarté n'est pas retraité
+        assert repo.create_from_model.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_duplicates_within_batch_are_skipped(self, service):
+        """Deux contenus identiques dans un lot ne sont stockés qu'une fois."""
+        stats = await service.ingest_from_provider_async(_FakeProvider(), ["a", "a"])
+
+        assert stats.total_created == 1
+        assert stats.total_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_batches_are_embedded_concurrently(self, service):
+        """Plusieurs lots sont vectorisés en parallèle, dans la limite fixée."""
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+
+        def slow_embed(texts):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return [[0.1] * 3] * len(texts)
+
+        service._embedding_service.embed_batch.side_effect = slow_embed
+
+        stats = await service.ingest_from_provider_async(
+            _FakeProvider(), [f"doc{i}" for i in range(16)], concurrency=4, batch_size=2
+        )
+
+        assert stats.total_created == 16
+        assert 1 < peak <= 4
+
+    @pytest.mark.asyncio
+    async def test_extraction_overlaps_batch_processing(self, service):
+        """Le lot suivant est extrait pendant la vectorisation du précédent."""
+        second_batch_extracted = threading.Event()
+        overlapped = []
+
+        class _TracingProvider(_FakeProvider):
+            def extract(self, source):
+                if source == "doc2":
+                    second_batch_extracted.set()
+                yield from super().extract(source)
+
+        def embed(texts):
+            if "contenu doc0" in texts:
+                overlapped.append(second_batch_extracted.wait(timeout=1))
+            return [[0.1] * 3] * len(texts)
+
+        service._embedding_service.embed_batch.side_effect = embed
+
+        stats = await service.ingest_from_provider_async(
+            _TracingProvider(), ["doc0", "doc1", "doc2", "doc3"], concurrency=1, batch_size=2
+        )
+
+        assert stats.total_created == 4
+        assert overlapped == [True]
+
+    def test_ingest_documents_uses_batches(self, service):
+        """ingest_documents traite la liste par lots."""
+        docs = [
+            DocumentCreate(content=f"contenu {i}", source_type=SourceType.MANUAL)
+            for i in range(30)
+        ]
+
+        stats = service.ingest_documents(docs)
+
+        assert stats.total_created == 30
+        assert service._document_repo.bulk_create_from_models.call_count == 2
+
+    def test_sync_wrapper(self, service):
+        """La version synchrone délègue à la version asynchrone."""
+        stats = service.ingest_from_provider(_FakeProvider(), ["a"])
+
+        assert stats.total_created == 1
@@ -0,0 +1,51 @@
+"""
+Tests unitaires pour les utilitaires de vecteurs.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.utils import vectors
+from src.utils.vectors import l2_normalize, to_pgvector
+
+
+class TestL2Normalize:
+    """Tests pour l2_normalize."""
+
+    def test_unit_norm(self):
+        """Le vecteur normalisé a une norme de 1."""
+        assert l2_normalize([3.0, 4.0]) == pytest.approx([0.6, 0.8])
+
+    def test_zero_vector_unchanged(self):
+        """Un vecteur nul est renvoyé tel quel."""
+        assert l2_normalize([0.0, 0.0]) == [0.0, 0.0]
+
+
+class TestToPgvector:
+    """Tests pour le format texte pgvector."""
+
+    @pytest.fixture(params=["orjson", "json"])
+    def serializer(self, request, monkeypatch):
+        """Exécute chaque test avec orjson puis avec le fallback json."""
+        if request.param == "json":
+            monkeypatch.setattr(vectors, "orjson", None)
+        elif vectors.orjson is None:
+            pytest.skip("orjson non installé")
+        return request.param
+
+    def test_literal_round_trips(self, serializer):
+        """Le littéral est une liste JSON compacte des valeurs float32."""
+        vector = np.random.default_rng(0).random(1024)
+
+        literal = to_pgvector(vector)
+
+        assert literal.startswith("[") and " " not in literal
+        assert json.loads(literal) == pytest.approx(vector.astype(np.float32).tolist())
+
+    def test_normalize(self, serializer):
+        """normalize=True formate le vecteur unitaire."""
+        assert json.loads(to_pgvector([3.0, 0.0, 4.0], normalize=True)) == pytest.approx(
+            [0.6, 0.0, 0.8]
+        )